@@ -0,0 +1,113 @@
+# bench_csv_index.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Compares opening a CSV file in MatrixPage by reading and parsing every row
+#       up front, as it was done before, with the byte offset index: the time
+#       until the first rows can be shown, the time to index the whole file
+#       and the peak memory of each.
+#
+# Run with: python benchmarks/bench_csv_index.py [N_ROWS]
+
+import csv
+import importlib.util
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# csv_index doesn't need GTK, it's loaded without the models package
+SPEC = importlib.util.spec_from_file_location(
+    "csv_index",
+    os.path.join(os.path.dirname(__file__), "..", "src", "models",
+                 "csv_index.py"))
+csv_index = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(csv_index)
+
+
+def make_csv(path, n_rows):
+    generator = random.Random(0)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["id", "value", "name", "comment"])
+        for row in range(n_rows):
+            writer.writerow([
+                row, generator.random(), f"name {row}",
+                "quoted, with a comma" if row % 10 == 0 else "plain"])
+
+
+def load_all(path):
+    """What MatrixPage did: the whole file parsed into rows"""
+
+    with open(path, encoding="utf-8") as file:
+        content = file.read()
+    rows = [[cell.strip() for cell in cells]
+            for cells in csv.reader(io.StringIO(content))]
+    return len(rows)
+
+
+def load_indexed(path):
+    """Returns the time until the first rows are readable"""
+
+    start = time.perf_counter()
+    index = csv_index.CsvIndex(path)
+    thread = threading.Thread(target=index.build)
+    thread.start()
+    index.first_rows.wait()
+    index.get_row(1)
+    first_rows = time.perf_counter() - start
+
+    thread.join()
+    index.close()
+    return first_rows
+
+
+def measure(name, function, path):
+    start = time.perf_counter()
+    result = function(path)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    function(path)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:10} total {elapsed * 1000:8.1f} ms"
+          f"  peak {peak / 2**20:7.1f} MiB")
+    return result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) == 2 else 500000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "data.csv")
+        make_csv(path, n_rows)
+        print(f"{n_rows} rows, {os.path.getsize(path) / 2**20:.1f} MiB\n")
+
+        measure("Parse all", load_all, path)
+        first_rows = measure("Index", load_indexed, path)
+        print(f"\nFirst rows shown after {first_rows * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
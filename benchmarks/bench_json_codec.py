@@ -0,0 +1,166 @@
+# bench_json_codec.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Compares the JSON codec with the standard library on each path it's used
+#       on: packing and unpacking kernel messages (what jupyter_client's
+#       json_packer and json_unpacker do), the server responses, the cells
+#       of a notebook being opened and the journal records.
+#
+# Install orjson to see the gains, without it both columns use the
+#       standard library.
+#
+# Run with: python benchmarks/bench_json_codec.py
+
+import base64
+import json
+import os
+import sys
+import time
+
+# The utils package doesn't need GTK
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils import json_codec  # noqa: E402
+
+REPEAT = 5
+
+
+def make_kernel_messages():
+    """An execute_request header and a display_data with a plot"""
+
+    header = {
+        "msg_id": "c1a8f3d2-3b4b-4a8e-9a41-6f0e2c9d7b11_1234_5",
+        "msg_type": "display_data",
+        "username": "user",
+        "session": "c1a8f3d2-3b4b-4a8e-9a41-6f0e2c9d7b11",
+        "date": "2024-06-01T12:00:00.000000Z",
+        "version": "5.3",
+    }
+    content = {
+        "data": {
+            "image/png": base64.b64encode(os.urandom(60 * 1024)).decode(),
+            "text/plain": "<Figure size 640x480 with 1 Axes>",
+        },
+        "metadata": {},
+        "transient": {},
+    }
+    stream = {"name": "stdout", "text": "Epoch 1/10 - loss: 0.1234\n"}
+    return [header, content, stream] * 200
+
+
+def make_contents_listing():
+    """The response of the Contents API for a directory"""
+
+    return {
+        "name": "project",
+        "path": "project",
+        "type": "directory",
+        "content": [{
+            "name": f"file_{index}.ipynb",
+            "path": f"project/file_{index}.ipynb",
+            "type": "notebook",
+            "mimetype": None,
+            "size": 1024 * index,
+            "writable": True,
+            "created": "2024-06-01T12:00:00.000000Z",
+            "last_modified": "2024-06-01T12:00:00.000000Z",
+            "content": None,
+            "format": None,
+        } for index in range(2000)],
+    }
+
+
+def make_cells():
+    """The cells of a notebook as the stream parser finds them"""
+
+    return [{
+        "cell_type": "code",
+        "execution_count": index,
+        "id": f"cell-{index}",
+        "metadata": {"tags": ["training"]},
+        "source": [f"model.fit(x, y, epochs={index})\n", "plot(history)"],
+        "outputs": [{
+            "output_type": "stream",
+            "name": "stdout",
+            "text": [f"Epoch {epoch} - loss: 0.{epoch:04d}\n"
+                     for epoch in range(50)],
+        }],
+    } for index in range(2000)]
+
+
+def make_journal_records():
+    return [{
+        "op": "source",
+        "id": f"cell-{index % 100}",
+        "start": index,
+        "end": index + 1,
+        "text": "é",
+    } for index in range(5000)]
+
+
+def stdlib_pack(obj):
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def stdlib_unpack(data):
+    return json.loads(data.decode("utf-8", "replace"))
+
+
+def measure(function, items):
+    best = None
+    for _index in range(REPEAT):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def compare(name, baseline, codec, items):
+    baseline_time = measure(baseline, items)
+    codec_time = measure(codec, items)
+    print(f"{name:26} {baseline_time * 1000:9.2f} ms"
+          f" {codec_time * 1000:9.2f} ms"
+          f" {baseline_time / codec_time:7.1f}x")
+
+
+def main():
+    print(f"Codec backend: {json_codec.BACKEND}\n")
+    print(f"{'Path':26} {'json':>12} {'codec':>12} {'gain':>8}")
+
+    messages = make_kernel_messages()
+    packed_messages = [stdlib_pack(message) for message in messages]
+    compare("Kernel message pack", stdlib_pack, json_codec.dumps, messages)
+    compare(
+        "Kernel message unpack", stdlib_unpack, json_codec.loads,
+        packed_messages)
+
+    listing = [stdlib_pack(make_contents_listing())]
+    compare("Contents API response", json.loads, json_codec.loads, listing)
+
+    cells = [stdlib_pack(cell) for cell in make_cells()]
+    compare("Notebook cell decode", json.loads, json_codec.loads, cells)
+
+    records = make_journal_records()
+    compare("Journal record encode", stdlib_pack, json_codec.dumps, records)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# bench_markdown_highlight.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Compares tokenizing a 5000 lines markdown document on every keystroke
+#       (what MarkdownTextView.update_all used to do) with the incremental
+#       MarkdownHighlighter that only tokenizes the edited line.
+#
+# Run with: python benchmarks/bench_markdown_highlight.py
+
+import importlib.util
+import os
+import re
+import time
+
+N_LINES = 5000
+N_EDITS = 200
+
+
+def load_module(name, relative_path):
+    path = os.path.join(os.path.dirname(__file__), "..", relative_path)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_document():
+    blocks = [
+        "# Chapter",
+        "Some text with **bold**, *italic* and `code`.",
+        "A [link](https://example.com) in a line.",
+        "```",
+        "def function():",
+        "    return 1",
+        "```",
+        "",
+        "## Section",
+        "- item with _emphasis_",
+    ]
+    return [blocks[index % len(blocks)] for index in range(N_LINES)]
+
+
+def full_document_spans(text):
+    """The regex passes of the old update_all, without the GTK calls"""
+
+    spans = []
+    for line_start, line_tag in [
+            ("# ", "h1"), ("## ", "h2"), ("### ", "h3"),
+            ("#### ", "h4"), ("##### ", "h5"), ("###### ", "h6")]:
+        pattern = re.compile(f'^({re.escape(line_start)}.*)$', re.MULTILINE)
+        for match in pattern.finditer(text):
+            spans.append((match.start(1), match.end(1), line_tag))
+    for inline_tag, tag_name in [
+            ("**", "bold"), ("***", "bold_italic"), ("___", "bold_italic"),
+            ("*", "italic"), ("_", "italic"), ("`", "code")]:
+        pattern = re.compile(
+            f'({re.escape(inline_tag)}.*?{re.escape(inline_tag)})')
+        for match in pattern.finditer(text):
+            spans.append((match.start(1), match.end(1), tag_name))
+    for match in re.finditer(r'(```.*?```)', text, re.DOTALL):
+        spans.append((match.start(1), match.end(1), "block_code"))
+    for match in re.finditer(r'\[(.*?)\]\((.*?)\)', text):
+        spans.append((match.start(1), match.end(1), "link"))
+    return spans
+
+
+def main():
+    highlighter_module = load_module(
+        "markdown_highlighter", "src/utils/markdown_highlighter.py")
+
+    lines = make_document()
+    edit_line = N_LINES // 2
+
+    start = time.perf_counter()
+    for edit in range(N_EDITS):
+        lines[edit_line] += "x"
+        full_document_spans("\n".join(lines))
+    full_time = (time.perf_counter() - start) / N_EDITS
+
+    highlighter = highlighter_module.MarkdownHighlighter()
+    highlighter.reset(len(lines))
+    highlighter.highlight(lines.__getitem__, len(lines))
+
+    start = time.perf_counter()
+    for edit in range(N_EDITS):
+        lines[edit_line] += "x"
+        highlighter.damage(edit_line, edit_line)
+        highlighter.highlight(lines.__getitem__, len(lines))
+    incremental_time = (time.perf_counter() - start) / N_EDITS
+
+    # Opening a fence forces the rest of the document to be tokenized
+    start = time.perf_counter()
+    lines.insert(edit_line, "```")
+    highlighter.lines_inserted(edit_line - 1, 1)
+    first, last, _spans = highlighter.highlight(lines.__getitem__, len(lines))
+    fence_time = time.perf_counter() - start
+
+    print(f"Document: {N_LINES} lines, {N_EDITS} single character edits")
+    print(f"Full document per edit:   {full_time * 1000:8.3f} ms")
+    print(f"Incremental per edit:     {incremental_time * 1000:8.3f} ms")
+    print(f"Speedup:                  {full_time / incremental_time:8.1f}x")
+    print(f"Unbalanced fence edit:    {fence_time * 1000:8.3f} ms "
+          f"({last - first + 1} lines tokenized)")
+
+
+if __name__ == "__main__":
+    main()
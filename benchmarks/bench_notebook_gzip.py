@@ -0,0 +1,162 @@
+# bench_notebook_gzip.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Compares the disk size, the save time and the load time of a notebook
+#       written as plain .ipynb and as .ipynb.gz. The notebook is read in
+#       chunks through the stream parser as NotebookPage does, the peak
+#       memory shows that the decompressed file is never held whole.
+#
+# The generated notebook has plots (PNG data, that doesn't compress much
+#       more) and long repetitive text outputs, like training logs.
+#
+# Run with: python benchmarks/bench_notebook_gzip.py [N_CELLS]
+
+import base64
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+# The utils package doesn't need GTK
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils import notebook_gzip  # noqa: E402
+from utils import notebook_json  # noqa: E402
+from utils import notebook_stream_parser as stream_parser  # noqa: E402
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def make_png(index):
+    """Deflated pixel rows, with the entropy of an antialiased plot"""
+
+    generator = random.Random(index)
+    rows = []
+    for row in range(200):
+        line = bytearray(b"\xff" * 600)
+        for _point in range(40):
+            column = generator.randrange(600)
+            line[column] = generator.randrange(256)
+        rows.append(bytes(line))
+    return b"\x89PNG\r\n\x1a\n" + zlib.compress(b"".join(rows))
+
+
+def make_notebook(n_cells):
+    cells = []
+    for index in range(n_cells):
+        cells.append({
+            "cell_type": "code",
+            "execution_count": index + 1,
+            "id": f"cell-{index}",
+            "metadata": {},
+            "source": f"model.fit(x, y, epochs={index})\nplot(history)",
+            "outputs": [
+                {
+                    "output_type": "stream",
+                    "name": "stdout",
+                    "text": "".join(
+                        f"Epoch {epoch}/100 - loss: 0.{epoch:04d} "
+                        f"- accuracy: 0.9{epoch:03d}\n"
+                        for epoch in range(100)),
+                },
+                {
+                    "output_type": "display_data",
+                    "data": {
+                        "image/png": base64.b64encode(
+                            make_png(index)).decode(),
+                        "text/plain": "<Figure size 640x480 with 1 Axes>",
+                    },
+                    "metadata": {},
+                },
+            ],
+        })
+
+    return {
+        "cells": cells,
+        "metadata": {"language_info": {"name": "python"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+
+
+def save(path, notebook):
+    fragments = [notebook_json.dumps_cell(cell) for cell in notebook["cells"]]
+    pieces = notebook_json.iter_notebook(notebook, fragments)
+    if notebook_gzip.is_compressed_path(path):
+        pieces = notebook_gzip.iter_compressed(pieces)
+    return notebook_json.write_file_atomic(path, pieces)
+
+
+def load(path):
+    parser = stream_parser.NotebookStreamParser()
+    decoder = None
+    if notebook_gzip.is_compressed_path(path):
+        decoder = notebook_gzip.GzipStreamDecoder()
+
+    n_cells = 0
+    with open(path, "rb") as file:
+        while chunk := file.read(CHUNK_SIZE):
+            for data in decoder.feed(chunk) if decoder else [chunk]:
+                n_cells += len(parser.feed(data))
+
+    if decoder:
+        decoder.close()
+    parser.close()
+
+    return n_cells
+
+
+def measure(name, path, notebook):
+    start = time.perf_counter()
+    size = save(path, notebook)
+    save_time = time.perf_counter() - start
+
+    # Warm the page cache so that only the decoding is measured
+    load(path)
+
+    start = time.perf_counter()
+    load(path)
+    load_time = time.perf_counter() - start
+
+    # Traced separately, tracing slows down the load
+    tracemalloc.start()
+    load(path)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:10} {size / 2**20:7.2f} MiB"
+          f"  save {save_time * 1000:7.1f} ms"
+          f"  load {load_time * 1000:7.1f} ms"
+          f"  peak {peak / 2**20:5.1f} MiB")
+
+
+def main():
+    n_cells = int(sys.argv[1]) if len(sys.argv) == 2 else 500
+    notebook = make_notebook(n_cells)
+
+    with tempfile.TemporaryDirectory() as directory:
+        measure(".ipynb", os.path.join(directory, "a.ipynb"), notebook)
+        measure(".ipynb.gz", os.path.join(directory, "a.ipynb.gz"), notebook)
+
+
+if __name__ == "__main__":
+    main()
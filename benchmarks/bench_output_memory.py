@@ -0,0 +1,180 @@
+# bench_output_memory.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Compares the memory used by the outputs of an output heavy notebook with
+#       the slotted Output model and with the old GObject one, that copied
+#       every payload into a GObject string property.
+#
+# The old model is measured only if PyGObject is available. Python
+#       allocations are measured with tracemalloc, the resident set size is
+#       also reported because GObject properties are allocated by GLib.
+#
+# Run with: python benchmarks/bench_output_memory.py
+
+import base64
+import gc
+import importlib.util
+import json
+import os
+import time
+import tracemalloc
+
+N_CELLS = 2000
+IMAGE_SIZE = 30 * 1024
+
+
+def load_module(name, relative_path):
+    path = os.path.join(os.path.dirname(__file__), "..", relative_path)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_outputs():
+    """Returns the json outputs of a notebook, as loaded from disk"""
+
+    image = base64.b64encode(os.urandom(IMAGE_SIZE)).decode()
+    outputs = []
+    for index in range(N_CELLS):
+        outputs.append({
+            "output_type": "stream",
+            "name": "stdout",
+            "text": [f"Epoch {index} line {line}\n" for line in range(20)],
+        })
+        outputs.append({
+            "output_type": "display_data",
+            "data": {
+                "image/png": image,
+                "text/plain": ["<Figure size 640x480 with 1 Axes>"],
+            },
+            "metadata": {},
+        })
+        outputs.append({
+            "output_type": "execute_result",
+            "execution_count": index,
+            "data": {
+                "text/html": [f"<td>{value}</td>\n" for value in range(50)],
+                "text/plain": [f"{value}\n" for value in range(50)],
+            },
+            "metadata": {},
+        })
+
+    # Round trip so that the strings are not shared between outputs
+    return json.loads(json.dumps(outputs))
+
+
+def get_rss():
+    """Returns the resident set size in bytes"""
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+
+def measure(name, create):
+    json_outputs = make_outputs()
+    gc.collect()
+
+    rss_before = get_rss()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    outputs = [create(json_output) for json_output in json_outputs]
+
+    elapsed = time.perf_counter() - start
+    traced, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = get_rss() - rss_before
+
+    print(f"{name:10} {len(outputs):6} outputs  "
+          f"traced {traced / 2**20:8.1f} MiB  "
+          f"rss {rss / 2**20:8.1f} MiB  "
+          f"{elapsed * 1000:8.1f} ms")
+
+    del outputs
+
+
+def get_legacy_output_class():
+    """Returns the old GObject Output, the display data parsing is kept
+    as it was: every payload is copied in a string property"""
+
+    from gi.repository import GObject
+
+    class LegacyOutput(GObject.GObject):
+        __gtype_name__ = 'LegacyOutput'
+
+        name = GObject.Property(type=str, default="")
+        text = GObject.Property(type=str, default="")
+        execution_count = GObject.Property(type=int, default=0)
+
+        ename = GObject.Property(type=str, default="")
+        evalue = GObject.Property(type=str, default="")
+        traceback = GObject.Property(type=str, default="")
+
+        data_type = GObject.Property(type=int, default=0)
+        data_content = GObject.Property(type=str, default="")
+        plain_content = GObject.Property(type=str, default=None)
+
+        display_id = GObject.Property(type=str, default=None)
+
+        def __init__(self, json_dict):
+            super().__init__()
+
+            self.metadata = None
+
+            match json_dict['output_type']:
+                case 'stream':
+                    self.name = json_dict['name']
+                    self.text = ''.join(json_dict['text'])
+                case 'display_data' | 'execute_result':
+                    data = json_dict['data']
+                    for mime_type in (
+                            'text/html', 'image/png', 'text/plain'):
+                        if mime_type in data:
+                            self.data_content = ''.join(data[mime_type])
+                            break
+                    if 'text/plain' in data:
+                        self.plain_content = ''.join(data['text/plain'])
+                    self.metadata = json_dict['metadata']
+
+    return LegacyOutput
+
+
+def main():
+    output_module = load_module("output", "src/models/output.py")
+
+    print(f"Notebook: {N_CELLS} cells, {N_CELLS * 3} outputs, "
+          f"{IMAGE_SIZE // 1024} KiB images")
+
+    measure("slotted", output_module.Output.new_from_json)
+
+    try:
+        legacy_class = get_legacy_output_class()
+    except ImportError:
+        print("legacy     skipped, PyGObject is not available")
+        return
+
+    measure("legacy", legacy_class)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# bench_storage.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Compares reading a large file directly from the filesystem, as Storage
+#       does when the server shares our filesystem, with the Contents API
+#       used for remote servers.
+#
+# Without arguments the Contents API is simulated in process: the file is
+#       wrapped in the JSON model the server sends and decoded again. Pass
+#       the address and token of a running server, and a path relative to
+#       its root, to measure the real HTTP round trip:
+#
+# Run with: python benchmarks/bench_storage.py [SIZE_MB]
+#           python benchmarks/bench_storage.py URL TOKEN PATH
+
+import json
+import mmap
+import os
+import sys
+import tempfile
+import time
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def make_file(directory, size):
+    path = os.path.join(directory, "large.ipynb")
+    line = '   "x = 1 + 2 # some source code of a cell\\n",\n'.encode()
+    with open(path, "wb") as file:
+        for _index in range(size // len(line)):
+            file.write(line)
+    return path
+
+
+def read_direct(path):
+    with open(path, "rb") as file:
+        return len(file.read())
+
+
+def read_mmap_chunks(path):
+    read = 0
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for start in range(0, len(data), CHUNK_SIZE):
+                read += len(data[start:start + CHUNK_SIZE])
+    return read
+
+
+def read_contents_simulated(path):
+    with open(path, "rb") as file:
+        content = file.read().decode("utf-8")
+    body = json.dumps({
+        "name": os.path.basename(path),
+        "path": os.path.basename(path),
+        "type": "file",
+        "format": "text",
+        "content": content,
+    })
+    return len(json.loads(body)["content"])
+
+
+def read_contents_http(url, token, path):
+    import requests
+
+    response = requests.get(
+        f"{url}/api/contents/{path}",
+        params={"token": token, "type": "file", "format": "text"})
+    return len(response.json()["content"])
+
+
+def read_files_http(url, token, path):
+    import requests
+
+    read = 0
+    with requests.get(
+            f"{url}/files/{path}",
+            params={"token": token}, stream=True) as response:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            read += len(chunk)
+    return read
+
+
+def measure(name, function, *args):
+    start = time.perf_counter()
+    size = function(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{name:28} {size / 2**20:8.1f} MiB  {elapsed * 1000:8.1f} ms")
+
+
+def main():
+    if len(sys.argv) == 4:
+        url, token, path = sys.argv[1:]
+        measure("Contents API (HTTP)", read_contents_http, url, token, path)
+        measure("Files endpoint (HTTP)", read_files_http, url, token, path)
+        return
+
+    size = int(sys.argv[1]) if len(sys.argv) == 2 else 200
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = make_file(directory, size * 2**20)
+
+        # Warm the page cache so that every path reads from memory
+        read_direct(path)
+
+        measure("Direct read", read_direct, path)
+        measure("Direct mmap in chunks", read_mmap_chunks, path)
+        measure("Contents API (simulated)", read_contents_simulated, path)
+
+
+if __name__ == "__main__":
+    main()
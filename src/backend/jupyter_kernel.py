@@ -22,11 +22,17 @@ from gi.repository import GObject, GLib, Gio
 import json
 import asyncio
 import jupyter_client
+import functools
 import traceback
 import re
 
+from jupyter_client.jsonutil import json_default
 from pprint import pprint
 
+from ..utils import json_codec
+from ..utils import table_schema
+from ..utils import inline_figures
+
 
 class Variable(GObject.GObject):
     __gtype_name__ = 'Variable'
@@ -99,6 +105,9 @@ class JupyterKernel(GObject.GObject):
 
         self.shell_futures = {}
 
+        # The width and scale of the outputs, told to the kernel
+        self.figure_size = None
+
         self._running = False
 
         self._variables = Gio.ListStore()
@@ -128,6 +137,8 @@ class JupyterKernel(GObject.GObject):
         # asyncio.create_task(self._get_stdin_msg())
         asyncio.create_task(self._get_shell_msg())
 
+        self.run_setup()
+
     def _connect(self):
         try:
             connection_file_path = jupyter_client.connect.find_connection_file(
@@ -142,12 +153,39 @@ class JupyterKernel(GObject.GObject):
 
         self.kernel_client = jupyter_client.AsyncKernelClient()
         self.kernel_client.load_connection_info(connection_info)
+        self.set_session_codec(self.kernel_client.session)
         self.kernel_client.start_channels()
 
         self._running = True
 
         print(f"Kernel Started: \n{self.kernel_client.comm_info()}")
 
+    def set_session_codec(self, session):
+        """Packs and unpacks the messages of a session with the fast JSON
+        codec, the dates are converted like jupyter_client does
+
+        :param jupyter_client.Session session: The session of the client
+        """
+
+        session.pack = functools.partial(
+            json_codec.dumps, default=json_default)
+        session.unpack = json_codec.loads
+
+        print(f"Kernel messages use the {json_codec.BACKEND} codec")
+
+    async def receive_message(self, channel):
+        """Receives a message without copying the ZMQ frames, the binary
+        buffers of the message stay memoryviews of the received frames
+
+        :param channel: A channel of the kernel client
+        :returns: The deserialized message
+        """
+
+        frames = await channel.socket.recv_multipart(copy=False)
+        _identities, frames = channel.session.feed_identities(
+            frames, copy=False)
+        return channel.session.deserialize(frames, content=True, copy=False)
+
     async def _get_control_msg(self):
         while self._running:
             try:
@@ -161,7 +199,8 @@ class JupyterKernel(GObject.GObject):
     async def _get_iopub_msg(self):
         while self._running:
             try:
-                msg = await self.kernel_client.get_iopub_msg()
+                msg = await self.receive_message(
+                    self.kernel_client.iopub_channel)
                 # print("IOPUB MSG:")
                 # pprint(msg)
                 self.process_iopub_msg(msg)
@@ -290,6 +329,56 @@ class JupyterKernel(GObject.GObject):
 
         self.reset_variables()
 
+        self.run_setup()
+
+    def get_setup_code(self):
+        """Returns the code that configures the kernel for the app"""
+
+        code = table_schema.FORMATTER_SOURCE
+        if self.figure_size:
+            code += inline_figures.get_configure_code(*self.figure_size)
+
+        return code
+
+    def run_setup(self):
+        """Configures a python kernel with a silent execute, DataFrames are
+        also displayed as data resources so they are shown as tables and
+        plots are drawn at the size of the outputs"""
+
+        if self.language != "python":
+            return
+
+        asyncio.create_task(self._run_silent(self.get_setup_code()))
+
+    def set_figure_size(self, output_width, scale=1):
+        """Tells a python kernel the size of the outputs, so that plots
+        are rendered at the size they are displayed
+
+        :param int output_width: The width of the outputs in logical pixels
+        :param int scale: The scale factor of the screen
+        """
+
+        if self.language != "python":
+            return
+
+        figure_size = (output_width, scale)
+        previous_size = self.figure_size
+        self.figure_size = figure_size
+
+        if previous_size and inline_figures.get_figure_options(
+                *previous_size) == inline_figures.get_figure_options(
+                *figure_size):
+            return
+
+        asyncio.create_task(self._run_silent(
+            inline_figures.get_configure_code(*figure_size)))
+
+    async def _run_silent(self, code):
+        try:
+            await self.evaluate({}, code)
+        except Exception as e:
+            print(f"Could not set up the kernel: {e}")
+
     async def wait_for_idle(self):
         while self.status != "idle":
             pass
@@ -311,3 +400,34 @@ class JupyterKernel(GObject.GObject):
             return response['content']
         finally:
             self.shell_futures.pop(msg_id, None)
+
+    async def evaluate(self, expressions, code="", timeout=30.0):
+        """Evaluates expressions in the kernel with a silent execute, the
+        history and the execution count are not touched
+
+        :param dict expressions: The expressions to evaluate by name
+        :param str code: The code to run before evaluating them
+        :param float timeout: The seconds to wait for the reply
+        :returns: The results of the expressions by name
+        :rtype: dict
+        :raises RuntimeError: If the code fails
+        """
+
+        msg_id = self.kernel_client.execute(
+            code, silent=True, store_history=False,
+            user_expressions=expressions)
+
+        future = asyncio.Future()
+        self.shell_futures[msg_id] = future
+
+        try:
+            response = await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self.shell_futures.pop(msg_id, None)
+
+        content = response['content']
+        if content['status'] != 'ok':
+            raise RuntimeError(
+                f"{content.get('ename')}: {content.get('evalue')}")
+
+        return content['user_expressions']
@@ -21,10 +21,13 @@ from gi.repository import Gio, Xdp, GLib
 from gi.repository import GObject
 
 from .jupyter_kernel import JupyterKernel, JupyterKernelInfo
+from ..utils.utilities import split_in_chunks
+from ..utils import json_codec
 from pprint import pprint
 
 import re
 import os
+import base64
 import asyncio
 import requests
 import uuid
@@ -53,6 +56,9 @@ class KernelSession(GObject.GObject):
 class JupyterServer(GObject.GObject):
     __gtype_name__ = 'JupyterServer'
 
+    STREAM_CHUNK_SIZE = 1024 * 1024
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
     __gsignals__ = {
         'started': (GObject.SignalFlags.RUN_FIRST, None, ()),
         'new-line': (GObject.SignalFlags.RUN_FIRST, None, (str,)),
@@ -80,7 +86,12 @@ class JupyterServer(GObject.GObject):
     flatpak_spawn = GObject.Property(type=bool, default=False)
     conn_file_dir = GObject.Property(type=str, default="")
 
+    # The directory served, shown by "jupyter-server list" after "::" and
+    #       in the log when the server starts
+    root_dir = GObject.Property(type=str, default="")
+
     address_pattern = r'(http[s]?://\S+?)\?token=([\w-]+)'
+    root_dir_pattern = r'(?:::|local directory:)\s+(\S.*?)\s*$'
 
     _instance = None
     _initialized = False
@@ -118,6 +129,7 @@ class JupyterServer(GObject.GObject):
 
         if succ:
             output_str = output_buf.get_data().decode('utf-8')
+            self._get_root_dir(output_str)
             if self._get_address(output_str):
                 return
 
@@ -144,9 +156,18 @@ class JupyterServer(GObject.GObject):
 
             self.emit("new-line", line)
 
+            if self.root_dir == "":
+                self._get_root_dir(line)
+
             if self.address == "":
                 self._get_address(line)
 
+    def _get_root_dir(self, string):
+        root_dirs = re.findall(self.root_dir_pattern, string, re.MULTILINE)
+
+        if root_dirs != []:
+            self.root_dir = root_dirs[0]
+
     def _get_address(self, string):
         addresses = re.findall(self.address_pattern, string)
 
@@ -275,7 +296,7 @@ class JupyterServer(GObject.GObject):
             return False, None
 
         if response.status_code == 201:
-            kernel_info = response.json()
+            kernel_info = json_codec.loads(response.content)
 
             kernel_language = ""
             for av_kernel_info in self.avalaible_kernels:
@@ -310,7 +331,7 @@ class JupyterServer(GObject.GObject):
             return False, None
 
         if response.status_code == 200:
-            kernel_specs = response.json()
+            kernel_specs = json_codec.loads(response.content)
             return True, kernel_specs
         else:
             return False, None
@@ -329,7 +350,7 @@ class JupyterServer(GObject.GObject):
             return False, None
 
         if response.status_code == 200:
-            sessions = response.json()
+            sessions = json_codec.loads(response.content)
             return True, sessions
         else:
             return False, None
@@ -348,7 +369,7 @@ class JupyterServer(GObject.GObject):
             return False, None
 
         if response.status_code == 200:
-            new_kernels = response.json()
+            new_kernels = json_codec.loads(response.content)
             return True, new_kernels
         else:
             return False, None
@@ -395,7 +416,7 @@ class JupyterServer(GObject.GObject):
             return False, None
 
         if response.status_code == 201:
-            session = response.json()
+            session = json_codec.loads(response.content)
             print(session)
             return True, session
         else:
@@ -415,7 +436,7 @@ class JupyterServer(GObject.GObject):
             return False, None
 
         if response.status_code == 200:
-            sessions = response.json()
+            sessions = json_codec.loads(response.content)
             return True, sessions
         else:
             return False, None
@@ -513,24 +534,207 @@ class JupyterServer(GObject.GObject):
             return False, None
 
         if response.status_code == 200:
-            return True, response.json()
+            return True, json_codec.loads(response.content)
         else:
             return False, None
 
-    async def set_path_content(self, path, content):
+    async def get_path_stream(self, path, chunk_size=None):
+        """Reads the raw bytes of a file in chunks, without waiting for
+        the whole file
+
+        :param str path: The path of the file relative to the server root
+        :param int chunk_size: The size of the chunks
+        :returns: An async iterator of bytes, empty if the file can't be read
+        """
+
         if self.address == "":
-            return False, None
+            return
         try:
             response = await asyncio.to_thread(
                 requests.get,
+                f'{self.address}/files/{path}',
+                params={"token": self.token},
+                stream=True
+            )
+        except Exception as e:
+            print(e)
+            return
+
+        if response.status_code != 200:
+            response.close()
+            return
+
+        chunks = response.iter_content(chunk_size or self.STREAM_CHUNK_SIZE)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            response.close()
+
+    async def set_path_content(
+            self, path, content, progress_callback=None, cancellable=None,
+            total_size=0):
+        """Saves a file with the Contents API. Big files are uploaded in
+        chunks of UPLOAD_CHUNK_SIZE to a temporary file that then replaces
+        the file, so only one chunk is in memory at a time
+
+        :param str path: The path relative to the server root
+        :param content: A str, bytes or an iterable of str or bytes pieces
+        :param callable progress_callback: Called with the fraction uploaded
+        :param Gio.Cancellable cancellable: Stops the upload
+        :param int total_size: The size of the content if it's an iterable
+        :returns: If the file has been saved and its model
+        :rtype: tuple
+        """
+
+        if self.address == "":
+            return False, None
+
+        if isinstance(content, (str, bytes, bytearray)):
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            total_size = len(content)
+            content = [content]
+
+        chunks = split_in_chunks(content, self.UPLOAD_CHUNK_SIZE)
+
+        try:
+            chunk = await asyncio.to_thread(next, chunks, b"")
+            next_chunk = await asyncio.to_thread(next, chunks, None)
+        except Exception as e:
+            print(e)
+            return False, None
+
+        # Small files are saved with a single request
+        if next_chunk is None:
+            success, model = await self._put_chunk(path, chunk, None)
+            if success and progress_callback:
+                progress_callback(1.0)
+            return success, model
+
+        directory, name = os.path.split(path)
+        upload_path = os.path.join(
+            directory, f".{name}.{uuid.uuid4().hex[:8]}.upload")
+
+        uploaded = 0
+        number = 1
+        while chunk is not None:
+            if cancellable and cancellable.is_cancelled():
+                await self._delete_path(upload_path)
+                return False, None
+
+            success, model = await self._put_chunk(
+                upload_path, chunk, -1 if next_chunk is None else number)
+            if not success:
+                await self._delete_path(upload_path)
+                return False, None
+
+            uploaded += len(chunk)
+            if progress_callback and total_size:
+                progress_callback(min(uploaded / total_size, 1.0))
+
+            number += 1
+            chunk = next_chunk
+            if chunk is not None:
+                next_chunk = await asyncio.to_thread(next, chunks, None)
+
+        return await self._replace_path(upload_path, path)
+
+    async def _put_chunk(self, path, chunk, number):
+        """Uploads a chunk, the body is built in a worker thread
+
+        :param str path: The path of the file
+        :param bytes chunk: The content of the chunk
+        :param int number: The chunk number, -1 for the last or None if
+            the file is not chunked
+        """
+
+        def put():
+            model = {
+                "type": "file",
+                "format": "base64",
+                "content": base64.b64encode(chunk).decode("ascii"),
+            }
+            if number is not None:
+                model["chunk"] = number
+            return requests.put(
                 f'{self.address}/api/contents/{path}',
-                params={"token": self.token}
+                params={"token": self.token},
+                data=json_codec.dumps(model),
+                headers={"Content-Type": "application/json"}
+            )
+
+        try:
+            response = await asyncio.to_thread(put)
+        except Exception as e:
+            print(e)
+            return False, None
+
+        if response.status_code in (200, 201):
+            return True, json_codec.loads(response.content)
+        else:
+            print(f"Upload of {path} failed: {response.status_code}")
+            return False, None
+
+    async def _replace_path(self, source_path, path):
+        """Renames source_path to path replacing it. The old file is moved
+        to a backup first and put back if the rename fails, so that it's
+        never lost"""
+
+        directory, name = os.path.split(path)
+        backup_path = os.path.join(
+            directory, f".{name}.{uuid.uuid4().hex[:8]}.backup")
+
+        # Fails if there is no file to replace
+        has_backup, _model = await self._rename_path(path, backup_path)
+
+        success, model = await self._rename_path(source_path, path)
+
+        if not success:
+            if has_backup:
+                restored, _model = await self._rename_path(backup_path, path)
+                if not restored:
+                    print(f"The original of {path} is in {backup_path}")
+            print(f"The upload of {path} is in {source_path}")
+            return False, None
+
+        if has_backup:
+            await self._delete_path(backup_path)
+
+        return True, model
+
+    async def _rename_path(self, source_path, path):
+        """Renames source_path to path, fails if path exists"""
+
+        try:
+            response = await asyncio.to_thread(
+                requests.patch,
+                f'{self.address}/api/contents/{source_path}',
+                params={"token": self.token},
+                data=json_codec.dumps({"path": path}),
+                headers={"Content-Type": "application/json"}
             )
         except Exception as e:
             print(e)
             return False, None
 
         if response.status_code == 200:
-            return True, response.json()
+            return True, json_codec.loads(response.content)
         else:
             return False, None
+
+    async def _delete_path(self, path):
+        try:
+            response = await asyncio.to_thread(
+                requests.delete,
+                f'{self.address}/api/contents/{path}',
+                params={"token": self.token}
+            )
+        except Exception as e:
+            print(e)
+            return False
+
+        return response.status_code == 204
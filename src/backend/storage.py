@@ -0,0 +1,274 @@
+# storage.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject, Gio
+
+from .jupyter_server import JupyterServer
+
+import os
+import mmap
+import asyncio
+
+from datetime import datetime
+
+
+# Reads and writes the files of the server workspace. When the server runs
+#       on the same filesystem the files are read directly, with Gio or with
+#       mmap for large files, otherwise the Contents API of the server is
+#       used
+class Storage(GObject.GObject):
+    __gtype_name__ = "Storage"
+
+    # Files bigger than this are read in chunks from a memory map
+    MMAP_THRESHOLD = 4 * 1024 * 1024
+    CHUNK_SIZE = 1024 * 1024
+
+    # The entries of the server root compared with the local files
+    DETECT_ENTRIES = 8
+
+    is_local = GObject.Property(type=bool, default=False)
+    root_dir = GObject.Property(type=str, default="")
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(Storage, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        if self._initialized:
+            return
+
+        self.server = JupyterServer()
+        self.server.connect("started", self.on_server_started)
+
+        self.detect_task = None
+        if self.server.address != "":
+            self.on_server_started(self.server)
+
+        Storage._initialized = True
+
+    def on_server_started(self, server):
+        self.detect_task = asyncio.create_task(self.detect())
+
+    async def detect(self):
+        """Checks if the directory served is readable locally, the size and
+        modification time of the entries in the server root are compared
+        with the ones of the local files, nothing is written
+
+        :returns: True if the files can be read directly
+        :rtype: bool
+        """
+
+        root_dir = self.server.root_dir
+        self.is_local = False
+
+        if not root_dir or not os.path.isdir(root_dir):
+            return False
+
+        success, contents = await self.server.get_path_content("")
+        if not success or not isinstance(contents.get("content"), list):
+            return False
+
+        entries = [
+            entry for entry in contents["content"]
+            if entry.get("name") and entry.get("last_modified")]
+        if not entries:
+            return False
+
+        entries = entries[:self.DETECT_ENTRIES]
+        is_local = await asyncio.to_thread(
+            self._match_entries, root_dir, entries)
+        if not is_local:
+            return False
+
+        self.root_dir = root_dir
+        self.is_local = True
+
+        return True
+
+    def _match_entries(self, root_dir, entries):
+        """Returns True if every entry of the Contents API matches the local
+        file with the same name"""
+
+        for entry in entries:
+            try:
+                stat = os.stat(os.path.join(root_dir, entry["name"]))
+                last_modified = datetime.fromisoformat(
+                    entry["last_modified"].replace("Z", "+00:00"))
+            except (OSError, ValueError):
+                return False
+
+            if abs(stat.st_mtime - last_modified.timestamp()) > 1:
+                return False
+
+            size = entry.get("size")
+            if entry.get("type") != "directory" and size is not None:
+                if size != stat.st_size:
+                    return False
+
+        return True
+
+    async def wait_detection(self):
+        """Waits until the filesystem detection is done"""
+
+        if self.detect_task:
+            await self.detect_task
+
+    def get_local_path(self, path):
+        """Gets the local path of a file of the server
+
+        :param str path: The path relative to the server root
+        :returns: The local path or None if the files are not local
+        :rtype: str
+        """
+
+        if not self.is_local:
+            return None
+        return os.path.join(self.root_dir, path.lstrip("/"))
+
+    #
+    #   READING
+    #
+
+    async def read_text(self, path):
+        """Reads a text file
+
+        :param str path: The path relative to the server root
+        :returns: If the file has been read and its content
+        :rtype: tuple
+        """
+
+        await self.wait_detection()
+
+        local_path = self.get_local_path(path)
+        if local_path is None:
+            success, contents = await self.server.get_path_content(path)
+            if not success:
+                return False, None
+            return True, contents.get("content", "")
+
+        success, data = await self.read_bytes_local(local_path)
+        if not success:
+            return False, None
+
+        return True, data.decode("utf-8")
+
+    async def iter_bytes(self, path):
+        """Reads a file in chunks
+
+        :param str path: The path relative to the server root
+        :returns: An async iterator of bytes
+        """
+
+        await self.wait_detection()
+
+        local_path = self.get_local_path(path)
+        if local_path is None:
+            async for chunk in self.server.get_path_stream(path):
+                yield chunk
+            return
+
+        if os.path.getsize(local_path) < self.MMAP_THRESHOLD:
+            success, data = await self.read_bytes_local(local_path)
+            if success:
+                yield data
+            return
+
+        with open(local_path, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for start in range(0, len(data), self.CHUNK_SIZE):
+                    yield data[start:start + self.CHUNK_SIZE]
+                    # Let the main loop run between the chunks
+                    await asyncio.sleep(0)
+
+    async def read_bytes_local(self, local_path):
+        """Reads a whole local file
+
+        :param str local_path: The local path
+        :returns: If the file has been read and its content
+        :rtype: tuple
+        """
+
+        gfile = Gio.File.new_for_path(local_path)
+        try:
+            success, data, _etag = await gfile.load_contents_async(None)
+        except Exception as e:
+            print(e)
+            return False, None
+
+        return success, data
+
+    #
+    #   WRITING
+    #
+
+    def is_remote_path(self, path):
+        """Returns True if a file has to be written through the server
+
+        Absolute paths are local files chosen with a file dialog.
+
+        :param str path: The path of the file
+        :rtype: bool
+        """
+
+        return (
+            self.server.address != ""
+            and not self.is_local
+            and not os.path.isabs(path))
+
+    def resolve_local_path(self, path):
+        """Gets the local path where a file is written
+
+        :param str path: An absolute path or relative to the server root
+        :returns: The local path
+        :rtype: str
+        """
+
+        if os.path.isabs(path) or not self.is_local:
+            return path
+        return self.get_local_path(path)
+
+    async def upload(
+            self, path, content, progress_callback=None, cancellable=None,
+            total_size=0):
+        """Writes a file through the Contents API in chunks
+
+        :param str path: The path relative to the server root
+        :param content: A str, bytes or an iterable of str or bytes pieces
+        :param callable progress_callback: Called with the fraction uploaded
+        :param Gio.Cancellable cancellable: Stops the upload
+        :param int total_size: The size of the content if it's an iterable
+        :returns: The number of bytes written or None on failure
+        """
+
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        if isinstance(content, bytes):
+            total_size = len(content)
+
+        success, model = await self.server.set_path_content(
+            path, content, progress_callback, cancellable, total_size)
+
+        if not success:
+            return None
+        return model.get("size") or total_size
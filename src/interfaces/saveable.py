@@ -19,6 +19,7 @@
 from gi.repository import GObject, Gio, Panel
 from ..others.save_delegate import GenericSaveDelegate
 from ..backend.jupyter_server import JupyterServer
+from ..backend.storage import Storage
 from .language import ILanguage
 from gettext import gettext as _
 import os
@@ -39,6 +40,7 @@ class ISaveable:
             self.buffer.connect("changed", self.on_text_changed)
 
             self.server = JupyterServer()
+            self.storage = Storage()
 
         if isinstance(self, Panel.Widget):
             menu = Gio.Menu()
@@ -58,10 +60,10 @@ class ISaveable:
         """Handles loading the file in the buffer"""
 
         try:
-            success, contents = await self.server.get_path_content(file_path)
+            success, content = await self.storage.read_text(file_path)
 
             if success:
-                self.buffer.set_text(contents.get("content", ""))
+                self.buffer.set_text(content)
                 self.set_modified(False)
             else:
                 return
@@ -78,6 +80,23 @@ class ISaveable:
             if language:
                 self.set_language(language.get_id())
 
+    async def save_file(self, file_path):
+        """Writes the page content to a file
+
+        :param str file_path: The path of the file
+        :returns: The number of bytes written or None on failure
+        """
+
+        if self.storage.is_remote_path(file_path):
+            return await self.storage.upload(
+                file_path,
+                self.get_content(),
+                self.save_delegate.report_progress,
+                self.save_delegate.cancellable)
+
+        return await self.save_delegate.write_content(
+            self.storage.resolve_local_path(file_path), self.get_content())
+
     def on_text_changed(self, *_args):
         """Used to set the page to modified when the buffer changes"""
 
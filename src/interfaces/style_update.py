@@ -20,10 +20,12 @@
 from ..others.style_manager import StyleManager
 
 
+# The IStyleUpdate interface is used for anything that needs to update
+#       when the style changes, updates are batched by the StyleManager
 class IStyleUpdate:
     def __init__(self):
         self.style_manager = StyleManager()
-        self.style_manager.connect("style-changed", self.update_style_scheme)
+        self.style_manager.subscribe(self)
         self.update_style_scheme()
 
     def update_style_scheme(self, *_args):
@@ -36,4 +38,4 @@ class IStyleUpdate:
         self.buffer.set_style_scheme(scheme)
 
     def disconnect(self, *_args):
-        self.style_manager.disconnect_by_func(self.update_style_scheme)
+        self.style_manager.unsubscribe(self)
@@ -17,15 +17,18 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import Gio
 from gi.repository import GObject
 
 import nbformat
 import uuid
+import functools
 
 from enum import IntEnum
 
 from .output import Output, OutputType
+from ..utils import json_codec
+from ..utils.output_store import (
+    get_outputs_reference, set_outputs_reference, strip_outputs_reference)
 
 
 class CellType(IntEnum):
@@ -40,50 +43,93 @@ class Cell(GObject.GObject):
 
     __gsignals__ = {
         'output-added': (
-            GObject.SignalFlags.RUN_FIRST, None, (GObject.GObject,)),
+            GObject.SignalFlags.RUN_FIRST, None, (object,)),
         'output-updated': (
-            GObject.SignalFlags.RUN_FIRST, None, (GObject.GObject,)),
+            GObject.SignalFlags.RUN_FIRST, None, (object,)),
         'output-reset': (
             GObject.SignalFlags.RUN_FIRST, None, ()),
         'execution-count-changed': (
             GObject.SignalFlags.RUN_FIRST, None, (int,)),
+        'source-changed': (
+            GObject.SignalFlags.RUN_FIRST, None, ()),
     }
 
     cell_type = GObject.Property(type=int, default=CellType.CODE)
-    source = GObject.Property(type=str, default="")
     id = GObject.Property(type=str, default="")
     executing = GObject.Property(type=bool, default=False)
 
     def __init__(self, _cell_type=CellType.CODE):
         super().__init__()
 
-        self.source = ""
+        # The source is pulled lazily from the provider (the editor buffer)
+        #       only when it has been edited and it's needed
+        self._source = ""
+        self._source_dirty = False
+        self._source_provider = None
+
+        # Incremented on every change of the source
+        self.change_count = 0
+
+        # Incremented on every change of the outputs
+        self.outputs_change_count = 0
+
         self.cell_type = _cell_type
         self.id = ""
+        self.metadata = {}
 
         # Only for Code cells
         self._execution_count = None
-        self._outputs = Gio.ListStore()
+        # Outputs are plain slotted objects, not GObjects
+        self._outputs = []
+        # The undecoded outputs array when loaded from a stream, or a
+        #       function reading it from the output store
+        self._raw_outputs = None
+        # The hash of the outputs in the output store, while unchanged
+        self.outputs_reference = None
+        self._output_store = None
         self.executing = False
 
     @classmethod
-    def new_from_json(cls, json_cell):
+    def new_from_json(cls, json_cell, raw_outputs=None, output_store=None):
         """Initialize a new Cell from a json representation of the cell"""
 
         instance = cls()
 
-        instance.parse(json_cell)
+        instance.parse(json_cell, raw_outputs, output_store)
 
         return instance
 
-    @GObject.Property(type=GObject.GObject)
+    @GObject.Property(type=str, default="")
+    def source(self):
+        if self._source_dirty:
+            self._source_dirty = False
+            self._source = self._source_provider()
+        return self._source
+
+    @source.setter
+    def source(self, value):
+        self._source = value
+        self._source_dirty = False
+        self.change_count += 1
+
+    @property
+    def synced_source(self):
+        """The source as it was last read, the edits are not pulled from the
+        provider"""
+
+        return self._source
+
+    @property
     def outputs(self):
+        self._load_outputs()
         return self._outputs
 
     @outputs.setter
     def outputs(self, values):
-        self._outputs = values
-        self.notify("outputs")
+        self._raw_outputs = None
+        self.forget_outputs_reference()
+        self._outputs = list(values)
+        self.outputs_change_count += 1
 
     @GObject.Property(type=int, default=0)
     def execution_count(self):
@@ -111,54 +157,136 @@ class Cell(GObject.GObject):
 
         return self.source
 
+    def set_source_provider(self, provider):
+        """Sets the function used to get the source after it has been edited
+
+        The current source is synchronized before replacing the provider.
+
+        :param callable provider: A function returning the source or None
+        """
+
+        if self._source_dirty:
+            self.source = self._source_provider()
+        self._source_provider = provider
+
+    def release_source_provider(self, provider):
+        """Removes the provider if it's the current one
+
+        :param callable provider: The provider to remove
+        """
+
+        if self._source_provider == provider:
+            self.set_source_provider(None)
+
+    def mark_source_dirty(self):
+        """Marks the source as edited, it will be pulled from the provider
+        the next time it's needed. source-changed is emitted only when the
+        source was in sync"""
+
+        self.change_count += 1
+
+        if not self._source_dirty and self._source_provider:
+            self._source_dirty = True
+            self.emit("source-changed")
+
+    def has_unloaded_outputs(self):
+        """Returns True if the outputs have not been decoded yet"""
+
+        return self._raw_outputs is not None
+
+    def _load_outputs(self):
+        if self._raw_outputs is None:
+            return
+
+        raw_outputs = self._raw_outputs
+        self._raw_outputs = None
+
+        if callable(raw_outputs):
+            raw_outputs = raw_outputs()
+            if raw_outputs is None:
+                print(f"Outputs {self.outputs_reference} are not stored")
+                return
+
+        try:
+            json_outputs = json_codec.loads(raw_outputs)
+        except ValueError as e:
+            print(e)
+            return
+
+        self._outputs = [
+            Output.new_from_json(json_output) for json_output in json_outputs]
+
     def add_output(self, output):
         """Adds an output to the cell
 
         :param Output output: A new output
         """
 
+        self._load_outputs()
+        self.forget_outputs_reference()
         self._outputs.append(output)
+        self.outputs_change_count += 1
         self.emit("output-added", output)
 
-    def update_output(self, content):
+    def update_output(self, content, buffers=None):
         """Updates an output
 
-        :param str content:
+        :param dict content: The content of the update_display_data message
+        :param list buffers: The binary buffers of the message
         """
 
         display_id = content['transient']['display_id']
-        for index, output in enumerate(self._outputs):
+        for index, output in enumerate(self.outputs):
             if output.display_id == display_id:
                 output = Output(OutputType.DISPLAY_DATA)
-                output.parse(content)
-                self._outputs.remove(index)
-                self._outputs.insert(index, output)
+                output.parse(content, buffers)
+                self._outputs[index] = output
+                self.forget_outputs_reference()
+                self.outputs_change_count += 1
                 self.emit("output-updated", output)
 
     def reset_output(self):
         """Resets all the outputs"""
 
-        self._outputs.remove_all()
+        self._raw_outputs = None
+        self.forget_outputs_reference()
+        self._outputs.clear()
+        self.outputs_change_count += 1
         self.execution_count = 0
         self.emit("output-reset")
 
-    def get_cell_node(self):
-        """Get the type of cell
+    def forget_outputs_reference(self):
+        """Called when the outputs change, they are no longer the ones in
+        the output store"""
 
-        :returns: The type of cell
-        :rtypes: CellType
+        self.outputs_reference = None
+        self._output_store = None
+
+    def get_cell_node(self, output_store=None):
+        """Get the cell as a json node
+
+        :param OutputStore output_store: If the outputs are unchanged since
+            they were read from this store, they are referenced instead
+            of being included
+        :returns: The cell node
         """
 
         if self.cell_type == CellType.TEXT:
             cell_node = nbformat.v4.new_markdown_cell()
             cell_node.source = self.source
             cell_node.id = self.id
+            cell_node.metadata = dict(self.metadata)
             return cell_node
 
         cell_node = nbformat.v4.new_code_cell()
         cell_node.source = self.source
         cell_node.execution_count = self.execution_count
         cell_node.id = self.id
+        cell_node.metadata = dict(self.metadata)
+
+        if (output_store is not None and self.outputs_reference
+                and self._output_store is output_store):
+            return set_outputs_reference(cell_node, self.outputs_reference)
 
         for output in self.outputs:
             output_node = output.get_output_node()
@@ -166,10 +294,14 @@ class Cell(GObject.GObject):
 
         return cell_node
 
-    def parse(self, json_cell):
+    def parse(self, json_cell, raw_outputs=None, output_store=None):
         """Sets its content from a json string containing the data
 
         :param str json_cell: The json representation of the cell
+        :param bytes raw_outputs: The undecoded outputs array, decoded only
+            when the outputs are needed
+        :param OutputStore output_store: Where the outputs referenced in
+            the metadata are read from when needed
         """
 
         if json_cell['cell_type'] == "code":
@@ -180,26 +312,47 @@ class Cell(GObject.GObject):
         self.id = json_cell['id']
         if self.id is None or self.id == "":
             self.id = str(uuid.uuid4())
+        self.metadata = dict(json_cell.get('metadata') or {})
 
         if self.cell_type == CellType.CODE:
             self.execution_count = json_cell['execution_count'] or 0
+            reference = get_outputs_reference(json_cell)
+            if reference and output_store is not None:
+                self.metadata = strip_outputs_reference(self.metadata)
+                self.outputs_reference = reference
+                self._output_store = output_store
+                self._raw_outputs = functools.partial(
+                    output_store.get, reference)
+                return
+            if raw_outputs is not None:
+                self._raw_outputs = raw_outputs
+                return
             for json_output in json_cell['outputs']:
-                match json_output['output_type']:
-                    case 'stream':
-                        output = Output(OutputType.STREAM)
-                        output.text = ''.join(json_output['text'])
-                    case 'display_data':
-                        output = Output(OutputType.DISPLAY_DATA)
-                        output.parse(json_output)
-                    case 'execute_result':
-                        output = Output(OutputType.EXECUTE_RESULT)
-                        output.parse(json_output)
-                        self.execution_count = json_output['execution_count']
-                    case 'error':
-                        output = Output(OutputType.ERROR)
-                # output.metadata = json_output['metadata']
+                output = Output.new_from_json(json_output)
+                if output.output_type == OutputType.EXECUTE_RESULT:
+                    self.execution_count = json_output['execution_count']
                 self.add_output(output)
 
+    def clone(self):
+        """Copies the cell in memory, the outputs are shared because they
+        are never modified in place
+
+        :returns: A new cell copy with a new id
+        :rtypes: Cell
+        """
+
+        cell = Cell(self.cell_type)
+        cell.source = self.source
+        cell.id = str(uuid.uuid4())
+        cell.metadata = dict(self.metadata)
+        cell._execution_count = self._execution_count
+        cell._outputs = list(self._outputs)
+        cell._raw_outputs = self._raw_outputs
+        cell.outputs_reference = self.outputs_reference
+        cell._output_store = self._output_store
+
+        return cell
+
     def copy(self):
         """Copies the cell
 
@@ -0,0 +1,220 @@
+# csv_index.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# The byte offset of each row of a memory mapped CSV file. The index is
+#       built in a worker thread and can be read while it grows, a row is
+#       parsed only when it's asked for.
+#
+# A newline ends a row only if the quotes seen since the start of the row
+#       are even, so quoted fields can span lines. Quotes must be used as
+#       the CSV format says: a stray quote in an unquoted field shifts the
+#       rows that follow
+
+import csv
+import io
+import mmap
+import os
+import threading
+
+from array import array
+from itertools import accumulate, islice
+
+# The bytes scanned at once by the indexer
+CHUNK_SIZE = 4 * 1024 * 1024
+
+UTF8_BOM = b"\xef\xbb\xbf"
+
+
+class CsvIndex:
+    """The rows of a CSV file, indexed by byte offset
+
+    :param str path: The path of the file
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+
+        # An empty file can't be mapped
+        self._data = b""
+        if self.size:
+            self._data = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # The offset where each row starts, the last one can still be
+        #       growing while the index is built
+        self._offsets = array("q")
+        self._indexed = 0
+        self._finished = False
+        self._cancelled = False
+        self._building = False
+
+        # Set when the first rows are indexed, or when there are none
+        self.first_rows = threading.Event()
+
+    #
+    #   INDEXING
+    #
+
+    def build(self):
+        """Indexes the rows of the file, to be run in a worker thread.
+        The rows indexed are readable while it runs"""
+
+        self._building = True
+        try:
+            if not self._cancelled:
+                self._scan()
+        finally:
+            self._building = False
+            # Closed while it was indexing
+            if self._cancelled:
+                self._release()
+            self.first_rows.set()
+
+    def _scan(self):
+        start = len(UTF8_BOM) if self._data[:3] == UTF8_BOM else 0
+        if start < self.size:
+            self._offsets.append(start)
+
+        quoted = False
+        position = start
+        while position < self.size and not self._cancelled:
+            end = min(position + CHUNK_SIZE, self.size)
+            chunk = self._data[position:end]
+
+            # Only whole lines are scanned, the rest goes with the next chunk
+            if end < self.size:
+                last_newline = chunk.rfind(b"\n")
+                if last_newline == -1:
+                    newline = self._data.find(b"\n", end)
+                    end = self.size if newline == -1 else newline + 1
+                    chunk = self._data[position:end]
+                else:
+                    end = position + last_newline + 1
+                    chunk = chunk[:last_newline + 1]
+
+            # The last piece is after the last newline
+            lines = chunk.split(b"\n")[:-1]
+
+            if not quoted and b'"' not in chunk:
+                self._offsets.extend(islice(accumulate(
+                    map((1).__add__, map(len, lines)), initial=position),
+                    1, None))
+            else:
+                quoted = self._add_quoted_rows(position, lines, quoted)
+
+            position = end
+            self._indexed = end
+
+            self.first_rows.set()
+
+        # A trailing newline doesn't start a row
+        if self._offsets and self._offsets[-1] >= self.size:
+            self._offsets.pop()
+
+        if not self._cancelled:
+            self._indexed = self.size
+            self._finished = True
+
+    def _add_quoted_rows(self, position, lines, quoted):
+        """Adds the start of the row after each line that doesn't end
+        inside quotes
+
+        :param int position: The offset of the first line
+        :param list lines: The lines, without their newline
+        :param bool quoted: If the first line starts inside quotes
+        :returns: True if the last line ends inside quotes
+        """
+
+        for line in lines:
+            position += len(line) + 1
+            if line.count(b'"') % 2:
+                quoted = not quoted
+            if not quoted:
+                self._offsets.append(position)
+
+        return quoted
+
+    def cancel(self):
+        """Stops the indexing"""
+
+        self._cancelled = True
+
+    @property
+    def finished(self):
+        return self._finished
+
+    @property
+    def progress(self):
+        """The fraction of the file indexed"""
+
+        if not self.size:
+            return 1.0
+        return self._indexed / self.size
+
+    @property
+    def n_rows(self):
+        """The number of rows indexed, the header included"""
+
+        if self._finished:
+            return len(self._offsets)
+        # The end of the last row is not known yet
+        return max(len(self._offsets) - 1, 0)
+
+    #
+    #   ROWS
+    #
+
+    def get_row_bytes(self, index):
+        """Returns the raw bytes of a row"""
+
+        start = self._offsets[index]
+        if index + 1 < len(self._offsets):
+            end = self._offsets[index + 1]
+        else:
+            end = self.size
+
+        return self._data[start:end]
+
+    def get_row(self, index):
+        """Parses a row
+
+        :param int index: The index of the row, 0 is the header
+        :returns: The cells of the row
+        :rtype: list
+        """
+
+        text = self.get_row_bytes(index).decode("utf-8", "replace")
+        return next(csv.reader(io.StringIO(text, newline="")), [])
+
+    def close(self):
+        """Stops the indexing and releases the file, when it's indexing the
+        file is released by the worker thread"""
+
+        self._cancelled = True
+
+        if not self._building:
+            self._release()
+
+    def _release(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
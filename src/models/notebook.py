@@ -22,8 +22,11 @@ from gi.repository import GObject
 
 import nbformat
 import os
+import functools
 
 from .cell import Cell
+from ..utils.notebook_stream_parser import NotebookStreamParser
+from ..utils.notebook_gzip import is_compressed_path, iter_decompressed
 
 
 # This object represent the content of a Notebook and holds all the cells
@@ -33,6 +36,9 @@ class Notebook(Gio.ListStore):
     title = GObject.Property(type=str, default="Untitled.ipynb")
     metadata = None
 
+    # Size of the chunks read by new_from_file
+    CHUNK_SIZE = 1024 * 1024
+
     def __init__(self, _path=None):
         super().__init__()
 
@@ -40,6 +46,40 @@ class Notebook(Gio.ListStore):
 
         self.metadata = None
 
+        # Dictionary of {cell: position}, valid for positions lower than
+        #       _positions_valid_until, rebuilt lazily after changes
+        self._positions = {}
+        self._positions_valid_until = 0
+
+        self.connect("items-changed", self.on_items_changed)
+
+    @classmethod
+    def new_from_file(cls, file_path):
+        """Reads a notebook file in chunks, compressed notebooks are
+        decompressed while they are parsed
+
+        :param str file_path: The path of a .ipynb or .ipynb.gz file
+        :returns: The new notebook
+        :rtype: Notebook
+        """
+
+        instance = cls(file_path)
+        parser = NotebookStreamParser()
+
+        with open(file_path, "rb") as file:
+            chunks = iter(functools.partial(file.read, cls.CHUNK_SIZE), b"")
+            if is_compressed_path(file_path):
+                chunks = iter_decompressed(chunks)
+
+            for chunk in chunks:
+                instance.insert_cells(instance.get_n_items(), [
+                    Cell.new_from_json(json_cell, raw_outputs)
+                    for json_cell, raw_outputs in parser.feed(chunk)])
+
+        instance.metadata = parser.close().get("metadata")
+
+        return instance
+
     @GObject.Property(type=GObject.GObject)
     def cells(self):
         return self
@@ -60,18 +100,128 @@ class Notebook(Gio.ListStore):
     def get_path(self):
         return self.path
 
-    def parse(self, notebook_node):
+    def on_items_changed(self, model, position, removed, added):
+        self._positions_valid_until = min(
+            self._positions_valid_until, position)
+
+    def get_position(self, cell):
+        """Gets the position of a cell without scanning the notebook
+
+        :param Cell cell: The cell to find
+        :returns: The position of the cell or -1 if not found
+        :rtype: int
+        """
+
+        position = self._positions.get(cell)
+        if position is not None and position < self._positions_valid_until:
+            return position
+
+        if self._positions_valid_until < self.get_n_items():
+            valid_until = self._positions_valid_until
+            self._positions = {
+                model_cell: index
+                for model_cell, index in self._positions.items()
+                if index < valid_until}
+            for index in range(valid_until, self.get_n_items()):
+                self._positions[self.get_item(index)] = index
+            self._positions_valid_until = self.get_n_items()
+
+        position = self._positions.get(cell, -1)
+        if position >= self._positions_valid_until:
+            return -1
+        return position
+
+    def parse(self, notebook_node, output_store=None):
         """Parses the notebook from its json representation
 
         :param: The notebook node to parse
+        :param OutputStore output_store: Where the outputs referenced by the
+            cells are stored
         """
-        for json_cell in notebook_node.get('cells'):
-            cell = Cell.new_from_json(json_cell)
+        cells = [
+            Cell.new_from_json(json_cell, output_store=output_store)
+            for json_cell in notebook_node.get('cells')]
 
-            self.append(cell)
+        self.splice(self.get_n_items(), 0, cells)
 
         self.metadata = notebook_node.get("metadata")
 
+    #
+    #   BULK OPERATIONS
+    #
+
+    def get_range(self, position, count):
+        """Gets a range of cells
+
+        :param int position: The position of the first cell
+        :param int count: The number of cells
+        :returns: The list of cells
+        """
+
+        end = min(position + count, self.get_n_items())
+        return [self.get_item(index) for index in range(position, end)]
+
+    def insert_cells(self, position, cells):
+        """Inserts many cells emitting a single items-changed
+
+        :param int position: The position where to insert the cells
+        :param list cells: The cells to insert
+        """
+
+        self.splice(position, 0, cells)
+
+    def remove_range(self, position, count):
+        """Removes a range of cells emitting a single items-changed
+
+        :param int position: The position of the first cell
+        :param int count: The number of cells
+        :returns: The list of removed cells
+        """
+
+        cells = self.get_range(position, count)
+        self.splice(position, len(cells), [])
+        return cells
+
+    def copy_range(self, position, count):
+        """Clones a range of cells
+
+        :param int position: The position of the first cell
+        :param int count: The number of cells
+        :returns: The list of new cells
+        """
+
+        return [cell.clone() for cell in self.get_range(position, count)]
+
+    def move_range(self, position, count, destination):
+        """Moves a range of cells emitting a single items-changed
+
+        :param int position: The position of the first cell
+        :param int count: The number of cells
+        :param int destination: The position before which the cells are
+            moved, counted before the move
+        :returns: The new position of the first moved cell
+        """
+
+        if position <= destination <= position + count:
+            return position
+
+        start = min(position, destination)
+        end = max(position + count, destination)
+
+        cells = self.get_range(start, end - start)
+        moved = cells[position - start:position - start + count]
+        del cells[position - start:position - start + count]
+
+        if destination < position:
+            new_position = destination
+        else:
+            new_position = destination - count
+        cells[new_position - start:new_position - start] = moved
+
+        self.splice(start, end - start, cells)
+
+        return new_position
+
     def get_notebook_node(self):
         """Gets the notebook as a json
 
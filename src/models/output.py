@@ -17,10 +17,11 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import GObject
-
 from enum import IntEnum
 
+import base64
+import json
+
 import nbformat
 
 
@@ -41,69 +42,216 @@ class DataType(IntEnum):
     IMAGE_SVG = 7
     LATEX = 8
     GEO_JSON = 9
-
-
-# This represent a cell output
-class Output(GObject.GObject):
-    __gtype_name__ = 'Output'
-
-    name = GObject.Property(type=str, default="")
-    text = GObject.Property(type=str, default="")
-    execution_count = GObject.Property(type=int, default=0)
-
-    ename = GObject.Property(type=str, default="")
-    evalue = GObject.Property(type=str, default="")
-    traceback = GObject.Property(type=str, default="")
-
-    data_type = GObject.Property(type=int, default=0)
-    data_content = GObject.Property(type=str, default="")
-    plain_content = GObject.Property(type=str, default=None)
-
-    display_id = GObject.Property(type=str, default=None)
-
-    output_type = 0
+    TABLE = 10
+
+
+# The MIME type displayed for each DataType, in order of preference
+MIME_TYPES = [
+    ("application/json", DataType.JSON),
+    ("application/geo+json", DataType.GEO_JSON),
+    ("application/vnd.dataresource+json", DataType.TABLE),
+    ("text/markdown", DataType.MARKDOWN),
+    ("text/html", DataType.HTML),
+    ("image/png", DataType.IMAGE_PNG),
+    ("image/jpeg", DataType.IMAGE_JPEG),
+    ("image/svg+xml", DataType.IMAGE_SVG),
+    ("text/latex", DataType.LATEX),
+    ("text/plain", DataType.TEXT),  # Needs to be last always
+]
+
+OUTPUT_TYPE_NAMES = {
+    "stream": OutputType.STREAM,
+    "display_data": OutputType.DISPLAY_DATA,
+    "execute_result": OutputType.EXECUTE_RESULT,
+    "error": OutputType.ERROR,
+}
+
+
+BINARY_TYPES = (bytes, bytearray, memoryview)
+
+# The MIME types saved in base64, the others are saved as text
+BASE64_MIME_TYPES = ("image/png", "image/jpeg")
+
+
+def _join(value):
+    """Joins the multiline strings that nbformat stores as lists"""
+
+    if isinstance(value, list):
+        return "".join(value)
+    return value
+
+
+def put_buffers(content, buffer_paths, buffers):
+    """Puts the binary buffers of a message in its content, at the paths
+    listed in buffer_paths, like the widget protocol does. The buffers are
+    not copied
+
+    :param dict content: The content of the message
+    :param list buffer_paths: A list of key paths, one for each buffer
+    :param list buffers: The buffers of the message, as memoryviews
+    """
+
+    for path, buffer in zip(buffer_paths, buffers):
+        if not path:
+            continue
+        node = content
+        for key in path[:-1]:
+            node = node[key]
+        node[path[-1]] = buffer
+
+
+def _encode_bundle(data):
+    """Returns the MIME bundle with the binary values as they are saved in
+    notebooks: images in base64, JSON types parsed and other types as text,
+    or the bundle itself"""
+
+    if not any(isinstance(value, BINARY_TYPES) for value in data.values()):
+        return data
+
+    bundle = {}
+    for mime_type, value in data.items():
+        if isinstance(value, BINARY_TYPES):
+            value = _encode_buffer(mime_type, value)
+        bundle[mime_type] = value
+    return bundle
+
+
+def _encode_buffer(mime_type, buffer):
+    """Returns a binary value of a MIME bundle as it's saved in notebooks
+
+    :param str mime_type: The MIME type of the value
+    :param buffer: The value, as bytes or a memoryview
+    :returns: The saved value
+    """
+
+    if mime_type in BASE64_MIME_TYPES:
+        return base64.b64encode(buffer).decode("ascii")
+
+    text = bytes(buffer).decode("utf-8", "replace")
+    if mime_type == "application/json" or mime_type.endswith("+json"):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
+
+
+# This represent a cell output. The MIME bundle is kept as received so
+#       that it can be saved without losing representations, the payload
+#       displayed is only extracted (and decoded) when a view asks for it.
+#       Values sent as binary message buffers stay memoryviews of the
+#       received frames and are encoded in base64 only when saved
+class Output:
+    __slots__ = (
+        "output_type", "name", "text", "execution_count",
+        "ename", "evalue", "_traceback",
+        "data", "metadata", "data_type", "display_id",
+    )
 
     def __init__(self, _output_type):
-        super().__init__()
-
         self.output_type = _output_type
 
-        self.name = ""
+        self.name = "stdout"
         self.text = ""
         self.execution_count = 0
 
         self.ename = ""
         self.evalue = ""
-        self.traceback = ""
-
-        self.data_type = 0
-        self.data_content = ""
-        self.plain_content = None
+        self._traceback = []
 
+        self.data = {}
         self.metadata = None
+        self.data_type = 0
         self.display_id = ""
 
     @classmethod
-    def new_from_json(cls, json_string):
-        """Initialize an output class from a json string representation
+    def new_from_json(cls, json_dict):
+        """Initialize an output class from its json representation
 
-        :param str json_string: The json representation of the output
+        :param json_dict: The json representation of the output
         """
 
-        instance = cls()
-        instance.parse(json_string)
+        instance = cls(OUTPUT_TYPE_NAMES[json_dict['output_type']])
+        instance.parse(json_dict)
 
         return instance
 
-    def parse(self, json_dict):
+    @property
+    def traceback(self):
+        return "\n".join(self._traceback)
+
+    @traceback.setter
+    def traceback(self, value):
+        self._traceback = value.split("\n") if value else []
+
+    @property
+    def data_content(self):
+        """The content of the displayed MIME type, JSON is serialized and
+        binary buffers of text types are decoded"""
+
+        value = self.data.get(self.get_mime_type())
+        if value is None:
+            return ""
+        if isinstance(value, BINARY_TYPES):
+            if self.data_type in (DataType.IMAGE_PNG, DataType.IMAGE_JPEG):
+                return value
+            return bytes(value).decode("utf-8")
+        if isinstance(value, (dict, list)) and self.data_type in (
+                DataType.JSON, DataType.GEO_JSON, DataType.TABLE):
+            return json.dumps(value)
+        return _join(value)
+
+    @data_content.setter
+    def data_content(self, value):
+        self.data[self.get_mime_type()] = value
+
+    @property
+    def plain_content(self):
+        return _join(self.data.get('text/plain'))
+
+    @plain_content.setter
+    def plain_content(self, value):
+        self.data['text/plain'] = value
+
+    def get_mime_type(self):
+        """Returns the MIME type of the displayed representation"""
+
+        for mime_type, data_type in MIME_TYPES:
+            if data_type == self.data_type:
+                return mime_type
+        return "text/plain"
+
+    def get_image_bytes(self):
+        """Decodes the displayed image, the result is not kept. Images
+        received as binary buffers are returned without copying
+
+        :returns: The image data
+        :rtype: bytes or memoryview
+        """
+
+        value = self.data.get(self.get_mime_type())
+        if isinstance(value, BINARY_TYPES):
+            return value
+
+        if self.data_type == DataType.IMAGE_SVG:
+            return self.data_content.encode("utf-8")
+        return base64.b64decode(self.data_content)
+
+    def parse(self, json_dict, buffers=None):
         """Parses the output from a json representation
 
         :param json_dict: The json representation of the output
+        :param list buffers: The binary buffers of the message, placed in
+            json_dict at its buffer_paths
         """
+
+        if buffers and 'buffer_paths' in json_dict:
+            put_buffers(json_dict, json_dict['buffer_paths'], buffers)
+
         match self.output_type:
             case OutputType.STREAM:
                 self.name = json_dict['name']
-                self.text = json_dict['text']
+                self.text = _join(json_dict['text'])
 
             case OutputType.DISPLAY_DATA:
                 self.parse_display_data(json_dict)
@@ -115,7 +263,7 @@ class Output(GObject.GObject):
             case OutputType.ERROR:
                 self.ename = json_dict['ename']
                 self.evalue = json_dict['evalue']
-                self.traceback = "\n".join(json_dict['traceback'])
+                self._traceback = list(json_dict['traceback'])
 
     def parse_display_data(self, json_node):
         """Parses the display data from the json_node
@@ -123,45 +271,12 @@ class Output(GObject.GObject):
         :param json_node: The json representation of the display data
         """
 
-        if 'application/json' in json_node['data']:
-            self.data_content = json_node['data']['application/json']
-            self.data_type = DataType.JSON
-
-        elif 'application/geo+json' in json_node['data']:
-            self.data_content = json_node['data']['application/geo+json']
-            self.data_type = DataType.GEO_JSON
-
-        elif 'text/markdown' in json_node['data']:
-            self.data_content = json_node['data']['text/markdown']
-            self.data_type = DataType.MARKDOWN
+        self.data = json_node['data']
 
-        elif 'text/html' in json_node['data']:
-            self.data_content = json_node['data']['text/html']
-            self.data_type = DataType.HTML
-
-        elif 'image/png' in json_node['data']:
-            self.data_content = json_node['data']['image/png']
-            self.data_type = DataType.IMAGE_PNG
-
-        elif 'image/jpeg' in json_node['data']:
-            self.data_content = json_node['data']['image/jpeg']
-            self.data_type = DataType.IMAGE_JPEG
-
-        elif 'image/svg+xml' in json_node['data']:
-            self.data_content = json_node['data']['image/svg+xml']
-            self.data_type = DataType.IMAGE_SVG
-
-        elif 'text/latex' in json_node['data']:
-            self.data_content = json_node['data']['text/latex']
-            self.data_type = DataType.LATEX
-
-        # Needs to be last always
-        elif 'text/plain' in json_node['data']:
-            self.data_content = json_node['data']['text/plain']
-            self.data_type = DataType.TEXT
-
-        if 'text/plain' in json_node['data']:
-            self.plain_content = json_node['data']['text/plain']
+        for mime_type, data_type in MIME_TYPES:
+            if mime_type in self.data:
+                self.data_type = data_type
+                break
 
         if 'metadata' in json_node:
             self.metadata = json_node['metadata']
@@ -178,45 +293,27 @@ class Output(GObject.GObject):
 
         match self.output_type:
             case OutputType.STREAM:
-                output_node = nbformat.v4.new_output('stream')
-                output_node.text = self.text
+                output_node = nbformat.v4.new_output(
+                    'stream', name=self.name, text=self.text)
 
             case OutputType.DISPLAY_DATA:
-                output_node = nbformat.v4.new_output('display_data')
-                type_name = self._get_type_name(self.data_type)
-                output_node.data[type_name] = self.data_content
-                if self.plain_content:
-                    output_node.data['text/plain'] = self.plain_content
+                output_node = nbformat.v4.new_output(
+                    'display_data', data=_encode_bundle(self.data))
 
             case OutputType.EXECUTE_RESULT:
-                output_node = nbformat.v4.new_output('execute_result')
-                type_name = self._get_type_name(self.data_type)
-                output_node.data[type_name] = self.data_content
-                output_node.execution_count = self.execution_count
-                if self.plain_content:
-                    output_node.data['text/plain'] = self.plain_content
+                output_node = nbformat.v4.new_output(
+                    'execute_result',
+                    data=_encode_bundle(self.data),
+                    execution_count=self.execution_count)
 
             case OutputType.ERROR:
-                output_node = nbformat.v4.new_output('error')
-                output_node.ename = self.ename
-                output_node.evalue = self.evalue
-                output_node.traceback = self.traceback
+                output_node = nbformat.v4.new_output(
+                    'error',
+                    ename=self.ename,
+                    evalue=self.evalue,
+                    traceback=self._traceback)
 
         if self.metadata:
             output_node.metadata = self.metadata
 
         return output_node
-
-    def _get_type_name(self, data_type):
-        mime_types = {
-            DataType.JSON: "application/json",
-            DataType.MARKDOWN: "text/markdown",
-            DataType.HTML: "text/html",
-            DataType.IMAGE_PNG: "image/png",
-            DataType.IMAGE_JPEG: "image/jpeg",
-            DataType.IMAGE_SVG: "image/svg+xml",
-            DataType.TEXT: "text/plain",
-            DataType.LATEX: "text/latex",
-        }
-
-        return mime_types.get(data_type, "text/plain")
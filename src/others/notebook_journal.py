@@ -0,0 +1,472 @@
+# notebook_journal.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject, GLib
+
+from ..models.cell import CellType
+from ..utils.journal_records import (
+    get_source_patch, apply_records, read_records)
+from ..utils.notebook_json import write_file_atomic
+from ..utils import json_codec
+
+import os
+import uuid
+import asyncio
+import hashlib
+
+
+# Records the edits of an open notebook in an append only journal in the
+#       cache directory, so that unsaved changes survive a crash. The
+#       records are appended in small batches, when the journal grows too
+#       much it's replaced by a snapshot of the notebook written in the
+#       background. The journal is removed when the notebook is saved or
+#       closed
+class NotebookJournal(GObject.GObject):
+    __gtype_name__ = "NotebookJournal"
+
+    cache_dir = os.environ["XDG_CACHE_HOME"]
+    journal_dir = os.path.join(cache_dir, "journal")
+
+    # Delay in milliseconds before appending the pending records
+    FLUSH_DELAY = 1000
+
+    # Size in bytes of the journal after which it's compacted
+    COMPACT_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, _notebook, _serializer, _path=None):
+        super().__init__()
+
+        self.notebook = _notebook
+        self.serializer = _serializer
+
+        # The journal is written only for notebooks saved in a file
+        self.path = _path
+
+        # The cells currently connected, in the notebook order
+        self.cells = []
+
+        # Dictionary of {cell: source} of the last recorded source of the
+        #       cells edited since their last record
+        self.sources = {}
+        self.dirty_cells = set()
+
+        # Dictionary of {cell: record} of the pending outputs records, their
+        #       outputs are taken when they are flushed
+        self.pending_outputs = {}
+
+        # The ids of the cells the journal can reference without content
+        self.known_ids = set()
+
+        self.pending = []
+        self.journal_size = 0
+
+        # Incremented on every edit, to know if edits happened while saving
+        self.sequence = 0
+
+        # The journal starts from the notebook file, with these cell ids, or
+        #       from a snapshot when the notebook differs from the file
+        self.base_ids = []
+        self.needs_snapshot = False
+
+        self.flush_source_id = 0
+        self.lock = asyncio.Lock()
+
+        os.makedirs(self.journal_dir, exist_ok=True)
+
+        self.notebook.connect("items-changed", self.on_items_changed)
+        self.on_items_changed(
+            self.notebook, 0, 0, self.notebook.get_n_items(), False)
+
+        self.base_ids = [cell.id for cell in self.cells]
+
+    @classmethod
+    def get_journal_path(cls, path):
+        """Returns the path of the journal of a notebook"""
+
+        name = hashlib.sha256(path.encode("utf-8")).hexdigest()
+        return os.path.join(cls.journal_dir, name + ".jsonl")
+
+    @classmethod
+    def get_snapshot_path(cls, path):
+        """Returns the path of the snapshot of a notebook"""
+
+        return cls.get_journal_path(path)[:-len(".jsonl")] + ".ipynb"
+
+    @classmethod
+    def has_journal(cls, path):
+        """Returns True if a journal has been left for a notebook"""
+
+        return os.path.exists(cls.get_journal_path(path))
+
+    @classmethod
+    def recover(cls, path, notebook_node):
+        """Applies the journal left by a crash to the notebook read from
+        the file
+
+        :param str path: The path of the notebook
+        :param dict notebook_node: The notebook read from the file
+        :returns: The recovered notebook or None if there is no journal
+        :rtype: dict
+        """
+
+        try:
+            with open(cls.get_journal_path(path), "r") as file:
+                records = read_records(file.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(e)
+            return None
+
+        if not records:
+            return None
+
+        match records[0].get("op"):
+            case "snapshot":
+                try:
+                    with open(cls.get_snapshot_path(path), "rb") as file:
+                        notebook_node = json_codec.loads(file.read())
+                except Exception as e:
+                    print(e)
+                    return None
+            case "base":
+                # Cells without id in the file got random ids when loaded
+                cells = notebook_node["cells"]
+                if len(cells) != len(records[0]["ids"]):
+                    print("The notebook changed since the journal started")
+                    return None
+                for cell, cell_id in zip(cells, records[0]["ids"]):
+                    cell["id"] = cell_id
+            case _:
+                return None
+        records = records[1:]
+
+        applied = apply_records(notebook_node, records)
+        print(f"Recovered {applied} of {len(records)} journal records")
+
+        return notebook_node
+
+    def set_path(self, path):
+        """Sets the path of the notebook, the journal is started again
+
+        :param str path: The path of the notebook or None for drafts
+        """
+
+        if path == self.path:
+            return
+
+        self.remove_files()
+        self.path = path
+
+        # The new file doesn't contain the notebook yet
+        self.needs_snapshot = True
+        self.queue_flush()
+
+    #
+    #   RECORDING
+    #
+
+    def connect_cell(self, cell):
+        if not cell.id:
+            cell.id = str(uuid.uuid4())
+
+        self.known_ids.add(cell.id)
+
+        cell.connect("source-changed", self.on_source_changed)
+        cell.connect("output-added", self.on_output_added)
+        cell.connect("output-updated", self.on_outputs_replaced)
+        cell.connect("output-reset", self.on_outputs_replaced)
+        cell.connect(
+            "execution-count-changed", self.on_execution_count_changed)
+        cell.connect("notify::cell-type", self.on_cell_type_changed)
+
+    def disconnect_cell(self, cell):
+        cell.disconnect_by_func(self.on_source_changed)
+        cell.disconnect_by_func(self.on_output_added)
+        cell.disconnect_by_func(self.on_outputs_replaced)
+        cell.disconnect_by_func(self.on_execution_count_changed)
+        cell.disconnect_by_func(self.on_cell_type_changed)
+
+    def on_items_changed(self, notebook, position, removed, added,
+                         record=True):
+        for cell in self.cells[position:position + removed]:
+            self.disconnect_cell(cell)
+            self.record_source(cell)
+            self.dirty_cells.discard(cell)
+
+        added_cells = notebook.get_range(position, added)
+
+        cell_nodes = []
+        deferred = False
+        for cell in added_cells:
+            known = cell.id in self.known_ids
+            self.connect_cell(cell)
+            if not record:
+                continue
+            if known:
+                cell_nodes.append({"id": cell.id})
+            elif cell.has_unloaded_outputs():
+                # Decoding the outputs here would undo their lazy loading,
+                #       the next compaction writes them instead
+                deferred = True
+            else:
+                cell_nodes.append(cell.get_cell_node())
+
+        self.cells[position:position + removed] = added_cells
+
+        if deferred:
+            self.request_snapshot()
+        elif record:
+            self.add_record({
+                "op": "splice",
+                "position": position,
+                "removed": removed,
+                "cells": cell_nodes})
+
+    def on_source_changed(self, cell):
+        # The source before the first edit is what the patch starts from
+        if cell not in self.sources:
+            self.sources[cell] = cell.synced_source
+
+        self.sequence += 1
+        self.dirty_cells.add(cell)
+        self.queue_flush()
+
+    def record_source(self, cell):
+        """Records the changes of the source of a cell since the last
+        recorded source"""
+
+        old_source = self.sources.pop(cell, None)
+        if old_source is None:
+            return
+
+        source = cell.source
+        if source == old_source:
+            return
+
+        start, end, text = get_source_patch(old_source, source)
+        self.add_record({
+            "op": "source",
+            "id": cell.id,
+            "start": start,
+            "end": end,
+            "text": text})
+
+    def on_output_added(self, cell, output):
+        # The pending outputs record of the cell will include it
+        if cell in self.pending_outputs:
+            self.sequence += 1
+            self.queue_flush()
+            return
+
+        self.add_record({
+            "op": "output",
+            "id": cell.id,
+            "output": output.get_output_node()})
+
+    def on_outputs_replaced(self, cell, *_args):
+        """Records all the outputs of a cell, a single record per cell is
+        kept pending and its outputs are taken when it's flushed"""
+
+        if cell in self.pending_outputs:
+            self.sequence += 1
+            self.queue_flush()
+            return
+
+        record = {"op": "outputs", "id": cell.id, "outputs": []}
+        self.pending_outputs[cell] = record
+        self.add_record(record)
+
+    def on_execution_count_changed(self, cell, value):
+        self.add_record({
+            "op": "execution_count",
+            "id": cell.id,
+            "value": value})
+
+    def on_cell_type_changed(self, cell, *_args):
+        self.add_record({
+            "op": "cell_type",
+            "id": cell.id,
+            "value": (
+                "markdown" if cell.cell_type == CellType.TEXT else "code")})
+
+    def add_record(self, record):
+        self.sequence += 1
+        self.pending.append(record)
+        self.queue_flush()
+
+    #
+    #   WRITING
+    #
+
+    def queue_flush(self):
+        """Schedules appending the pending records"""
+
+        if self.flush_source_id == 0 and self.path:
+            self.flush_source_id = GLib.timeout_add(
+                self.FLUSH_DELAY, self.on_flush_timeout)
+
+    def on_flush_timeout(self):
+        self.flush_source_id = 0
+        asyncio.create_task(self.flush())
+        return False
+
+    async def flush(self):
+        """Appends the pending records, or compacts the journal if it has
+        grown too much"""
+
+        async with self.lock:
+            if not self.path:
+                return
+
+            for cell in list(self.dirty_cells):
+                self.record_source(cell)
+            self.dirty_cells.clear()
+
+            if not self.pending and not self.needs_snapshot:
+                return
+
+            if self.needs_snapshot or self.journal_size > self.COMPACT_SIZE:
+                await self.compact()
+                return
+
+            for cell, record in self.pending_outputs.items():
+                record["outputs"] = [
+                    output.get_output_node() for output in cell.outputs]
+            self.pending_outputs = {}
+
+            if self.journal_size == 0:
+                self.pending.insert(0, {"op": "base", "ids": self.base_ids})
+
+            data = b"".join(
+                json_codec.dumps(record) + b"\n" for record in self.pending)
+            self.pending = []
+
+            journal_path = self.get_journal_path(self.path)
+            try:
+                self.journal_size += await asyncio.to_thread(
+                    self._append, journal_path, data)
+            except Exception as e:
+                print(e)
+
+    def _append(self, journal_path, data):
+        with open(journal_path, "ab") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        return len(data)
+
+    async def compact(self):
+        """Replaces the journal with a snapshot of the notebook, the
+        snapshot is serialized and written in a worker thread"""
+
+        # The snapshot includes every pending record
+        self.pending = []
+        self.pending_outputs = {}
+        self.known_ids = {cell.id for cell in self.cells}
+
+        notebook_node, items = self.serializer.snapshot()
+        snapshot_path = self.get_snapshot_path(self.path)
+        journal_path = self.get_journal_path(self.path)
+
+        def write_snapshot():
+            text, fragments = self.serializer.serialize_items(
+                notebook_node, items)
+            write_file_atomic(snapshot_path, text)
+            journal = json_codec.dumps({"op": "snapshot"}) + b"\n"
+            return write_file_atomic(journal_path, journal), fragments
+
+        try:
+            self.journal_size, fragments = await asyncio.to_thread(
+                write_snapshot)
+        except Exception as e:
+            print(e)
+            return
+
+        self.serializer.store_fragments(items, fragments)
+        self.needs_snapshot = False
+
+    def request_snapshot(self):
+        """Compacts the journal at the next flush, used when the notebook
+        no longer matches its file"""
+
+        self.needs_snapshot = True
+        self.sequence += 1
+        self.queue_flush()
+
+    async def mark_saved(self, sequence):
+        """Restarts the journal from the saved file. If the notebook has
+        been edited while saving, the journal is compacted instead
+
+        :param int sequence: The sequence when the save started
+        """
+
+        async with self.lock:
+            if sequence != self.sequence:
+                self.needs_snapshot = True
+                self.queue_flush()
+                return
+
+            self.pending = []
+            self.pending_outputs = {}
+            self.remove_files()
+            self.needs_snapshot = False
+            self.base_ids = [cell.id for cell in self.cells]
+            self.known_ids = set(self.base_ids)
+
+            # The saved file has every edit, the next patches start from it
+            self.dirty_cells.clear()
+            self.sources = {}
+
+    def remove_files(self):
+        """Removes the journal and the snapshot"""
+
+        self.journal_size = 0
+
+        if not self.path:
+            return
+
+        for file_path in (
+                self.get_journal_path(self.path),
+                self.get_snapshot_path(self.path)):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(e)
+
+    def disconnect(self, *_args):
+        """Disconnect all signals and remove the journal"""
+
+        if self.flush_source_id != 0:
+            GLib.source_remove(self.flush_source_id)
+            self.flush_source_id = 0
+
+        self.notebook.disconnect_by_func(self.on_items_changed)
+        for cell in self.cells:
+            self.disconnect_cell(cell)
+
+        self.cells = []
+        self.sources = {}
+        self.dirty_cells = set()
+        self.pending = []
+        self.pending_outputs = {}
+
+        self.remove_files()
@@ -0,0 +1,260 @@
+# notebook_outline.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject, Gio, Gtk, GLib
+
+from ..models.cell import CellType
+
+import re
+
+
+class TreeNode(GObject.Object):
+    def __init__(self, node_name, index, level=0):
+        super().__init__()
+        self.node_name = node_name
+        self.index = index
+        self.level = level
+        self.children = Gio.ListStore.new(TreeNode)
+
+    def get_signature(self):
+        """Returns what identifies the node and its children, excluding
+        the cell index that changes when cells are added above"""
+
+        return (
+            self.node_name,
+            self.level,
+            tuple(child.get_signature() for child in self.children))
+
+
+# Keeps the chapters of a notebook as a live tree model. The headings of
+#       each cell are cached and extracted again only for the cells that
+#       changed, after the edits pause. The tree is rebuilt only when some
+#       headings changed and the model is updated in place splicing only
+#       the nodes that changed
+class NotebookOutline(GObject.GObject):
+    __gtype_name__ = "NotebookOutline"
+
+    HEADER_PATTERN = re.compile(r'^(#{1,6})\s+(.+)', re.MULTILINE)
+
+    # Milliseconds without edits before the outline is updated
+    UPDATE_DELAY = 300
+
+    def __init__(self, _notebook):
+        super().__init__()
+
+        self.notebook = _notebook
+
+        # Dictionary of {cell: headings}
+        self.headings_cache = {}
+
+        # The cells whose headings need to be extracted again
+        self.dirty_cells = set()
+
+        # Set when cells have been added, removed or moved
+        self.structure_changed = False
+
+        # The cells currently connected, in the notebook order
+        self.cells = []
+
+        self.update_source_id = 0
+
+        self.root_model = Gio.ListStore.new(TreeNode)
+        self.tree_list_model = Gtk.TreeListModel.new(
+            self.root_model, False, True, self.create_model_func)
+        self.selection_model = Gtk.NoSelection(model=self.tree_list_model)
+
+        self.notebook.connect("items-changed", self.on_items_changed)
+        self.on_items_changed(
+            self.notebook, 0, 0, self.notebook.get_n_items())
+
+    def get_model(self):
+        """Returns the up to date outline model for a list view"""
+
+        if self.update_source_id != 0:
+            GLib.source_remove(self.update_source_id)
+            self.update_source_id = 0
+        self.update()
+
+        return self.selection_model
+
+    def create_model_func(self, item):
+        """Chapter tree create sub model function"""
+
+        if item.children.get_n_items() == 0:
+            return None
+        return item.children
+
+    def on_items_changed(self, notebook, position, removed, added):
+        removed_cells = self.cells[position:position + removed]
+        added_cells = [
+            notebook.get_item(index)
+            for index in range(position, position + added)]
+
+        # A cell removed and added back in the same change keeps its headings
+        kept_cells = set(removed_cells) & set(added_cells)
+
+        for cell in removed_cells:
+            cell.disconnect_by_func(self.on_cell_changed)
+            if cell not in kept_cells:
+                self.headings_cache.pop(cell, None)
+                self.dirty_cells.discard(cell)
+
+        for cell in added_cells:
+            cell.connect("source-changed", self.on_cell_changed)
+            cell.connect("notify::cell-type", self.on_cell_changed)
+
+        self.cells[position:position + removed] = added_cells
+
+        for cell in added_cells:
+            if cell not in self.headings_cache:
+                self.dirty_cells.add(cell)
+
+        self.structure_changed = True
+        self.queue_update()
+
+    def on_cell_changed(self, cell, *_args):
+        """Marks a cell to have its headings extracted again"""
+
+        # Code cells have no headings, their source is not read
+        if cell.cell_type != CellType.TEXT and not self.headings_cache.get(
+                cell):
+            self.headings_cache[cell] = []
+            return
+
+        self.dirty_cells.add(cell)
+        self.queue_update()
+
+    def queue_update(self, *_args):
+        """Schedules an update of the outline, postponed while the cells
+        keep changing"""
+
+        if self.update_source_id != 0:
+            GLib.source_remove(self.update_source_id)
+
+        self.update_source_id = GLib.timeout_add(
+            self.UPDATE_DELAY, self.on_update_timeout)
+
+    def on_update_timeout(self):
+        self.update_source_id = 0
+        self.update()
+        return False
+
+    def get_cell_headings(self, cell):
+        """Extracts the headings of a cell
+
+        :param Cell cell: The cell
+        :returns: A list of (level, title)
+        """
+
+        headings = []
+        if cell.cell_type == CellType.TEXT:
+            for match in self.HEADER_PATTERN.findall(cell.source):
+                headings.append((len(match[0]), match[1].strip()))
+
+        return headings
+
+    def update(self):
+        """Updates the headings of the changed cells and the outline model
+        if any of them changed"""
+
+        changed = self.structure_changed
+        self.structure_changed = False
+
+        dirty_cells, self.dirty_cells = self.dirty_cells, set()
+        for cell in dirty_cells:
+            headings = self.get_cell_headings(cell)
+            if self.headings_cache.get(cell) != headings:
+                self.headings_cache[cell] = headings
+                changed = True
+
+        if not changed:
+            return
+
+        roots = []
+        level_stack = []
+
+        for index, cell in enumerate(self.cells):
+            for level, title in self.headings_cache.get(cell, []):
+                node = TreeNode(title, index, level)
+
+                while level_stack and level_stack[-1].level >= level:
+                    level_stack.pop()
+
+                if level_stack:
+                    level_stack[-1].children.append(node)
+                else:
+                    roots.append(node)
+
+                level_stack.append(node)
+
+        self.splice_nodes(self.root_model, roots)
+
+    def splice_nodes(self, model, new_nodes):
+        """Updates a model replacing only the nodes that changed, the
+        unchanged nodes are kept (with their expanded state) and only
+        get their cell index updated"""
+
+        old_nodes = list(model)
+        old_signatures = [node.get_signature() for node in old_nodes]
+        new_signatures = [node.get_signature() for node in new_nodes]
+
+        prefix = 0
+        while (prefix < len(old_nodes) and prefix < len(new_nodes)
+                and old_signatures[prefix] == new_signatures[prefix]):
+            prefix += 1
+
+        suffix = 0
+        while (suffix < len(old_nodes) - prefix
+                and suffix < len(new_nodes) - prefix
+                and old_signatures[-1 - suffix] == new_signatures[-1 - suffix]):
+            suffix += 1
+
+        kept = list(zip(old_nodes[:prefix], new_nodes[:prefix]))
+        if suffix:
+            kept += list(zip(old_nodes[-suffix:], new_nodes[-suffix:]))
+        for old_node, new_node in kept:
+            self.update_indexes(old_node, new_node)
+
+        n_removed = len(old_nodes) - prefix - suffix
+        added = new_nodes[prefix:len(new_nodes) - suffix]
+        if n_removed or added:
+            model.splice(prefix, n_removed, added)
+
+    def update_indexes(self, old_node, new_node):
+        """Copies the cell indexes from new_node to the equal old_node"""
+
+        old_node.index = new_node.index
+        for old_child, new_child in zip(old_node.children, new_node.children):
+            self.update_indexes(old_child, new_child)
+
+    def disconnect(self, *_args):
+        """Disconnect all signals"""
+
+        if self.update_source_id != 0:
+            GLib.source_remove(self.update_source_id)
+            self.update_source_id = 0
+
+        self.notebook.disconnect_by_func(self.on_items_changed)
+        for cell in self.cells:
+            cell.disconnect_by_func(self.on_cell_changed)
+
+        self.cells = []
+        self.headings_cache = {}
+        self.dirty_cells = set()
+        self.root_model.remove_all()
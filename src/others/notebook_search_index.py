@@ -0,0 +1,123 @@
+# notebook_search_index.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject
+
+from ..models.output import OutputType, DataType
+
+from enum import IntEnum
+
+
+class MatchLocation(IntEnum):
+    SOURCE = 0
+    OUTPUT = 1
+
+
+class SearchMatch:
+    __slots__ = ("cell", "location", "offset", "length")
+
+    def __init__(self, cell, location, offset, length):
+        self.cell = cell
+        self.location = location
+        self.offset = offset
+        self.length = length
+
+
+# Keeps a lowercase copy of the source and of the text outputs of every
+#       cell of a notebook. A cell entry is rebuilt only when its source or
+#       its outputs changed since the last search
+class NotebookSearchIndex(GObject.GObject):
+    __gtype_name__ = "NotebookSearchIndex"
+
+    def __init__(self, _notebook):
+        super().__init__()
+
+        self.notebook = _notebook
+
+        # Dictionary of {cell: (key, source_text, outputs_text)}
+        self.entries = {}
+
+    def get_output_text(self, output):
+        """Returns the searchable text of an output"""
+
+        match output.output_type:
+            case OutputType.STREAM:
+                return output.text
+            case OutputType.ERROR:
+                return output.traceback
+            case _:
+                if output.data_type in (DataType.TEXT, DataType.MARKDOWN):
+                    return output.data_content
+                return output.plain_content or ""
+
+    def get_entry(self, cell):
+        """Returns the indexed text of a cell, updating it if the cell
+        changed since it was indexed"""
+
+        key = (cell.change_count, cell.outputs_change_count)
+        entry = self.entries.get(cell)
+        if entry and entry[0] == key:
+            return entry
+
+        source = cell.source.lower()
+        outputs_text = "\n".join(
+            self.get_output_text(output) for output in cell.outputs).lower()
+
+        # Reading the source can synchronize it and change the key
+        entry = (
+            (cell.change_count, cell.outputs_change_count),
+            source,
+            outputs_text)
+        self.entries[cell] = entry
+
+        return entry
+
+    def search(self, text):
+        """Searches all the cells, case insensitive
+
+        :param str text: The text to search
+        :returns: The list of SearchMatch in notebook order
+        """
+
+        matches = []
+        if not text:
+            return matches
+
+        query = text.lower()
+        length = len(query)
+
+        new_entries = {}
+
+        for cell in self.notebook:
+            entry = self.get_entry(cell)
+            new_entries[cell] = entry
+            _key, source, outputs_text = entry
+
+            for location, content in (
+                    (MatchLocation.SOURCE, source),
+                    (MatchLocation.OUTPUT, outputs_text)):
+                offset = content.find(query)
+                while offset != -1:
+                    matches.append(SearchMatch(cell, location, offset, length))
+                    offset = content.find(query, offset + length)
+
+        # Forget the cells that have been removed
+        self.entries = new_entries
+
+        return matches
@@ -0,0 +1,246 @@
+# notebook_serializer.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject
+
+from ..utils.notebook_json import (
+    dumps_cell, dumps_notebook, iter_notebook, get_encoded_size,
+    write_file_atomic)
+from ..utils.notebook_gzip import is_compressed_path, iter_compressed
+
+import asyncio
+import nbformat
+
+
+# Keeps the serialized JSON of every cell of a notebook. On save only the
+#       cells changed since the last save are serialized again, the cell
+#       nodes are taken on the main thread while serializing, joining and
+#       writing the file happen in a worker thread. With an output store
+#       the large outputs are written in the sidecar store instead of the
+#       notebook
+class NotebookSerializer(GObject.GObject):
+    __gtype_name__ = "NotebookSerializer"
+
+    def __init__(self, _notebook):
+        super().__init__()
+
+        self.notebook = _notebook
+
+        # Dictionary of {cell: (key, fragment)}
+        self.fragments = {}
+
+        self.output_store = None
+
+    def get_cell_key(self, cell):
+        """Returns what changes when the serialized cell changes"""
+
+        return (
+            cell.change_count, cell.outputs_change_count,
+            cell.cell_type, cell.execution_count, cell.id)
+
+    def set_output_store(self, output_store):
+        """Sets the store where the large outputs are saved, the cells are
+        serialized again on the next save
+
+        :param OutputStore output_store: The store or None to keep the
+            outputs in the notebook
+        """
+
+        if output_store is self.output_store:
+            return
+
+        self.output_store = output_store
+        self.fragments = {}
+
+    def snapshot(self, inline=False):
+        """Takes what is needed to serialize the notebook, the cached
+        fragments or the nodes of the changed cells
+
+        :param bool inline: Takes all the outputs, without using the store
+        :returns: The notebook node and a list of (cell, key, fragment, node)
+        """
+
+        notebook_node = nbformat.v4.new_notebook()
+        if self.notebook.metadata:
+            notebook_node.metadata = self.notebook.metadata
+
+        output_store = None if inline else self.output_store
+        use_cache = output_store is self.output_store
+
+        items = []
+        for cell in self.notebook:
+            key = self.get_cell_key(cell)
+            cached = self.fragments.get(cell) if use_cache else None
+            if cached and cached[0] == key:
+                items.append((cell, key, cached[1], None))
+            else:
+                node = cell.get_cell_node(output_store)
+                # Reading the source can synchronize it and change the key
+                items.append((cell, self.get_cell_key(cell), None, node))
+
+        return notebook_node, items
+
+    def serialize_items(self, notebook_node, items, inline=False):
+        """Serializes the snapshot, it can run in a worker thread
+
+        :returns: The notebook text and the list of fragments
+        """
+
+        fragments = self.serialize_fragments(items, inline)
+
+        return dumps_notebook(notebook_node, fragments), fragments
+
+    def serialize_fragments(self, items, inline=False):
+        """Serializes the changed cells of a snapshot, it can run in a
+        worker thread. The large outputs are moved to the output store
+
+        :param bool inline: Keeps all the outputs in the notebook
+        :returns: The list of fragments
+        """
+
+        output_store = None if inline else self.output_store
+
+        fragments = []
+        for _cell, _key, fragment, node in items:
+            if node is not None:
+                if output_store is not None:
+                    node = output_store.externalize_cell(node)
+                fragment = dumps_cell(node)
+            fragments.append(fragment)
+
+        return fragments
+
+    def store_fragments(self, items, fragments):
+        """Caches the fragments of a serialized snapshot"""
+
+        self.fragments = {
+            cell: (key, fragment)
+            for (cell, key, _fragment, _node), fragment
+            in zip(items, fragments)}
+
+    def serialize(self):
+        """Serializes the notebook on the calling thread
+
+        :returns: The notebook as the text of an .ipynb file
+        :rtype: str
+        """
+
+        notebook_node, items = self.snapshot()
+        text, fragments = self.serialize_items(notebook_node, items)
+        self.store_fragments(items, fragments)
+
+        return text
+
+    def iter_file_pieces(self, file_path, notebook_node, fragments):
+        """Yields the pieces of the file, compressed if the path is of a
+        compressed notebook"""
+
+        pieces = iter_notebook(notebook_node, fragments)
+        if is_compressed_path(file_path):
+            pieces = iter_compressed(pieces)
+        return pieces
+
+    async def save(self, file_path):
+        """Serializes and writes the notebook in a worker thread, the file
+        is replaced only when it has been completely written
+
+        :param str file_path: The local path of the file
+        :returns: The number of bytes written
+        :rtype: int
+        """
+
+        notebook_node, items = self.snapshot()
+
+        def serialize_and_write():
+            fragments = self.serialize_fragments(items)
+            pieces = self.iter_file_pieces(file_path, notebook_node, fragments)
+            return write_file_atomic(file_path, pieces), fragments
+
+        bytes_written, fragments = await asyncio.to_thread(
+            serialize_and_write)
+
+        self.store_fragments(items, fragments)
+
+        return bytes_written
+
+    async def export(self, file_path):
+        """Writes the notebook with all its outputs included, as it has to
+        be shared, in a worker thread. The cached fragments are kept
+
+        :param str file_path: The local path of the file
+        :returns: The number of bytes written
+        :rtype: int
+        """
+
+        notebook_node, items = self.snapshot(inline=True)
+
+        def serialize_and_write():
+            fragments = self.serialize_fragments(items, inline=True)
+            pieces = self.iter_file_pieces(file_path, notebook_node, fragments)
+            return write_file_atomic(file_path, pieces)
+
+        return await asyncio.to_thread(serialize_and_write)
+
+    async def upload(
+            self, storage, file_path, progress_callback=None,
+            cancellable=None):
+        """Serializes the notebook and uploads it to the server in chunks,
+        the notebook text is never joined in memory
+
+        :param Storage storage: The storage used to upload
+        :param str file_path: The path relative to the server root
+        :param callable progress_callback: Called with the fraction uploaded
+        :param Gio.Cancellable cancellable: Stops the upload
+        :returns: The number of bytes written or None on failure
+        """
+
+        notebook_node, items = self.snapshot()
+
+        def serialize():
+            fragments = self.serialize_fragments(items)
+            total_size = get_encoded_size(
+                iter_notebook(notebook_node, fragments))
+            return fragments, total_size
+
+        fragments, total_size = await asyncio.to_thread(serialize)
+
+        if is_compressed_path(file_path):
+            # The compressed notebook is small, the progress is reported
+            #       on its real size
+            content = await asyncio.to_thread(
+                lambda: b"".join(iter_compressed(
+                    iter_notebook(notebook_node, fragments))))
+        else:
+            content = iter_notebook(notebook_node, fragments)
+
+        bytes_written = await storage.upload(
+            file_path,
+            content,
+            progress_callback,
+            cancellable,
+            total_size)
+
+        self.store_fragments(items, fragments)
+
+        return bytes_written
+
+    def disconnect(self, *_args):
+        """Forgets the cached fragments"""
+
+        self.fragments = {}
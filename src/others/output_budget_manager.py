@@ -0,0 +1,218 @@
+# output_budget_manager.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject, GLib, Gio
+
+
+# Keeps the memory used by the output widgets of a notebook under a budget
+#       by evicting the outputs of the cells that are far from the viewport
+#       and rebuilding them when they scroll back into view
+class OutputBudgetManager(GObject.GObject):
+    __gtype_name__ = "OutputBudgetManager"
+
+    __gsignals__ = {
+        'cell-entered-viewport': (
+            GObject.SignalFlags.RUN_FIRST, None, (GObject.GObject,)),
+        'cell-left-viewport': (
+            GObject.SignalFlags.RUN_FIRST, None, (GObject.GObject,)),
+    }
+
+    # Number of pages above and below the viewport where outputs are kept
+    KEEP_PAGES = 2
+
+    # Delay used to coalesce scroll events before updating
+    UPDATE_DELAY = 100
+
+    def __init__(self, _scrolled_window, _list_box):
+        super().__init__()
+
+        self.scrolled_window = _scrolled_window
+        self.list_box = _list_box
+
+        self.settings = Gio.Settings.new('io.github.nokse22.PlanetNine')
+
+        self.cell_uis = set()
+        self.visible_cell_uis = set()
+
+        self.update_source_id = 0
+
+        self.vadjustment = self.scrolled_window.get_vadjustment()
+        self.vadjustment.connect("value-changed", self.queue_update)
+        self.vadjustment.connect("changed", self.queue_update)
+        self.settings.connect(
+            "changed::output-memory-budget", self.queue_update)
+
+    @GObject.Property(type=GObject.TYPE_INT64, default=0)
+    def budget(self):
+        return self.settings.get_int('output-memory-budget') * 1024 * 1024
+
+    def register(self, cell_ui):
+        """Starts tracking the outputs of a cell
+
+        :param CellUI cell_ui: The cell widget to track
+        """
+
+        self.cell_uis.add(cell_ui)
+        self.queue_update()
+
+    def unregister(self, cell_ui):
+        """Stops tracking the outputs of a cell
+
+        :param CellUI cell_ui: The cell widget to forget
+        """
+
+        self.cell_uis.discard(cell_ui)
+        self.visible_cell_uis.discard(cell_ui)
+
+    def get_used_memory(self):
+        """Returns the estimated memory used by all the output widgets
+
+        :returns: The estimated size in bytes
+        :rtype: int
+        """
+
+        return sum(cell_ui.get_output_size() for cell_ui in self.cell_uis)
+
+    def get_visible_cell_uis(self):
+        """Returns the cells currently shown in the viewport"""
+
+        return set(self.visible_cell_uis)
+
+    def queue_update(self, *_args):
+        """Schedules an update coalescing multiple requests"""
+
+        if self.update_source_id == 0:
+            self.update_source_id = GLib.timeout_add(
+                self.UPDATE_DELAY, self._on_update_timeout)
+
+    def _on_update_timeout(self):
+        self.update_source_id = 0
+        self.update()
+        return False
+
+    def update(self):
+        """Updates the viewport state and evicts or restores outputs"""
+
+        n_rows = len(self.cell_uis)
+        if n_rows == 0:
+            return
+
+        page_size = self.vadjustment.get_page_size()
+        keep_margin = page_size * self.KEEP_PAGES
+
+        first_visible = self._find_first_row(0)
+        last_visible = self._find_last_row(page_size)
+        first_kept = self._find_first_row(-keep_margin)
+        last_kept = self._find_last_row(page_size + keep_margin)
+
+        visible = set()
+        for cell_ui in list(self.cell_uis):
+            row = cell_ui.get_parent()
+            if row is None:
+                self.unregister(cell_ui)
+                continue
+
+            index = row.get_index()
+            if first_visible <= index <= last_visible:
+                visible.add(cell_ui)
+            if first_kept <= index <= last_kept:
+                cell_ui.restore_outputs()
+
+        for cell_ui in self.visible_cell_uis - visible:
+            self.emit("cell-left-viewport", cell_ui)
+        for cell_ui in visible - self.visible_cell_uis:
+            self.emit("cell-entered-viewport", cell_ui)
+        self.visible_cell_uis = visible
+
+        self._enforce_budget(first_kept, last_kept)
+
+    def _enforce_budget(self, first_kept, last_kept):
+        """Evicts the outputs farthest from the viewport until the used
+        memory is under the budget"""
+
+        used_memory = self.get_used_memory()
+        budget = self.budget
+        if used_memory <= budget:
+            return
+
+        center = (first_kept + last_kept) / 2
+        candidates = []
+        for cell_ui in self.cell_uis:
+            index = cell_ui.get_parent().get_index()
+            if first_kept <= index <= last_kept:
+                continue
+            size = cell_ui.get_output_size()
+            if size > 0:
+                candidates.append((abs(index - center), size, cell_ui))
+
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        for _distance, size, cell_ui in candidates:
+            if used_memory <= budget:
+                break
+            cell_ui.evict_outputs()
+            used_memory -= size
+
+    def _get_row_bounds(self, index):
+        """Returns the top and bottom of a row relative to the viewport"""
+
+        row = self.list_box.get_row_at_index(index)
+        success, bounds = row.compute_bounds(self.scrolled_window)
+        if not success:
+            return 0, 0
+        return bounds.get_y(), bounds.get_y() + bounds.get_height()
+
+    def _find_first_row(self, top):
+        """Binary search of the first row that ends below top"""
+
+        low, high = 0, len(self.cell_uis) - 1
+        while low < high:
+            middle = (low + high) // 2
+            _row_top, row_bottom = self._get_row_bounds(middle)
+            if row_bottom < top:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find_last_row(self, bottom):
+        """Binary search of the last row that starts above bottom"""
+
+        low, high = 0, len(self.cell_uis) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            row_top, _row_bottom = self._get_row_bounds(middle)
+            if row_top > bottom:
+                high = middle - 1
+            else:
+                low = middle
+        return low
+
+    def disconnect(self, *_args):
+        """Disconnect all signals"""
+
+        if self.update_source_id != 0:
+            GLib.source_remove(self.update_source_id)
+            self.update_source_id = 0
+
+        self.vadjustment.disconnect_by_func(self.queue_update)
+        self.settings.disconnect_by_func(self.queue_update)
+
+        self.cell_uis.clear()
+        self.visible_cell_uis.clear()
@@ -17,19 +17,22 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import GObject, Gtk, GLib, GdkPixbuf, Gio
+from gi.repository import GObject, Gtk, GLib, GdkPixbuf, Gio, Gdk
 
 from ..widgets.json_viewer import JsonViewer
 from ..widgets.terminal_textview import TerminalTextView
 from ..widgets.markdown_textview import MarkdownTextView
 from ..widgets.geo_json_map import GeoJsonMap
+from ..widgets.matrix_viewer import MatrixViewer, MatrixRow, Matrix
 
 from ..models.output import OutputType, DataType, Output
+from ..utils.utilities import summarize_json, summarize_geo_json
+from ..utils.table_schema import parse_data_resource, get_table_size
+from ..utils.inline_figures import get_image_size
 
 from gettext import gettext as _
 
 import hashlib
-import base64
 import os
 import random
 import re
@@ -41,6 +44,17 @@ class OutputPicture(Gtk.Picture):
 
     display_id = GObject.Property(type=str, default=None)
 
+    def recycle(self):
+        """Resets the widget so that it can be reused"""
+
+        self.display_id = None
+        self.set_paintable(None)
+        self.set_size_request(-1, -1)
+        self.set_focusable(False)
+
+    def disconnect(self, *_args):
+        pass
+
 
 class OutputMarkdown(MarkdownTextView):
     __gtype_name__ = "OutputMarkdown"
@@ -51,12 +65,26 @@ class OutputMarkdown(MarkdownTextView):
         super().__init__()
         self.set_editable(False)
 
+    def recycle(self):
+        """Resets the widget so that it can be reused"""
+
+        self.display_id = None
+        self.set_text("")
+        self.set_focusable(False)
+
 
 class OutputTerminal(TerminalTextView):
     __gtype_name__ = "OutputTerminal"
 
     display_id = GObject.Property(type=str, default=None)
 
+    def recycle(self):
+        """Resets the widget so that it can be reused"""
+
+        self.display_id = None
+        self.reset()
+        self.set_focusable(False)
+
 
 class OutputJSON(JsonViewer):
     __gtype_name__ = "OutputJSON"
@@ -87,6 +115,159 @@ class OutputHTML(Gtk.Button):
         self.set_child(box)
 
 
+class OutputTable(Gtk.Box):
+    __gtype_name__ = "OutputTable"
+
+    display_id = GObject.Property(type=str, default=None)
+
+    MAX_HEIGHT = 400
+
+    def __init__(self):
+        super().__init__(
+            orientation=Gtk.Orientation.VERTICAL, css_classes=["output"])
+
+        # The estimated size of the rows shown, counted by the loader
+        self.size = 0
+
+        self.matrix_viewer = MatrixViewer()
+        self.append(Gtk.ScrolledWindow(
+            child=self.matrix_viewer,
+            propagate_natural_height=True,
+            max_content_height=self.MAX_HEIGHT,
+            css_classes=["output-frame"]))
+
+        self.open_button = Gtk.Button(
+            css_classes=["html-button"], visible=False)
+        self.open_button.set_action_name("win.open-variable")
+        self.append(self.open_button)
+
+    def set_content(self, column_names, labels, rows, n_rows, name=None):
+        """Shows the rows of a table
+
+        :param list column_names: The name of each column
+        :param list labels: The label of each row
+        :param list rows: The cells of each row
+        :param int n_rows: The rows in the whole table
+        :param str name: The kernel variable holding the whole table, used
+            to open it paged when only a part of it is shown
+        """
+
+        matrix = Matrix()
+        for column_name in column_names:
+            matrix.add_column(column_name)
+        for label, cells in zip(labels, rows):
+            row = MatrixRow()
+            row.set_number(label)
+            for cell in cells:
+                row.append(cell)
+            matrix.append(row)
+
+        self.matrix_viewer.disconnect()
+        for column in list(self.matrix_viewer.get_columns()):
+            self.matrix_viewer.remove_column(column)
+        self.matrix_viewer.set_matrix(matrix)
+
+        if name and n_rows > len(rows):
+            self.open_button.set_label(
+                _("Open All {} Rows").format(n_rows))
+            self.open_button.set_action_target_value(GLib.Variant("s", name))
+            self.open_button.set_visible(True)
+        else:
+            self.open_button.set_visible(False)
+
+    def disconnect(self, *_args):
+        self.matrix_viewer.disconnect()
+
+
+class ActivatableOutput(Gtk.Stack):
+    __gtype_name__ = "ActivatableOutput"
+
+    display_id = GObject.Property(type=str, default=None)
+
+    def __init__(self, _summary, _factory, _size=0):
+        super().__init__(
+            vhomogeneous=False, interpolate_size=True, css_classes=["output"])
+
+        self.factory = _factory
+        self.size = _size
+        self.widget = None
+
+        self.summary_label = Gtk.Label(label=_summary, ellipsize=3)
+        box = Gtk.Box(
+            spacing=12, margin_top=6, margin_bottom=6, halign=Gtk.Align.CENTER
+        )
+        box.append(self.summary_label)
+        box.append(Gtk.Image(icon_name="right-symbolic"))
+
+        self.placeholder = Gtk.Button(
+            child=box,
+            tooltip_text=_("Click to Load"),
+            css_classes=["html-button"])
+        self.placeholder.connect("clicked", self.activate_output)
+
+        focus_controller = Gtk.EventControllerFocus()
+        focus_controller.connect("enter", self.activate_output)
+        self.placeholder.add_controller(focus_controller)
+
+        self.add_named(self.placeholder, "placeholder")
+
+    def set_content(self, _summary, _factory, _size=0):
+        """Replaces the content, rebuilding the widget if it is active"""
+
+        was_active = self.widget is not None
+        self.release_output()
+
+        self.summary_label.set_label(_summary)
+        self.factory = _factory
+        self.size = _size
+
+        if was_active:
+            self.activate_output()
+
+    def activate_output(self, *_args):
+        """Builds the interactive widget and shows it"""
+
+        if self.widget is not None:
+            return
+
+        self.widget = self.factory()
+        self.add_named(self.widget, "widget")
+        self.set_visible_child_name("widget")
+
+    def release_output(self, *_args):
+        """Destroys the interactive widget going back to the summary"""
+
+        if self.widget is None:
+            return
+
+        self.set_visible_child_name("placeholder")
+        if isinstance(self.widget, JsonViewer):
+            self.widget.disconnect()
+        self.remove(self.widget)
+        self.widget = None
+
+    def get_active_size(self):
+        """Returns the estimated size of the interactive widget if built"""
+
+        return self.size if self.widget is not None else 0
+
+
+class EvictedOutputs(Gtk.Box):
+    __gtype_name__ = "EvictedOutputs"
+
+    display_id = GObject.Property(type=str, default=None)
+
+    def __init__(self, _height):
+        super().__init__(
+            height_request=_height,
+            valign=Gtk.Align.START,
+            css_classes=["evicted-outputs"])
+        self.append(Gtk.Label(
+            label=_("Outputs hidden to save memory"),
+            hexpand=True,
+            css_classes=["dim-label"]))
+
+
 class OutputLoader(GObject.GObject):
     __gtype_name__ = "OutputLoader"
 
@@ -96,10 +277,24 @@ class OutputLoader(GObject.GObject):
     html_path = os.path.join(cache_dir, "g_html")
     latex_path = os.path.join(cache_dir, "g_latex")
 
-    def __init__(self, _output_box):
+    # Rough number of bytes used by the widgets for each character of text
+    TEXT_BYTES_PER_CHAR = 8
+    JSON_BYTES_PER_CHAR = 16
+
+    # A map keeps tiles and layers around regardless of the data displayed
+    GEO_JSON_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, _output_box, _widget_pool=None):
         super().__init__()
 
         self.output_box = _output_box
+        self.widget_pool = _widget_pool
+
+        # Estimated number of bytes used by the output widgets
+        self.estimated_size = 0
+
+        # Incremented on clear so that pending async outputs are discarded
+        self.generation = 0
 
     def add_output(self, output: Output):
         """Adds an output to the output_box"""
@@ -129,6 +324,8 @@ class OutputLoader(GObject.GObject):
                         self.display_geo_json(output)
                     case DataType.LATEX:
                         self.display_latex(output)
+                    case DataType.TABLE:
+                        self.display_table(output)
 
             case OutputType.ERROR:
                 self.add_output_text(output.traceback)
@@ -151,7 +348,11 @@ class OutputLoader(GObject.GObject):
             case DataType.MARKDOWN:
                 child.set_text(output.data_content)
             case DataType.JSON:
-                child.parse_json_string(output.data_content)
+                child.set_content(*self._get_json_content(output))
+            case DataType.GEO_JSON:
+                child.set_content(*self._get_geo_json_content(output))
+            case DataType.TABLE:
+                self.set_table_content(child, output)
 
     #
     #   OUTPUT TEXT for stream...
@@ -162,9 +363,10 @@ class OutputLoader(GObject.GObject):
 
         child = self.output_box.get_last_child()
         if not isinstance(child, OutputTerminal):
-            child = OutputTerminal()
+            child = self.new_widget(OutputTerminal)
             self.output_box.append(child)
         child.insert_with_escapes(text)
+        self.estimated_size += len(text) * self.TEXT_BYTES_PER_CHAR
 
     #
     #   DISPLAY OUTPUTS
@@ -173,40 +375,111 @@ class OutputLoader(GObject.GObject):
     def display_text(self, output: Output):
         """Adds an output in an OutputTerminal used for any text display"""
 
-        child = OutputTerminal()
+        child = self.new_widget(OutputTerminal)
         child.set_focusable(True)
         child.display_id = output.display_id
         self.output_box.append(child)
         child.insert_with_escapes(output.data_content)
+        self.estimated_size += (
+            len(output.data_content) * self.TEXT_BYTES_PER_CHAR)
 
     def display_markdown(self, output: Output):
         """Adds an markdown output"""
 
-        child = OutputMarkdown()
+        child = self.new_widget(OutputMarkdown)
         child.set_focusable(True)
         child.display_id = output.display_id
         self.output_box.append(child)
         child.set_text(output.data_content)
+        self.estimated_size += (
+            len(output.data_content) * self.TEXT_BYTES_PER_CHAR)
 
     def display_json(self, output: Output):
-        """Adds an json output"""
+        """Adds an json output, the viewer is built only when activated"""
 
-        child = OutputJSON()
-        child.set_focusable(True)
+        child = ActivatableOutput(*self._get_json_content(output))
         child.display_id = output.display_id
-        child.parse_json_string(output.data_content)
         self.output_box.append(child)
 
     def display_geo_json(self, output: Output):
-        """Adds an GEO json output"""
+        """Adds an GEO json output, the map is built only when activated"""
+
+        child = ActivatableOutput(*self._get_geo_json_content(output))
+        child.display_id = output.display_id
+        self.output_box.append(child)
+
+    def _get_json_content(self, output: Output):
+        """Returns the summary, widget factory and size of a json output"""
+
+        json_string = output.data_content
+
+        def create_viewer():
+            viewer = OutputJSON()
+            viewer.set_focusable(True)
+            viewer.parse_json_string(json_string)
+            return viewer
 
-        geo_json_map = GeoJsonMap()
-        geo_json_map.parse(output.data_content)
-        frame = Gtk.Frame(
-            child=geo_json_map,
-            height_request=300,
-            css_classes=["output-frame"])
-        self.output_box.append(frame)
+        return (
+            summarize_json(json_string),
+            create_viewer,
+            len(json_string) * self.JSON_BYTES_PER_CHAR)
+
+    def _get_geo_json_content(self, output: Output):
+        """Returns the summary, widget factory and size of a GEO json
+        output"""
+
+        json_string = output.data_content
+
+        def create_map():
+            geo_json_map = GeoJsonMap()
+            geo_json_map.parse(json_string)
+            return Gtk.Frame(
+                child=geo_json_map,
+                height_request=300,
+                css_classes=["output-frame"])
+
+        return (
+            summarize_geo_json(json_string),
+            create_map,
+            self.GEO_JSON_SIZE)
+
+    def display_table(self, output: Output):
+        """Adds a table output, shown natively instead of as HTML"""
+
+        child = OutputTable()
+        child.set_focusable(True)
+        child.display_id = output.display_id
+        self.output_box.append(child)
+        self.set_table_content(child, output)
+
+    def set_table_content(self, child, output: Output):
+        """Shows a table output in an OutputTable, the size of the rows it
+        replaces is no longer counted"""
+
+        content = self._get_table_content(output)
+        child.set_content(*content)
+
+        rows = content[2]
+        self.estimated_size -= child.size
+        child.size = self.TEXT_BYTES_PER_CHAR * sum(
+            len(cell) for cells in rows for cell in cells)
+        self.estimated_size += child.size
+
+    def _get_table_content(self, output: Output):
+        """Returns the columns, labels, rows, size and kernel variable of a
+        table output"""
+
+        column_names, labels, rows = parse_data_resource(
+            output.data[output.get_mime_type()])
+        n_rows, _n_columns = get_table_size(output.metadata, len(rows))
+
+        # The results are kept by the kernel in variables like _12
+        name = None
+        if output.output_type == OutputType.EXECUTE_RESULT:
+            if output.execution_count:
+                name = f"_{output.execution_count}"
+
+        return column_names, labels, rows, n_rows, name
 
     def display_latex(self, output: Output):
         """Renders and displays a latex string"""
@@ -239,11 +512,16 @@ class OutputLoader(GObject.GObject):
     async def display_html(self, output: Output):
         """Adds a button to open an HTML file in the browser"""
 
+        generation = self.generation
+
         sha256_hash = random.randint(0, 1000000)
         html_page_path = os.path.join(self.html_path, f"{sha256_hash}.html")
 
         await self.save_file_async(output.data_content, html_page_path)
 
+        if generation != self.generation:
+            return
+
         match = re.search(r"\.(\w+)(?:\s|\>)", output.plain_content)
         if match:
             html_name = match.group(1)
@@ -259,24 +537,50 @@ class OutputLoader(GObject.GObject):
         self.output_box.append(child)
 
     async def display_png_image(self, output: Output):
-        """Adds an PNG image output"""
+        """Adds an PNG image output, the image is copied once in a
+        GLib.Bytes shared by the texture and the saved file"""
 
-        image_data = base64.b64decode(output.data_content)
+        generation = self.generation
+
+        # The payload is decoded only now and not kept in the output,
+        #       binary buffers are used as they are
+        image_data = output.get_image_bytes()
         sha256_hash = hashlib.sha256(image_data).hexdigest()
 
+        if not isinstance(image_data, bytes):
+            image_data = bytes(image_data)
+        image_bytes = GLib.Bytes.new(image_data)
+        del image_data
+
         image_path = os.path.join(self.images_path, f"{sha256_hash}.png")
-        await self.save_file_async(image_data, image_path)
+        await self.save_file_async(image_bytes, image_path)
+
+        if generation != self.generation:
+            return
+
+        try:
+            texture = Gdk.Texture.new_from_bytes(image_bytes)
+        except GLib.GError as e:
+            print(e)
+            return
 
-        self.add_output_image(image_path)
+        self.add_output_texture(
+            texture, get_image_size(output.metadata, output.get_mime_type()))
 
     async def display_svg_image(self, output: Output):
         """Adds an SVG image output"""
 
-        sha256_hash = await self.compute_hash(output.data_content)
+        generation = self.generation
+
+        svg_data = output.get_image_bytes()
+        sha256_hash = hashlib.sha256(svg_data).hexdigest()
 
         svg_path = os.path.join(self.images_path, f"{sha256_hash}.svg")
 
-        await self.save_file_async(output.data_content, svg_path)
+        await self.save_file_async(svg_data, svg_path)
+
+        if generation != self.generation:
+            return
 
         self.add_output_image(svg_path)
 
@@ -284,7 +588,7 @@ class OutputLoader(GObject.GObject):
         """Adds any image output from a image_path"""
 
         pixbuf = GdkPixbuf.Pixbuf.new_from_file(image_path)
-        picture = OutputPicture()
+        picture = self.new_widget(OutputPicture)
         picture.set_focusable(True)
         picture.set_pixbuf(pixbuf)
         if pixbuf.get_width() > 800:
@@ -295,13 +599,88 @@ class OutputLoader(GObject.GObject):
             picture.set_size_request(-1, pixbuf.get_height())
 
         self.output_box.append(picture)
+        self.estimated_size += pixbuf.get_byte_length()
+
+    def add_output_texture(self, texture, size=None):
+        """Adds an image output from a decoded texture
+
+        :param Gdk.Texture texture: The image
+        :param tuple size: The logical width and height of the image, as
+            set by the kernel for retina images, or None for its pixels
+        """
+
+        width, height = size or (texture.get_width(), texture.get_height())
+
+        picture = self.new_widget(OutputPicture)
+        picture.set_focusable(True)
+        picture.set_paintable(texture)
+        if width > 800:
+            picture.set_size_request(-1, height * (700 / width))
+        else:
+            picture.set_size_request(-1, height)
+
+        self.output_box.append(picture)
+        self.estimated_size += texture.get_width() * texture.get_height() * 4
+
+    def get_estimated_size(self):
+        """Returns the estimated memory used by the output widgets,
+        including the interactive widgets currently built"""
+
+        size = self.estimated_size
+        child = self.output_box.get_first_child()
+        while child:
+            if isinstance(child, ActivatableOutput):
+                size += child.get_active_size()
+            child = child.get_next_sibling()
+        return size
+
+    def release_outputs(self):
+        """Releases all the interactive widgets"""
+
+        child = self.output_box.get_first_child()
+        while child:
+            if isinstance(child, ActivatableOutput):
+                child.release_output()
+            child = child.get_next_sibling()
+
+    def clear(self):
+        """Removes and disconnects all the output widgets"""
+
+        self.generation += 1
+        self.estimated_size = 0
+
+        child = self.output_box.get_first_child()
+        while child:
+            self.output_box.remove(child)
+            if self.widget_pool and isinstance(
+                    child, (OutputTerminal, OutputMarkdown, OutputPicture)):
+                self.widget_pool.release(child)
+            elif isinstance(
+                    child, (TerminalTextView, MarkdownTextView, JsonViewer,
+                            OutputTable)):
+                child.disconnect()
+            elif isinstance(child, ActivatableOutput):
+                child.release_output()
+            child = self.output_box.get_first_child()
+
+    def new_widget(self, widget_class):
+        """Returns a new output widget, reusing one from the pool if
+        available"""
+
+        if self.widget_pool:
+            return self.widget_pool.acquire(widget_class)
+        return widget_class()
 
     #
     #
     #
 
     async def save_file_async(self, content: bytes, file_path: str):
-        """Saves an image asyncronously"""
+        """Saves an image asyncronously
+
+        :param content: The content, str, bytes, memoryview or GLib.Bytes
+        :param str file_path: The path of the file
+        """
 
         file = Gio.File.new_for_path(file_path)
         output_stream = await file.replace_async(
@@ -309,8 +688,12 @@ class OutputLoader(GObject.GObject):
         )
         if isinstance(content, str):
             content = content.encode("utf-8")
+        if isinstance(content, memoryview):
+            content = content.tobytes()
+        if not isinstance(content, GLib.Bytes):
+            content = GLib.Bytes.new(content)
         await output_stream.write_bytes_async(
-            GLib.Bytes.new(content), io_priority=GLib.PRIORITY_DEFAULT, cancellable=None
+            content, io_priority=GLib.PRIORITY_DEFAULT, cancellable=None
         )
         await output_stream.close_async(
             io_priority=GLib.PRIORITY_DEFAULT, cancellable=None
@@ -326,8 +709,7 @@ class OutputLoader(GObject.GObject):
 
         child = self.output_box.get_last_child()
         while child:
-            print(child.display_id)
-            if child.display_id == display_id:
+            if getattr(child, "display_id", None) == display_id:
                 return child
             child = child.get_prev_sibling()
 
@@ -0,0 +1,87 @@
+# output_widget_pool.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject
+
+
+# Keeps the output widgets removed from a cell so that they can be reused
+#       the next time an output of the same kind is displayed, instead of
+#       creating new ones (and all their text tags) every time a cell runs
+class OutputWidgetPool(GObject.GObject):
+    __gtype_name__ = "OutputWidgetPool"
+
+    hits = GObject.Property(type=int, default=0)
+    misses = GObject.Property(type=int, default=0)
+
+    def __init__(self, _max_per_kind=32):
+        super().__init__()
+
+        self.max_per_kind = _max_per_kind
+
+        # Dictionary of {widget_class: [widget, ...]}
+        self.pool = {}
+
+    def acquire(self, widget_class):
+        """Returns a reset widget of widget_class, creating it if the pool
+        has none
+
+        :param type widget_class: The class of the output widget
+        :returns: The output widget
+        """
+
+        widgets = self.pool.get(widget_class)
+        if widgets:
+            self.hits += 1
+            return widgets.pop()
+
+        self.misses += 1
+        return widget_class()
+
+    def release(self, widget):
+        """Resets a widget no longer displayed and keeps it for later use
+
+        The widget must have been already removed from its parent and must
+        implement a recycle method.
+
+        :param Gtk.Widget widget: The output widget
+        """
+
+        widgets = self.pool.setdefault(type(widget), [])
+        if len(widgets) < self.max_per_kind:
+            widget.recycle()
+            widgets.append(widget)
+        else:
+            widget.disconnect()
+
+    def get_stats(self):
+        """Returns the pool hits, misses and the number of pooled widgets"""
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "pooled": sum(len(widgets) for widgets in self.pool.values()),
+        }
+
+    def clear(self):
+        """Disconnects and drops all the pooled widgets"""
+
+        for widgets in self.pool.values():
+            for widget in widgets:
+                widget.disconnect()
+        self.pool.clear()
@@ -19,6 +19,7 @@
 
 from gi.repository import Panel, Gtk, GObject, Gio, GLib
 import asyncio
+import time
 
 from gettext import gettext as _
 
@@ -32,6 +33,9 @@ class GenericSaveDelegate(Panel.SaveDelegate):
 
         self.page = page
 
+        # Cancels the save in progress
+        self.cancellable = None
+
         self.bindings.append(self.bind_property("title", self.page, "title"))
         self.bindings.append(
             self.bind_property(
@@ -67,13 +71,11 @@ class GenericSaveDelegate(Panel.SaveDelegate):
     def do_save_async(self, cancellable, callback, user_data):
         """Save the page content"""
         print("DRAFT: ", self.get_is_draft())
+        self.cancellable = cancellable or Gio.Cancellable()
         if self.get_is_draft():
             asyncio.create_task(self._do_save_async())
         else:
-            asyncio.create_task(
-                self._save_content(
-                    self.page.get_path(),
-                    self.page.get_content()))
+            asyncio.create_task(self._save_page(self.page.get_path()))
 
     async def _do_save_async(self):
         """Save the page content asyncronously"""
@@ -85,13 +87,21 @@ class GenericSaveDelegate(Panel.SaveDelegate):
             page_path = file.get_path()
             self.page.set_path(page_path)
 
-            await self._save_content(page_path, self.page.get_content())
+            await self._save_page(page_path)
 
             self.set_is_draft(False)
 
         except Exception as e:
             print(e)
 
+    def report_progress(self, fraction):
+        """Shows the progress of a save
+
+        :param float fraction: The fraction saved, from 0 to 1
+        """
+
+        self.set_progress(fraction)
+
     def do_save_finish(self, result):
         return result.propagate_boolean()
 
@@ -103,7 +113,25 @@ class GenericSaveDelegate(Panel.SaveDelegate):
         except GObject.GError:
             return None
 
-    async def _save_content(self, file_path: str, content: str):
+    async def _save_page(self, file_path: str):
+        """Save the page with its save_file method and report the time
+        it took"""
+
+        start = time.perf_counter()
+
+        self.set_progress(0)
+        bytes_written = await self.page.save_file(file_path)
+        self.set_progress(0)
+
+        if bytes_written is not None:
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Saved {file_path} ({bytes_written} bytes) "
+                  f"in {elapsed:.1f} ms")
+            self.page.set_modified(False)
+
+        return bytes_written
+
+    async def write_content(self, file_path: str, content: str):
         """Save the content asyncronously"""
         file = Gio.File.new_for_path(file_path)
 
@@ -129,10 +157,6 @@ class GenericSaveDelegate(Panel.SaveDelegate):
                 io_priority=GLib.PRIORITY_DEFAULT, cancellable=None
             )
 
-            print(f"File written successfully: {file_path}")
-
-            self.page.set_modified(False)
-
             return bytes_written
         except Exception as e:
             print(f"Error writing file: {e}")
@@ -17,10 +17,11 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import GObject, Gio, Adw, GtkSource, Gtk, Gdk
+from gi.repository import GObject, Gio, Adw, GtkSource, Gtk, Gdk, GLib
 
 import xml.etree.ElementTree as ET
 import configparser
+import weakref
 
 
 class Palette(GObject.GObject):
@@ -137,6 +138,9 @@ class StyleManager(GObject.GObject):
 
     _selected = "Adwaita"
 
+    # Number of subscribers updated in a single main loop iteration
+    UPDATE_BATCH_SIZE = 20
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(StyleManager, cls).__new__(cls)
@@ -174,6 +178,13 @@ class StyleManager(GObject.GObject):
 
         self.css_provider = Gtk.CssProvider()
 
+        # Subscribers are kept with weak references so that a widget that
+        #       is never disconnected can still be freed
+        self._subscribers = weakref.WeakSet()
+        self._map_handlers = weakref.WeakKeyDictionary()
+        self._update_queue = []
+        self._update_source_id = 0
+
     @GObject.Property(type=str, default="Adwaita")
     def selected(self):
         return self._selected
@@ -185,6 +196,7 @@ class StyleManager(GObject.GObject):
             self.notify("selected")
             self.emit("style-changed")
             self.update_style_scheme()
+            self.broadcast_style()
 
     @GObject.Property(type=GObject.GObject)
     def palette(self):
@@ -210,6 +222,100 @@ class StyleManager(GObject.GObject):
 
         self.emit("style-changed")
         self.update_style_scheme()
+        self.broadcast_style()
+
+    #
+    #   SUBSCRIBERS
+    #
+
+    def subscribe(self, subscriber):
+        """Adds a subscriber that will have its update_style_scheme called
+        when the style changes
+
+        :param IStyleUpdate subscriber: The object to update
+        """
+
+        self._subscribers.add(subscriber)
+
+    def unsubscribe(self, subscriber):
+        """Removes a subscriber
+
+        :param IStyleUpdate subscriber: The object to remove
+        """
+
+        self._subscribers.discard(subscriber)
+
+        handler_id = self._map_handlers.pop(subscriber, None)
+        if handler_id:
+            subscriber.disconnect_by_func(self._on_subscriber_mapped)
+
+    def broadcast_style(self):
+        """Updates the subscribers in batches, the ones in the viewport of
+        their scrolled windows first, the ones that are not mapped are
+        updated when they are shown"""
+
+        visible = []
+        hidden = []
+
+        for subscriber in list(self._subscribers):
+            if not isinstance(subscriber, Gtk.Widget):
+                hidden.append(subscriber)
+            elif not subscriber.get_mapped():
+                if subscriber not in self._map_handlers:
+                    self._map_handlers[subscriber] = subscriber.connect(
+                        "map", self._on_subscriber_mapped)
+            elif self._is_in_viewport(subscriber):
+                visible.append(subscriber)
+            else:
+                hidden.append(subscriber)
+
+        self._update_queue = visible + hidden
+
+        if self._update_queue and self._update_source_id == 0:
+            self._update_source_id = GLib.idle_add(
+                self._process_update_queue)
+
+    def _is_in_viewport(self, widget):
+        """Returns True if the widget intersects the viewport of every
+        scrolled window it's in, rows of a list are mapped even when they
+        are scrolled out"""
+
+        scrolled_window = widget.get_ancestor(Gtk.ScrolledWindow)
+        while scrolled_window:
+            success, bounds = widget.compute_bounds(scrolled_window)
+            if success and (
+                    bounds.get_y() + bounds.get_height() < 0
+                    or bounds.get_y() > scrolled_window.get_height()):
+                return False
+
+            parent = scrolled_window.get_parent()
+            if parent is None:
+                break
+            scrolled_window = parent.get_ancestor(Gtk.ScrolledWindow)
+
+        return True
+
+    def _process_update_queue(self):
+        batch = self._update_queue[:self.UPDATE_BATCH_SIZE]
+        del self._update_queue[:self.UPDATE_BATCH_SIZE]
+
+        for subscriber in batch:
+            try:
+                subscriber.update_style_scheme()
+            except Exception as e:
+                print(e)
+
+        if self._update_queue:
+            return True
+
+        self._update_source_id = 0
+        return False
+
+    def _on_subscriber_mapped(self, subscriber):
+        self._map_handlers.pop(subscriber, None)
+        subscriber.disconnect_by_func(self._on_subscriber_mapped)
+
+        subscriber.update_style_scheme()
 
     def get_dark(self):
         """Returns true if the current theme is dark"""
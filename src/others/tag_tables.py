@@ -0,0 +1,174 @@
+# tag_tables.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from gi.repository import GObject, Gtk, Pango
+
+from .style_manager import StyleManager
+
+
+# Holds the Gtk.TextTagTable shared by every TerminalTextView and the one
+#       shared by every MarkdownTextView. The tags are recolored once when
+#       the style changes instead of once per view
+class TagTables(GObject.GObject):
+    __gtype_name__ = "TagTables"
+
+    _instance = None
+    _initialized = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(TagTables, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        if self._initialized:
+            return
+
+        self.style_manager = StyleManager()
+
+        self.terminal_table = self._create_terminal_table()
+        self.markdown_table = self._create_markdown_table()
+
+        self.update_style_scheme()
+        self.style_manager.connect("style-changed", self.update_style_scheme)
+
+        TagTables._initialized = True
+
+    def get_terminal_table(self):
+        """Returns the tag table used by terminal views"""
+
+        return self.terminal_table
+
+    def get_markdown_table(self):
+        """Returns the tag table used by markdown views"""
+
+        return self.markdown_table
+
+    #
+    #   TERMINAL TAGS
+    #
+
+    def _create_terminal_table(self):
+        table = Gtk.TextTagTable()
+
+        def add_tag(name, **properties):
+            tag = Gtk.TextTag(name=name, **properties)
+            table.add(tag)
+
+        # Foreground and background colors, recolored from the palette
+        for base in (30, 90):
+            for index in range(8):
+                add_tag(f"fg_{base + index}")
+        for base in (40, 100):
+            for index in range(8):
+                add_tag(f"bg_{base + index}")
+
+        # Style tags
+        add_tag("reset")  # Empty tag for reset
+        add_tag("sgr_1", weight=Pango.Weight.BOLD)
+        add_tag("sgr_3", style=Pango.Style.ITALIC)
+        add_tag("sgr_4", underline=Pango.Underline.SINGLE)
+        add_tag("sgr_7")
+        add_tag("sgr_9", strikethrough=True)
+
+        # Reset tags
+        add_tag("reset_weight", weight=Pango.Weight.NORMAL)
+        add_tag("reset_style", style=Pango.Style.NORMAL)
+        add_tag("reset_underline", underline=Pango.Underline.NONE)
+        add_tag("reset_inverse")
+
+        return table
+
+    def _update_terminal_table(self):
+        colors = self.style_manager.get_current_colors()
+
+        for i in range(0, 16):
+            fg_base = 3 if i < 8 else 9
+            fg_tag = self.terminal_table.lookup(f"fg_{fg_base}{i % 8}")
+            if fg_tag:
+                fg_tag.set_property("foreground", colors[f"color{i}"])
+
+            bg_base = 4 if i < 8 else 10
+            bg_tag = self.terminal_table.lookup(f"bg_{bg_base}{i % 8}")
+            if bg_tag:
+                bg_tag.set_property("background", colors[f"color{i}"])
+
+    #
+    #   MARKDOWN TAGS
+    #
+
+    def _create_markdown_table(self):
+        table = Gtk.TextTagTable()
+
+        self.foreground_accent_tags = []
+
+        for scale in range(1, 7):
+            tag = Gtk.TextTag(
+                name=f"h{scale}",
+                weight=Pango.Weight.BOLD,
+                scale=2.0-(scale-1)/5)
+            table.add(tag)
+            self.foreground_accent_tags.append(tag)
+
+        table.add(Gtk.TextTag(
+            name="bold", weight=Pango.Weight.BOLD))
+        table.add(Gtk.TextTag(
+            name="italic", style=Pango.Style.ITALIC))
+        table.add(Gtk.TextTag(
+            name="bold_italic",
+            weight=Pango.Weight.BOLD,
+            style=Pango.Style.ITALIC))
+
+        self.link_tag = Gtk.TextTag(
+            name="link", underline=Pango.Underline.SINGLE)
+        self.quote_tag = Gtk.TextTag(
+            name="quote", style=Pango.Style.ITALIC, left_margin=20)
+        self.code_tag = Gtk.TextTag(
+            name="code", style=Pango.Style.OBLIQUE)
+        self.block_code_tag = Gtk.TextTag(
+            name="block_code", family="Monospace")
+
+        for tag in (
+                self.link_tag, self.quote_tag,
+                self.code_tag, self.block_code_tag):
+            table.add(tag)
+
+        return table
+
+    def _update_markdown_table(self):
+        accent_color = self.style_manager.get_accent_color()
+        if self.style_manager.get_dark():
+            bg_color = "#3F3F3F"
+        else:
+            bg_color = "#E0E0E0"
+
+        self.link_tag.set_property("foreground", accent_color)
+        self.quote_tag.set_property("background", bg_color)
+        self.code_tag.set_property("background", bg_color)
+        self.block_code_tag.set_property("background", bg_color)
+
+        for foreground_tag in self.foreground_accent_tags:
+            foreground_tag.set_property("foreground", accent_color)
+
+    def update_style_scheme(self, *_args):
+        """Recolors the shared tags with the current palette"""
+
+        self._update_terminal_table()
+        self._update_markdown_table()
@@ -138,7 +138,7 @@ class ConsolePage(
 
         if msg_type == 'stream':
             output = Output(OutputType.STREAM)
-            output.parse(content)
+            output.parse(content, msg.get('buffers'))
             cell.add_output(output)
 
         elif msg_type == 'execute_input':
@@ -147,12 +147,12 @@ class ConsolePage(
 
         elif msg_type == 'display_data':
             output = Output(OutputType.DISPLAY_DATA)
-            output.parse(content)
+            output.parse(content, msg.get('buffers'))
             cell.add_output(output)
 
         elif msg_type == 'error':
             output = Output(OutputType.ERROR)
-            output.parse(content)
+            output.parse(content, msg.get('buffers'))
             cell.add_output(output)
 
     def add_run_cell(self, content):
@@ -22,16 +22,27 @@ from gi.repository import Panel, GLib
 
 from ..others.save_delegate import GenericSaveDelegate
 
-from ..widgets.matrix_viewer import MatrixViewer, MatrixRow, Matrix
+from ..widgets.matrix_viewer import MatrixViewer, Matrix
+from ..widgets.matrix_viewer import PagedMatrix, LazyMatrix
+
+from ..models.csv_index import CsvIndex
 
 from ..interfaces.saveable import ISaveable
 from ..interfaces.language import ILanguage
 
+from ..utils.variable_pager import VariablePager
+
+from gettext import gettext as _
+
 import os
-import csv
-import io
 import asyncio
 
+# The columns of a variable that are shown
+MAX_COLUMNS = 100
+
+# Milliseconds between the updates of the rows of a file being indexed
+INDEX_PROGRESS_INTERVAL = 200
+
 
 @Gtk.Template(resource_path='/io/github/nokse22/PlanetNine/gtk/matrix_page.ui')
 class MatrixPage(Panel.Widget, ILanguage):
@@ -39,6 +50,7 @@ class MatrixPage(Panel.Widget, ILanguage):
 
     matrix_viewer = Gtk.Template.Child()
     stack = Gtk.Template.Child()
+    progress_bar = Gtk.Template.Child()
 
     path = GObject.Property(type=str, default="")
 
@@ -53,11 +65,33 @@ class MatrixPage(Panel.Widget, ILanguage):
 
         self.matrix = Matrix()
 
+        self.csv_index = None
+        self.index_task = None
+        self.index_timeout = 0
+
         # LOAD File
 
-        self.set_title(os.path.basename(_path))
+        if _path:
+            self.set_title(os.path.basename(_path))
+
+            asyncio.create_task(self.load_file(_path))
+
+    @classmethod
+    def new_from_variable(cls, kernel, name):
+        """Creates a page that shows a variable of a kernel
 
-        asyncio.create_task(self.load_file(_path))
+        :param kernel: The JupyterKernel where the variable lives
+        :param str name: The name of the variable
+        """
+
+        instance = cls()
+
+        instance.language = "python"
+        instance.set_title(name)
+
+        asyncio.create_task(instance.load_variable(kernel, name))
+
+        return instance
 
     async def load_file(self, file_path):
         """Load a file"""
@@ -75,44 +109,81 @@ class MatrixPage(Panel.Widget, ILanguage):
             self.matrix_viewer.set_matrix(self.matrix)
             self.stack.set_visible_child_name("matrix")
 
-    async def _matrix_from_csv(self, file):
-        """Populates the matrix with rows and columns from a csv file"""
+    async def load_variable(self, kernel, name):
+        """Load a variable, only the shape and the column names are read,
+        the rows are fetched from the kernel while they are scrolled into
+        view"""
 
-        file_input_stream = file.read()
-        data_input_stream = Gio.DataInputStream.new(file_input_stream)
+        pager = VariablePager(kernel, name)
 
-        if data_input_stream is None:
+        try:
+            window = await pager.get_window(0, 0, 0, MAX_COLUMNS)
+        except Exception as e:
+            print(e)
+            self.activate_action(
+                "win.error-toast",
+                GLib.Variant(
+                    "(ss)", (_("Could not open the variable"), str(e))))
             return
 
-        csv_content = ""
-        while True:
-            line, _ = await data_input_stream.read_line_async(0)
-            line = line.decode('utf-8')
-            if line == '':
-                break
-            csv_content += line + "\n"
+        n_columns = min(window["columns"], MAX_COLUMNS)
 
-        data_input_stream.close()
-        file_input_stream.close()
+        async def fetch_page(start, end):
+            page = await pager.get_window(start, end, 0, n_columns)
+            return page["index"], page["data"]
 
-        csv_file = io.StringIO(csv_content)
-        csv_reader = csv.reader(csv_file)
+        self.matrix = PagedMatrix(window["rows"], fetch_page)
+        for column_name in window["column_names"]:
+            self.matrix.add_column(column_name)
+
+        self.matrix_viewer.set_matrix(self.matrix)
+        self.stack.set_visible_child_name("matrix")
+
+    async def _matrix_from_csv(self, file):
+        """Indexes a csv file in a worker thread, the rows are shown while
+        they are indexed and parsed only when they are scrolled into view"""
 
         try:
-            column_names = next(csv_reader)
-            for column_name in column_names:
-                self.matrix.add_column(column_name.strip())
+            self.csv_index = CsvIndex(file.get_path())
         except Exception as e:
             print(e)
+            return
+
+        index = self.csv_index
+        self.index_task = asyncio.create_task(asyncio.to_thread(index.build))
+
+        # The header is needed to make the columns
+        await asyncio.to_thread(index.first_rows.wait)
+        while index.n_rows == 0 and not index.finished:
+            await asyncio.sleep(INDEX_PROGRESS_INTERVAL / 1000)
+
+        if index.n_rows == 0:
+            return
 
-        row_number = 1
-        for cells in csv_reader:
-            row = MatrixRow()
-            for cell in cells:
-                row.append(cell.strip())
-            row.set_number(row_number)
-            self.matrix.append(row)
-            row_number += 1
+        # The first row has the column names
+        self.matrix = LazyMatrix(lambda position: index.get_row(position + 1))
+        for column_name in index.get_row(0):
+            self.matrix.add_column(column_name.strip())
+
+        if self.update_index_progress():
+            self.progress_bar.set_visible(True)
+            self.index_timeout = GLib.timeout_add(
+                INDEX_PROGRESS_INTERVAL, self.update_index_progress)
+
+    def update_index_progress(self):
+        """Shows the rows indexed so far"""
+
+        index = self.csv_index
+
+        self.matrix.set_n_rows(max(index.n_rows - 1, 0))
+        self.progress_bar.set_fraction(index.progress)
+
+        if index.finished:
+            self.progress_bar.set_visible(False)
+            self.index_timeout = 0
+            return GLib.SOURCE_REMOVE
+
+        return GLib.SOURCE_CONTINUE
 
     #
     #   Implement Language Interface
@@ -132,6 +203,12 @@ class MatrixPage(Panel.Widget, ILanguage):
     def disconnect(self, *_args):
         """Disconnect all signals"""
 
+        if self.index_timeout:
+            GLib.source_remove(self.index_timeout)
+            self.index_timeout = 0
+        if self.csv_index:
+            self.csv_index.close()
+
         self.save_delegate.disconnect_all()
         self.matrix_viewer.disconnect()
 
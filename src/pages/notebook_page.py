@@ -19,22 +19,33 @@
 
 from gi.repository import Gtk
 from gi.repository import Gdk
-from gi.repository import Panel, GLib
+from gi.repository import Panel, GLib, Gio
 
 import os
-import nbformat
 import asyncio
 
 from ..models.cell import Cell, CellType
 from ..widgets.cell_ui import CellUI
 from ..models.output import Output, OutputType
 from ..models.notebook import Notebook
+from ..utils.notebook_stream_parser import NotebookStreamParser
+from ..utils.notebook_gzip import (
+    GzipStreamDecoder, is_compressed_path, load_contents_model)
+from ..utils.output_store import OutputStore, get_sidecar_path
 from ..backend.command_line import CommandLine
 from ..backend.jupyter_server import JupyterServer
+from ..backend.storage import Storage
 # from ..completion_providers.completion_providers import LSPCompletionProvider
 from ..completion_providers.completion_providers import WordsCompletionProvider
 from ..completion_providers.kernel_completion import KernelCompletionProvider
 from ..others.save_delegate import GenericSaveDelegate
+from ..others.output_budget_manager import OutputBudgetManager
+from ..others.output_widget_pool import OutputWidgetPool
+from ..others.notebook_outline import NotebookOutline
+from ..others.notebook_serializer import NotebookSerializer
+from ..others.notebook_journal import NotebookJournal
+from ..others.notebook_search_index import (
+    NotebookSearchIndex, MatchLocation)
 from ..interfaces.saveable import ISaveable
 from ..interfaces.disconnectable import IDisconnectable
 from ..interfaces.cursor import ICursor
@@ -43,6 +54,14 @@ from ..interfaces.language import ILanguage
 from ..interfaces.cells import ICells
 from ..interfaces.searchable import ISearchable
 
+from gettext import gettext as _
+
+# Milliseconds after a resize before the kernel is told the new width
+FIGURE_SIZE_DELAY = 500
+
+# The width of a cell not used by its outputs
+OUTPUT_MARGIN = 48
+
 
 @Gtk.Template(
     resource_path='/io/github/nokse22/PlanetNine/gtk/notebook_page.ui')
@@ -59,6 +78,12 @@ class NotebookPage(
 
     cache_dir = os.environ["XDG_CACHE_HOME"]
 
+    # Cells copied or cut, shared between all the notebooks
+    clipboard_cells = []
+
+    # Number of cells read before showing the notebook while it's loading
+    FIRST_SCREEN_CELLS = 20
+
     def __init__(self, _file_path="", **kwargs):
         super().__init__(**kwargs)
         IKernel.__init__(self, **kwargs)
@@ -73,6 +98,34 @@ class NotebookPage(
         self.previous_buffer = None
 
         self.notebook_model = None
+        self.outline = None
+        self.search_index = None
+        self.serializer = None
+        self.journal = None
+        self.output_store = None
+
+        self.settings = Gio.Settings.new('io.github.nokse22.PlanetNine')
+
+        # Dictionary of {cell: cell_ui} of the widgets currently in use
+        self.cell_uis = {}
+        self.model_cells = []
+
+        # Dictionary of {cell: target_index} of cells dropped in this
+        #       notebook, moved when their drag ends
+        self.pending_moves = {}
+
+        self.search_query = ""
+        self.search_matches = []
+        self.search_match_index = -1
+
+        self.output_widget_pool = OutputWidgetPool()
+
+        self.output_budget = OutputBudgetManager(
+            self.scrolled_window, self.cells_list_box)
+        self.output_budget.connect(
+            "cell-left-viewport", self.on_cell_left_viewport)
+        self.output_budget.connect(
+            "cell-entered-viewport", self.on_cell_entered_viewport)
 
         asyncio.create_task(self.load_file(_file_path))
 
@@ -81,6 +134,7 @@ class NotebookPage(
         self.kernel_provider = KernelCompletionProvider(self)
 
         self.server = JupyterServer()
+        self.storage = Storage()
 
         self.list_drop_target.set_gtypes([Cell])
         self.list_drop_target.set_actions(Gdk.DragAction.MOVE)
@@ -94,17 +148,30 @@ class NotebookPage(
         self.cells_list_box.connect(
             "selected-rows-changed", self.on_selected_cell_changed)
 
-        self.set_selected_cell_index(0)
+        self.action_group = Gio.SimpleActionGroup()
+        self.insert_action_group("notebook", self.action_group)
 
-    async def load_file(self, file_path):
-        """Load a file"""
+        action = Gio.SimpleAction.new("export-inlined", None)
+        action.connect("activate", self.on_export_inlined_action)
+        self.action_group.add_action(action)
+
+        menu = Gio.Menu()
+        menu.append(
+            _("Export With Outputs Inlined"), "notebook.export-inlined")
+        self.get_menu_model().append_section(None, menu)
+
+        self.set_selected_cell_index(0)
 
-        success, contents = await self.server.get_path_content(file_path)
+        # Plots are rendered by the kernel at the width of the outputs
+        self.figure_size_timeout = 0
+        self.scrolled_window.get_hadjustment().connect(
+            "notify::page-size", self.on_output_width_changed)
+        self.connect("notify::scale-factor", self.on_output_width_changed)
 
-        self.notebook_model = Notebook()
+    async def load_file(self, file_path):
+        """Load a file, the cells are shown while they are being read"""
 
-        if contents:
-            self.notebook_model.parse(contents.get("content", ""))
+        self.notebook_model = Notebook(file_path or None)
 
         self.bindings.append(
             self.notebook_model.bind_property("title", self, "title", 2))
@@ -114,6 +181,43 @@ class NotebookPage(
             self.create_widgets
         )
 
+        self.model_cells = []
+        self.notebook_model.connect(
+            "items-changed", self.on_model_items_changed)
+
+        self.outline = NotebookOutline(self.notebook_model)
+        self.search_index = NotebookSearchIndex(self.notebook_model)
+        self.serializer = NotebookSerializer(self.notebook_model)
+
+        if file_path:
+            await self.storage.wait_detection()
+            self.update_output_store(file_path)
+
+        loaded = bool(file_path) and await self.stream_file(file_path)
+
+        if file_path and not loaded:
+            success, contents = await self.server.get_path_content(file_path)
+
+            if contents:
+                try:
+                    self.notebook_model.parse(
+                        load_contents_model(contents), self.output_store)
+                    loaded = True
+                except Exception as e:
+                    print(e)
+
+        recovered = file_path and self.recover_journal(file_path)
+
+        # A notebook that could not be read references nothing, pruning
+        #       would remove all its outputs
+        if self.output_store and loaded:
+            asyncio.create_task(self.prune_output_store())
+
+        self.journal = NotebookJournal(
+            self.notebook_model, self.serializer, file_path or None)
+        if recovered:
+            self.journal.request_snapshot()
+
         if self.notebook_model.get_n_items() == 0:
             self.add_cell(CellType.CODE)
 
@@ -126,7 +230,149 @@ class NotebookPage(
 
         self.start_kernel()
 
-        self.set_modified(False)
+        self.set_modified(bool(recovered))
+
+    def recover_journal(self, file_path):
+        """Applies the edits left unsaved by a crash
+
+        :param str file_path: The path of the notebook
+        :returns: True if unsaved edits have been recovered
+        :rtype: bool
+        """
+
+        if not NotebookJournal.has_journal(file_path):
+            return False
+
+        notebook_node = NotebookJournal.recover(
+            file_path, self.notebook_model.get_notebook_node())
+        if notebook_node is None:
+            return False
+
+        self.notebook_model.remove_range(0, self.notebook_model.get_n_items())
+        self.notebook_model.parse(notebook_node, self.output_store)
+
+        return True
+
+    async def stream_file(self, file_path):
+        """Reads the notebook in chunks appending the cells as soon as
+        they are parsed, the content is shown with the first screen of
+        cells. The outputs are decoded only when a cell needs them.
+        Compressed notebooks are decompressed one chunk at a time
+
+        :param str file_path: The path of the notebook
+        :returns: True if the whole notebook has been read
+        :rtype: bool
+        """
+
+        parser = NotebookStreamParser()
+        decoder = None
+        if is_compressed_path(file_path):
+            decoder = GzipStreamDecoder()
+
+        try:
+            async for chunk in self.storage.iter_bytes(file_path):
+                chunks = decoder.feed(chunk) if decoder else [chunk]
+                cells = [
+                    Cell.new_from_json(
+                        json_cell, raw_outputs, self.output_store)
+                    for data in chunks
+                    for json_cell, raw_outputs in parser.feed(data)]
+                if cells:
+                    self.notebook_model.insert_cells(
+                        self.notebook_model.get_n_items(), cells)
+
+                n_cells = self.notebook_model.get_n_items()
+                if n_cells >= self.FIRST_SCREEN_CELLS:
+                    self.stack.set_visible_child_name("content")
+
+            if decoder:
+                decoder.close()
+            notebook_node = parser.close()
+        except Exception as e:
+            print(e)
+            self.notebook_model.remove_range(
+                0, self.notebook_model.get_n_items())
+            return False
+
+        self.notebook_model.metadata = notebook_node.get("metadata")
+
+        return True
+
+    #
+    #   OUTPUT STORE
+    #
+
+    def update_output_store(self, file_path):
+        """Uses the sidecar output store of the notebook if it's enabled
+        in the settings or if the notebook already has one. The store is
+        only used for local files
+
+        :param str file_path: The path of the notebook
+        """
+
+        output_store = None
+
+        if file_path and not self.storage.is_remote_path(file_path):
+            sidecar_path = get_sidecar_path(
+                self.storage.resolve_local_path(file_path))
+
+            if self.output_store and self.output_store.path == sidecar_path:
+                return
+
+            if (self.settings.get_boolean('sidecar-outputs')
+                    or os.path.exists(sidecar_path)):
+                output_store = OutputStore(
+                    sidecar_path,
+                    self.settings.get_int('sidecar-output-threshold') * 1024)
+
+        # The cells still read their unloaded outputs from the old store,
+        #       it's opened again when needed
+        if self.output_store:
+            self.output_store.close()
+
+        self.output_store = output_store
+        self.serializer.set_output_store(output_store)
+
+    async def prune_output_store(self):
+        """Removes the stored outputs no cell references anymore"""
+
+        references = {
+            cell.outputs_reference for cell in self.notebook_model
+            if cell.outputs_reference}
+
+        try:
+            removed = await asyncio.to_thread(
+                self.output_store.prune, references)
+        except Exception as e:
+            print(e)
+            return
+
+        if removed:
+            print(f"Removed {removed} unreferenced outputs")
+
+    def on_export_inlined_action(self, *_args):
+        asyncio.create_task(self.export_inlined())
+
+    async def export_inlined(self):
+        """Asks where to write a copy of the notebook that includes all the
+        outputs, to share it without the output store"""
+
+        dialog = Gtk.FileDialog(title=_("Export"))
+        if self.get_path():
+            dialog.set_initial_name(os.path.basename(self.get_path()))
+
+        try:
+            file = await dialog.save(self.get_root())
+        except GLib.GError:
+            return
+
+        try:
+            bytes_written = await self.serializer.export(file.get_path())
+        except Exception as e:
+            print(e)
+            return
+
+        print(f"Exported {file.get_path()} ({bytes_written} bytes)")
 
     def on_selected_cell_changed(self, *_args):
         """Handles when the selected cell has changed"""
@@ -154,8 +400,6 @@ class NotebookPage(
         if cell.cell_type != CellType.CODE:
             return
 
-        found, position = self.notebook_model.find(cell)
-
         if cell.executing:
             return
 
@@ -194,9 +438,11 @@ class NotebookPage(
 
         self.set_modified(True)
 
+        self.output_budget.queue_update()
+
         if msg_type == 'stream':
             output = Output(OutputType.STREAM)
-            output.parse(content)
+            output.parse(content, msg.get('buffers'))
             cell.add_output(output)
 
         elif msg_type == 'execute_input':
@@ -205,20 +451,20 @@ class NotebookPage(
 
         elif msg_type == 'display_data':
             output = Output(OutputType.DISPLAY_DATA)
-            output.parse(content)
+            output.parse(content, msg.get('buffers'))
             cell.add_output(output)
 
         elif msg_type == 'update_display_data':
-            cell.update_output(content)
+            cell.update_output(content, msg.get('buffers'))
 
         elif msg_type == 'execute_result':
             output = Output(OutputType.EXECUTE_RESULT)
-            output.parse(content)
+            output.parse(content, msg.get('buffers'))
             cell.add_output(output)
 
         elif msg_type == 'error':
             output = Output(OutputType.ERROR)
-            output.parse(content)
+            output.parse(content, msg.get('buffers'))
             cell.add_output(output)
 
         elif msg_type == 'status':
@@ -229,35 +475,95 @@ class NotebookPage(
     def create_widgets(self, cell):
         """Create widgets for the Gtk.ListBox"""
 
-        cell = CellUI(cell)
-        cell.connect("request-delete", self.on_cell_request_delete)
-        cell.connect("notify::source", self.on_cell_source_changed)
-        cell.add_provider(self.words_provider)
-        cell.add_provider(self.kernel_provider)
+        # A moved cell gets a new widget, the old one is disposed
+        old_cell_ui = self.cell_uis.pop(cell, None)
+        if old_cell_ui:
+            self.dispose_cell_ui(old_cell_ui)
+
+        cell_ui = CellUI(cell, self.output_widget_pool)
+        cell_ui.connect("request-delete", self.on_cell_request_delete)
+        cell_ui.connect("request-copy", self.on_cell_request_copy)
+        cell_ui.connect("request-cut", self.on_cell_request_cut)
+        cell_ui.connect("request-paste", self.on_cell_request_paste)
+        cell.connect("source-changed", self.on_cell_source_changed)
+        cell_ui.add_provider(self.words_provider)
+        cell_ui.add_provider(self.kernel_provider)
         kernel = self.get_kernel()
         if kernel:
-            cell.set_language(kernel.language)
-        return cell
+            cell_ui.set_language(kernel.language)
+        self.output_budget.register(cell_ui)
+
+        self.cell_uis[cell] = cell_ui
+
+        return cell_ui
+
+    def dispose_cell_ui(self, cell_ui):
+        """Disconnects a cell widget that is no longer in the list"""
+
+        cell_ui.disconnect_by_func(self.on_cell_request_delete)
+        cell_ui.disconnect_by_func(self.on_cell_request_copy)
+        cell_ui.disconnect_by_func(self.on_cell_request_cut)
+        cell_ui.disconnect_by_func(self.on_cell_request_paste)
+        cell_ui.cell.disconnect_by_func(self.on_cell_source_changed)
+        self.output_budget.unregister(cell_ui)
+
+        cell_ui.disconnect()
+
+    def on_model_items_changed(self, model, position, removed, added):
+        """Disposes the widgets of the cells removed from the notebook"""
+
+        removed_cells = self.model_cells[position:position + removed]
+        self.model_cells[position:position + removed] = model.get_range(
+            position, added)
+
+        for cell in removed_cells:
+            if model.get_position(cell) == -1:
+                cell_ui = self.cell_uis.pop(cell, None)
+                if cell_ui:
+                    self.dispose_cell_ui(cell_ui)
 
     def on_cell_source_changed(self, *_args):
         """Sets the page status to modified when a cell content has changed"""
 
         self.set_modified(True)
 
+    def on_cell_left_viewport(self, budget_manager, cell_ui):
+        """Releases the interactive outputs and the search highlight of
+        cells no longer visible"""
+
+        cell_ui.release_outputs()
+        if self.search_query:
+            cell_ui.set_search_text("")
+
+    def on_cell_entered_viewport(self, budget_manager, cell_ui):
+        """Highlights the search matches of cells that became visible"""
+
+        if self.search_query:
+            cell_ui.set_search_text(self.search_query)
+
     def on_cell_request_delete(self, cell_ui):
         """Handle the request of deletion of a cell"""
 
-        found, position = self.notebook_model.find(cell_ui.cell)
+        cell = cell_ui.cell
+        position = self.notebook_model.get_position(cell)
+
+        # The cell has been dragged and dropped in this same notebook
+        if cell in self.pending_moves:
+            target_index = self.pending_moves.pop(cell)
+            if position != -1:
+                new_position = self.notebook_model.move_range(
+                    position, 1, target_index)
+                self.set_selected_cell_index(new_position)
+                self.set_modified(True)
+            return
 
-        if found:
-            self.notebook_model.remove(position)
-            cell_ui.disconnect_by_func(self.on_cell_request_delete)
-            cell_ui.disconnect_by_func(self.on_cell_source_changed)
+        if position != -1:
+            self.notebook_model.remove_range(position, 1)
 
-            del cell_ui
+            self.set_modified(True)
 
             if self.notebook_model.get_n_items() == 0:
-                self.add_cell(Cell(CellType.CODE))
+                self.add_cell(CellType.CODE)
             else:
                 row = self.cells_list_box.get_row_at_index(position)
                 if row:
@@ -267,6 +573,36 @@ class NotebookPage(
                     if row:
                         self.cells_list_box.select_row(row)
 
+    def on_cell_request_copy(self, cell_ui):
+        """Copies a cell to the clipboard"""
+
+        position = self.notebook_model.get_position(cell_ui.cell)
+        if position != -1:
+            NotebookPage.clipboard_cells = self.notebook_model.copy_range(
+                position, 1)
+
+    def on_cell_request_cut(self, cell_ui):
+        """Copies a cell to the clipboard and deletes it"""
+
+        self.on_cell_request_copy(cell_ui)
+        self.on_cell_request_delete(cell_ui)
+
+    def on_cell_request_paste(self, cell_ui):
+        """Pastes the cells in the clipboard after a cell"""
+
+        if not NotebookPage.clipboard_cells:
+            return
+
+        position = self.notebook_model.get_position(cell_ui.cell)
+        if position == -1:
+            return
+
+        cells = [cell.clone() for cell in NotebookPage.clipboard_cells]
+        self.notebook_model.insert_cells(position + 1, cells)
+        self.set_selected_cell_index(position + len(cells))
+
+        self.set_modified(True)
+
     def add_cell(self, cell_type):
         """Adds a cell of type cell_type to the notebook_model"""
 
@@ -291,9 +627,8 @@ class NotebookPage(
     def select_next_cell(self):
         """Selects the next cell"""
 
-        cell = self.get_selected_cell()
-        found, position = self.notebook_model.find(cell)
-        if found and position != self.notebook_model.get_n_items() - 1:
+        position = self.get_selected_cell_index()
+        if position != self.notebook_model.get_n_items() - 1:
             self.set_selected_cell_index(position + 1)
         else:
             self.add_cell(CellType.CODE)
@@ -301,14 +636,21 @@ class NotebookPage(
     def get_selected_cell_index(self):
         """Returns the index of the selected cell"""
 
-        selected_cell = self.cells_list_box.get_selected_row()
-
-        for index in range(0, self.notebook_model.get_n_items()):
-            if self.cells_list_box.get_row_at_index(index) == selected_cell:
-                return index
+        selected_row = self.cells_list_box.get_selected_row()
+        if selected_row:
+            return selected_row.get_index()
 
         return self.notebook_model.get_n_items() - 1
 
+    def iter_cell_uis(self):
+        """Iterates over the cell widgets walking the rows"""
+
+        row = self.cells_list_box.get_row_at_index(0)
+        while row:
+            if isinstance(row, Gtk.ListBoxRow):
+                yield row.get_child()
+            row = row.get_next_sibling()
+
     def set_selected_cell_index(self, index):
         """Sets the selected cell from an index"""
 
@@ -331,19 +673,20 @@ class NotebookPage(
 
         target_row = self.cells_list_box.get_row_at_y(y)
 
-        cell_index = None
-        for index, model_cell in enumerate(self.notebook_model):
-            if cell == model_cell:
-                cell_index = index
-
-        if cell_index:
-            self.notebook_model.remove(cell_index)
-
         if target_row:
             target_index = target_row.get_index()
-            self.notebook_model.insert(target_index, cell)
         else:
-            self.notebook_model.append(cell)
+            target_index = self.notebook_model.get_n_items()
+
+        # Cells from this notebook are moved when the drag ends, cells
+        #       from other notebooks are cloned and deleted from the source
+        if self.notebook_model.get_position(cell) != -1:
+            self.pending_moves[cell] = target_index
+        else:
+            self.notebook_model.insert_cells(target_index, [cell.clone()])
+            self.set_modified(True)
+
+        return True
 
     def on_drop_target_motion(self, drop_target, x, y):
         """Handles moving on cells_list_box while a drag and drop operation"""
@@ -401,8 +744,7 @@ class NotebookPage(
 
         self.language = _language
 
-        for index in range(0, self.notebook_model.get_n_items()):
-            cell = self.cells_list_box.get_row_at_index(index).get_child()
+        for cell in self.iter_cell_uis():
             cell.set_language(self.language)
 
         self.emit('language-changed')
@@ -455,6 +797,10 @@ class NotebookPage(
         """Overrides the set_path of the ISaveable interface"""
 
         self.notebook_model.set_path(_path)
+        if self.serializer:
+            self.update_output_store(_path)
+        if self.journal:
+            self.journal.set_path(_path)
         self.save_delegate.set_subtitle(_path)
         if not _path:
             self.save_delegate.set_is_draft(True)
@@ -464,13 +810,70 @@ class NotebookPage(
     def get_content(self):
         """Overrides the get_content of the ISaveable interface"""
 
-        return nbformat.writes(
-            self.notebook_model.get_notebook_node())
+        return self.serializer.serialize()
+
+    async def save_file(self, file_path):
+        """Overrides the save_file of the ISaveable interface, only the
+        cells changed since the last save are serialized again and the
+        file is written in a worker thread or uploaded in chunks"""
+
+        sequence = self.journal.sequence
+
+        try:
+            if self.storage.is_remote_path(file_path):
+                bytes_written = await self.serializer.upload(
+                    self.storage,
+                    file_path,
+                    self.save_delegate.report_progress,
+                    self.save_delegate.cancellable)
+            else:
+                bytes_written = await self.serializer.save(
+                    self.storage.resolve_local_path(file_path))
+        except Exception as e:
+            print(e)
+            return None
+
+        if bytes_written is None:
+            return None
+
+        await self.journal.mark_saved(sequence)
+
+        return bytes_written
 
     #
     #   Implement Kernel Page Interface
     #
 
+    def set_kernel(self, kernel_id):
+        """Overrides the set_kernel of the IKernel interface, the new kernel
+        is told the width of the outputs"""
+
+        IKernel.set_kernel(self, kernel_id)
+
+        self.update_figure_size()
+
+    def on_output_width_changed(self, *_args):
+        """Tells the kernel the width of the outputs when the resize ends"""
+
+        if self.figure_size_timeout:
+            GLib.source_remove(self.figure_size_timeout)
+
+        self.figure_size_timeout = GLib.timeout_add(
+            FIGURE_SIZE_DELAY, self.update_figure_size)
+
+    def update_figure_size(self):
+        """Tells the kernel the width of the outputs"""
+
+        self.figure_size_timeout = 0
+
+        kernel = self.get_kernel()
+        width = self.cells_list_box.get_width()
+        if kernel and width > 0:
+            kernel.set_figure_size(
+                width - OUTPUT_MARGIN, self.get_scale_factor())
+
+        return GLib.SOURCE_REMOVE
+
     def on_kernel_status_changed(self, kernel, status):
         """Overrides the on_kernel_status_changed of the IKernel interface"""
 
@@ -508,17 +911,47 @@ class NotebookPage(
     def search_text(self):
         """Overrides the search_text of the ISearchable interface"""
 
-        for index in range(0, self.notebook_model.get_n_items()):
-            cell = self.cells_list_box.get_row_at_index(index).get_child()
-            cell.search_text()
+        self.search_match_index = -1
+        self.select_search_match(1)
 
     def set_search_text(self, text):
-        """Overrides the set_search_text of the ISearchable interface"""
+        """Overrides the set_search_text of the ISearchable interface
+
+        The matches in the whole notebook are found with the search index,
+        only the visible cells are highlighted
+        """
 
-        for index in range(0, self.notebook_model.get_n_items()):
-            cell = self.cells_list_box.get_row_at_index(index).get_child()
+        self.search_query = text
+        self.search_match_index = -1
+        if self.search_index:
+            self.search_matches = self.search_index.search(text)
+
+        for cell in self.output_budget.get_visible_cell_uis():
             cell.set_search_text(text)
 
+    def select_search_match(self, direction):
+        """Selects the next or previous search match
+
+        :param int direction: 1 for the next match, -1 for the previous
+        """
+
+        if not self.search_matches:
+            return
+
+        self.search_match_index = (
+            self.search_match_index + direction) % len(self.search_matches)
+        match = self.search_matches[self.search_match_index]
+
+        position = self.notebook_model.get_position(match.cell)
+        if position == -1:
+            return
+
+        self.set_selected_cell_index(position)
+
+        if match.location == MatchLocation.SOURCE:
+            row = self.cells_list_box.get_row_at_index(position)
+            row.get_child().select_source_range(match.offset, match.length)
+
     #
     #   Implement Disconnectable Interface
     #
@@ -538,11 +971,39 @@ class NotebookPage(
             self.previous_buffer.disconnect_by_func(
                 self.on_cursor_position_changed)
 
-        for index in range(0, self.notebook_model.get_n_items()):
-            cell = self.cells_list_box.get_row_at_index(index).get_child()
-            cell.disconnect_by_func(self.on_cell_request_delete)
-            cell.disconnect_by_func(self.on_cell_source_changed)
-            cell.disconnect()
+        if self.notebook_model:
+            self.notebook_model.disconnect_by_func(
+                self.on_model_items_changed)
+
+        for cell_ui in self.cell_uis.values():
+            self.dispose_cell_ui(cell_ui)
+        self.cell_uis = {}
+        self.pending_moves = {}
+
+        if self.outline:
+            self.outline.disconnect()
+
+        if self.journal:
+            self.journal.disconnect()
+
+        if self.serializer:
+            self.serializer.disconnect()
+
+        if self.output_store:
+            self.output_store.close()
+
+        if self.figure_size_timeout:
+            GLib.source_remove(self.figure_size_timeout)
+            self.figure_size_timeout = 0
+        self.scrolled_window.get_hadjustment().disconnect_by_func(
+            self.on_output_width_changed)
+        self.disconnect_by_func(self.on_output_width_changed)
+
+        self.output_budget.disconnect_by_func(self.on_cell_left_viewport)
+        self.output_budget.disconnect_by_func(self.on_cell_entered_viewport)
+        self.output_budget.disconnect()
+
+        self.output_widget_pool.clear()
 
         self.cells_list_box.bind_model(
             None,
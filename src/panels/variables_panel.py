@@ -17,7 +17,7 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import Gtk, Panel
+from gi.repository import Gtk, Panel, GLib
 
 
 @Gtk.Template(
@@ -45,6 +45,8 @@ class VariablesPanel(Panel.Widget):
         self.column_value.get_factory().connect(
             "bind", self.on_factory_bind, "value")
 
+        self.column_view.connect("activate", self.on_variable_activated)
+
     def set_model(self, variables):
         """Sets the variables model where all variables are stored"""
         selection = Gtk.NoSelection.new(model=variables)
@@ -72,8 +74,17 @@ class VariablesPanel(Panel.Widget):
 
         widget.set_label(value)
 
+    def on_variable_activated(self, column_view, position):
+        """Opens the activated variable as a table"""
+        variable = column_view.get_model().get_item(position)
+
+        self.activate_action(
+            "win.open-variable", GLib.Variant("s", variable.name))
+
     def disconnect(self, *_args):
         """Disconnect all signals"""
+        self.column_view.disconnect_by_func(self.on_variable_activated)
+
         for column in self.column_view.get_columns():
             factory = column.get_factory()
             factory.disconnect_by_func(self.on_factory_setup)
@@ -26,7 +26,7 @@ import asyncio
 
 from ..backend.jupyter_server import JupyterServer
 
-from ..utils.converters import get_mime_icon
+from ..utils.converters import get_mime_icon, get_file_mime
 
 
 class NodeWidget(Adw.Bin):
@@ -234,7 +234,7 @@ class WorkspacePanel(Panel.Widget):
         for obj in content:
             node_name = obj.get("name")
             node_path = obj.get("path")
-            node_mime = obj.get("mimetype")
+            node_mime = get_file_mime(node_path or "", obj.get("mimetype"))
             node_type = NodeType.FOLDER if obj.get("type") == "directory" else NodeType.FILE
             if node_name and node_path:
                 node = Node(node_path, node_mime, node_type)
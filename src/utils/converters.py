@@ -59,6 +59,16 @@ def get_mime_icon(mimetype):
     return mime_to_icon.get(mimetype.lower(), "paper-symbolic")
 
 
+def get_file_mime(file_path, mimetype):
+    """Gets the mime type of a file, notebooks are recognized by their
+    extension because the server doesn't send their mime type and the
+    compressed ones are detected as gzip archives"""
+
+    if file_path.lower().endswith((".ipynb", ".ipynb.gz")):
+        return "application/x-ipynb+json"
+    return mimetype
+
+
 def get_language_icon(lang):
     languages_to_icon = {
         "python": "text-x-python-symbolic",
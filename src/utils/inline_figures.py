@@ -0,0 +1,120 @@
+# inline_figures.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# The size of the plots drawn by the inline backend of python kernels. The
+#       kernel is told the width of the output column so that figures are
+#       rendered at the size they are displayed, not larger and scaled down.
+#       On HiDPI screens figures are sent in the retina format: twice the
+#       pixels, with their logical size in the output metadata
+
+# The pixels in an inch of the logical size
+LOGICAL_DPI = 96
+
+# Plots wider than this are scaled down when displayed
+MAX_FIGURE_WIDTH = 700
+MIN_FIGURE_WIDTH = 320
+
+# Height over width, the default of matplotlib
+ASPECT_RATIO = 0.75
+
+# Runs in the kernel. Figures not created yet get the new size, matplotlib
+#       is not imported if the user didn't import it
+CONFIGURE_SOURCE = '''
+def _planetnine_configure_figures(figsize, dpi, formats):
+    import sys
+
+    rc = {"figure.figsize": figsize, "figure.dpi": dpi}
+
+    config = get_ipython().config.InlineBackend
+    config.rc.update(rc)
+    config.figure_formats = set(formats)
+
+    if "matplotlib_inline.config" in sys.modules:
+        from matplotlib_inline.config import InlineBackend
+        if InlineBackend.initialized():
+            InlineBackend.instance().rc.update(rc)
+
+    if "matplotlib" in sys.modules:
+        import matplotlib
+        matplotlib.rcParams.update(rc)
+
+    if "matplotlib_inline.backend_inline" in sys.modules:
+        from matplotlib_inline.backend_inline import set_matplotlib_formats
+        set_matplotlib_formats(*formats)
+'''
+
+
+def get_figure_options(output_width, scale=1):
+    """Returns the inline backend options for an output column
+
+    :param int output_width: The width of the outputs in logical pixels
+    :param int scale: The scale factor of the screen
+    :returns: The figure size in inches, the DPI and the figure formats
+    :rtype: tuple
+    """
+
+    width = max(MIN_FIGURE_WIDTH, min(output_width, MAX_FIGURE_WIDTH))
+
+    figsize = (
+        round(width / LOGICAL_DPI, 2),
+        round(width * ASPECT_RATIO / LOGICAL_DPI, 2))
+    formats = ("retina",) if scale > 1 else ("png",)
+
+    return figsize, LOGICAL_DPI, formats
+
+
+def get_configure_code(output_width, scale=1):
+    """Returns the code that configures the inline backend of a kernel
+
+    :param int output_width: The width of the outputs in logical pixels
+    :param int scale: The scale factor of the screen
+    :returns: The code to run with a silent execute
+    :rtype: str
+    """
+
+    figsize, dpi, formats = get_figure_options(output_width, scale)
+
+    return (
+        f"{CONFIGURE_SOURCE}\n"
+        "try:\n"
+        f"    _planetnine_configure_figures({figsize!r}, {dpi!r},"
+        f" {formats!r})\n"
+        "finally:\n"
+        "    del _planetnine_configure_figures\n")
+
+
+def get_image_size(metadata, mime_type):
+    """Returns the logical size of an image output, set by the kernel for
+    retina images
+
+    :param dict metadata: The metadata of the output
+    :param str mime_type: The MIME type of the image
+    :returns: The width and height or None
+    :rtype: tuple
+    """
+
+    image_metadata = (metadata or {}).get(mime_type) or {}
+    width = image_metadata.get("width")
+    height = image_metadata.get("height")
+
+    if isinstance(width, (int, float)) and isinstance(height, (int, float)):
+        if width > 0 and height > 0:
+            return width, height
+
+    return None
@@ -0,0 +1,150 @@
+# journal_records.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# The records of the notebook edit journal. Every line of a journal is a
+#       JSON object with an "op" key:
+#
+#   snapshot        the notebook saved in the snapshot file, always first
+#   splice          cells removed and added at a position, the cells still
+#                       in the notebook are referenced by id
+#   source          a patch of the source of a cell
+#   output          an output added to a cell
+#   outputs         all the outputs of a cell replaced
+#   execution_count the execution count of a cell changed
+#   cell_type       the type of a cell changed
+
+from . import json_codec
+
+
+def get_source_patch(old, new):
+    """Returns the smallest single replacement that turns old into new
+
+    :param str old: The previous source
+    :param str new: The new source
+    :returns: (start, end, text), old[start:end] is replaced by text
+    :rtype: tuple
+    """
+
+    limit = min(len(old), len(new))
+
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+
+    end = 0
+    while (end < limit - start
+            and old[len(old) - 1 - end] == new[len(new) - 1 - end]):
+        end += 1
+
+    return start, len(old) - end, new[start:len(new) - end]
+
+
+def _join(value):
+    if isinstance(value, list):
+        return "".join(value)
+    return value
+
+
+def apply_records(notebook_node, records):
+    """Applies the journal records to a notebook node in place
+
+    Records referencing cells that don't exist are skipped.
+
+    :param dict notebook_node: The notebook node
+    :param list records: The records, without the snapshot
+    :returns: The number of records applied
+    :rtype: int
+    """
+
+    cells = notebook_node["cells"]
+    by_id = {cell.get("id"): cell for cell in cells}
+    applied = 0
+
+    for record in records:
+        op = record.get("op")
+
+        if op == "splice":
+            position = record["position"]
+            removed = cells[position:position + record["removed"]]
+            added = []
+            for cell in record["cells"]:
+                if "cell_type" not in cell:
+                    cell = by_id.get(cell["id"])
+                    if cell is None:
+                        break
+                added.append(cell)
+            else:
+                cells[position:position + len(removed)] = added
+                for cell in added:
+                    by_id[cell.get("id")] = cell
+                applied += 1
+            continue
+
+        cell = by_id.get(record.get("id"))
+        if cell is None:
+            continue
+
+        match op:
+            case "source":
+                source = _join(cell.get("source", ""))
+                cell["source"] = (
+                    source[:record["start"]]
+                    + record["text"]
+                    + source[record["end"]:])
+            case "output":
+                cell.setdefault("outputs", []).append(record["output"])
+            case "outputs":
+                cell["outputs"] = record["outputs"]
+            case "execution_count":
+                cell["execution_count"] = record["value"]
+            case "cell_type":
+                cell["cell_type"] = record["value"]
+                if record["value"] == "code":
+                    cell.setdefault("outputs", [])
+                    cell.setdefault("execution_count", None)
+                else:
+                    cell.pop("outputs", None)
+                    cell.pop("execution_count", None)
+            case _:
+                continue
+
+        applied += 1
+
+    return applied
+
+
+def read_records(text):
+    """Parses the lines of a journal, stopping at the first incomplete one
+
+    :param str text: The content of the journal
+    :returns: The list of records
+    :rtype: list
+    """
+
+    records = []
+    for line in text.splitlines():
+        if not line:
+            continue
+        try:
+            records.append(json_codec.loads(line))
+        except ValueError:
+            # The last line can be partial after a crash
+            break
+
+    return records
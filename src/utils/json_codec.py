@@ -0,0 +1,82 @@
+# json_codec.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# The JSON codec used on the hot paths: kernel messages, server responses,
+#       notebook cells and journal records. orjson is used when installed,
+#       otherwise the json module of the standard library. Objects orjson
+#       can't serialize (integers larger than 64 bits, ...) fall back to
+#       the standard library, while orjson reads such integers as floats.
+#
+# The notebook files are still written by notebook_json with the standard
+#       library, orjson can't produce the indentation of nbformat
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+if orjson:
+    # Datetimes go to the default function, like with the json module
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(obj, default=None):
+    """Serializes an object in compact UTF-8 JSON
+
+    :param obj: The object to serialize
+    :param callable default: Called with the objects that can't be
+        serialized, returns a serializable version
+    :returns: The JSON document
+    :rtype: bytes
+    """
+
+    if orjson:
+        try:
+            return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+        except TypeError:
+            pass
+
+    return json.dumps(
+        obj, default=default, ensure_ascii=False,
+        separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    """Parses a JSON document
+
+    :param data: The document, str, bytes, bytearray or memoryview
+    :returns: The parsed object
+    :raises ValueError: If the document is not valid JSON
+    """
+
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass
+
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if isinstance(data, (bytes, bytearray)):
+        data = bytes(data).decode("utf-8", "replace")
+    return json.loads(data)
@@ -0,0 +1,193 @@
+# markdown_highlighter.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+
+
+FENCE = "```"
+
+HEADING_RE = re.compile(r"^(#{1,6}) ")
+
+IN_LINE_PATTERNS = [
+    (re.compile(re.escape(tag) + ".*?" + re.escape(tag)), tag_name)
+    for tag, tag_name in [
+        ("**", "bold"),
+        ("***", "bold_italic"),
+        ("___", "bold_italic"),
+        ("*", "italic"),
+        ("_", "italic"),
+        ("`", "code"),
+    ]
+]
+
+LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+
+
+def tokenize_line(line, in_fence):
+    """Returns the tag spans of a line and if a fenced code block is open
+    at the end of the line
+
+    An end offset of len(line) + 1 means that the span includes the line
+    terminator.
+
+    :param str line: The text of the line without the line terminator
+    :param bool in_fence: If a fenced code block is open at the start
+    :returns: A list of (start, end, tag_name) and the fence state
+    :rtype: tuple
+    """
+
+    spans = []
+
+    heading = HEADING_RE.match(line)
+    if heading:
+        spans.append((0, len(line), f"h{len(heading.group(1))}"))
+
+    for pattern, tag_name in IN_LINE_PATTERNS:
+        for match in pattern.finditer(line):
+            spans.append((match.start(), match.end(), tag_name))
+
+    # Fenced code blocks can span multiple lines
+    position = 0
+    fence_start = 0
+    while True:
+        index = line.find(FENCE, position)
+        if index == -1:
+            break
+        if in_fence:
+            spans.append((fence_start, index + len(FENCE), "block_code"))
+        else:
+            fence_start = index
+        in_fence = not in_fence
+        position = index + len(FENCE)
+    if in_fence:
+        spans.append((fence_start, len(line) + 1, "block_code"))
+
+    for match in LINK_RE.finditer(line):
+        spans.append((match.start(1), match.end(1), "link"))
+
+    return spans, in_fence
+
+
+# Keeps the fence state at the start of each line so that only the lines
+#       that have been edited are tokenized again. The damage is extended
+#       to the following lines until the fence state converges.
+class MarkdownHighlighter:
+    def __init__(self):
+        # fence_states[n] is True if line n starts inside a fenced block
+        self.fence_states = [False]
+
+        self.damage_start = None
+        self.damage_end = None
+
+    def reset(self, n_lines):
+        """Forgets all the states and damages every line
+
+        :param int n_lines: The number of lines of the document
+        """
+
+        self.fence_states = [False] * max(n_lines, 1)
+        self.damage(0, n_lines - 1)
+
+    def damage(self, first_line, last_line):
+        """Marks a range of lines to be tokenized again
+
+        :param int first_line: The first line of the range
+        :param int last_line: The last line of the range (included)
+        """
+
+        if self.damage_start is None:
+            self.damage_start = first_line
+            self.damage_end = last_line
+        else:
+            self.damage_start = min(self.damage_start, first_line)
+            self.damage_end = max(self.damage_end, last_line)
+
+    def is_damaged(self):
+        """Returns True if some lines need to be tokenized again"""
+
+        return self.damage_start is not None
+
+    def lines_inserted(self, line, count):
+        """Updates the states after count lines have been added after line
+
+        :param int line: The line where the text was inserted
+        :param int count: The number of new lines
+        """
+
+        if count > 0:
+            state = self.fence_states[min(line, len(self.fence_states) - 1)]
+            self.fence_states[line + 1:line + 1] = [state] * count
+            if self.damage_start is not None and self.damage_end > line:
+                self.damage_end += count
+        self.damage(line, line + count)
+
+    def lines_deleted(self, line, count):
+        """Updates the states after count lines have been removed after line
+
+        :param int line: The line where the text was deleted
+        :param int count: The number of removed lines
+        """
+
+        if count > 0:
+            del self.fence_states[line + 1:line + 1 + count]
+            if self.damage_start is not None:
+                if self.damage_start > line:
+                    self.damage_start = max(line, self.damage_start - count)
+                if self.damage_end > line:
+                    self.damage_end = max(line, self.damage_end - count)
+        self.damage(line, line)
+
+    def highlight(self, get_line, n_lines):
+        """Tokenizes the damaged lines, continuing while the fence state
+        at the start of the next line changes
+
+        :param callable get_line: Returns the text of a line from its number
+        :param int n_lines: The number of lines of the document
+        :returns: The first and last tokenized lines and their spans
+        :rtype: tuple
+        """
+
+        if self.damage_start is None or n_lines == 0:
+            self.damage_start = self.damage_end = None
+            return None, None, []
+
+        if len(self.fence_states) < n_lines:
+            self.fence_states.extend(
+                [False] * (n_lines - len(self.fence_states)))
+        elif len(self.fence_states) > n_lines:
+            del self.fence_states[n_lines:]
+
+        first_line = min(self.damage_start, n_lines - 1)
+        last_line = min(self.damage_end, n_lines - 1)
+        self.damage_start = self.damage_end = None
+
+        lines_spans = []
+        in_fence = self.fence_states[first_line]
+        line = first_line
+        while line < n_lines:
+            self.fence_states[line] = in_fence
+            spans, in_fence = tokenize_line(get_line(line), in_fence)
+            lines_spans.append(spans)
+
+            line += 1
+            if line > last_line and (
+                    line >= n_lines or self.fence_states[line] == in_fence):
+                break
+
+        return first_line, line - 1, lines_spans
@@ -0,0 +1,131 @@
+# notebook_gzip.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Streaming gzip codec for compressed notebooks (.ipynb.gz). The data is
+#       compressed and decompressed one chunk at a time, so the whole
+#       uncompressed notebook is never in memory
+
+import base64
+import zlib
+
+from . import json_codec
+
+COMPRESSED_SUFFIX = ".ipynb.gz"
+
+COMPRESSION_LEVEL = 6
+
+# The largest piece of decompressed data returned at once
+OUTPUT_CHUNK_SIZE = 1024 * 1024
+
+# Tells zlib to read and write the gzip header and trailer
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def is_compressed_path(path):
+    """Returns True if the path is of a compressed notebook"""
+
+    return bool(path) and path.lower().endswith(COMPRESSED_SUFFIX)
+
+
+class GzipStreamDecoder:
+    """Decompresses a gzip stream fed in chunks of any size"""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(GZIP_WBITS)
+
+    def feed(self, data):
+        """Decompresses a chunk of the stream
+
+        :param bytes data: The next compressed bytes
+        :returns: An iterator of decompressed bytes, of at most
+            OUTPUT_CHUNK_SIZE each
+        """
+
+        while data:
+            chunk = self._decompressor.decompress(data, OUTPUT_CHUNK_SIZE)
+            if chunk:
+                yield chunk
+
+            if self._decompressor.eof:
+                # A file can contain more gzip members one after the other
+                data = self._decompressor.unused_data
+                if data:
+                    self._decompressor = zlib.decompressobj(GZIP_WBITS)
+            else:
+                data = self._decompressor.unconsumed_tail
+
+    def close(self):
+        """Checks that the stream is complete
+
+        :raises ValueError: If the stream is truncated
+        """
+
+        if not self._decompressor.eof:
+            raise ValueError("The compressed notebook is truncated")
+
+
+def iter_decompressed(chunks):
+    """Decompresses an iterable of gzip chunks
+
+    :param chunks: An iterable of bytes
+    :returns: An iterator of decompressed bytes
+    """
+
+    decoder = GzipStreamDecoder()
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    decoder.close()
+
+
+def iter_compressed(pieces, level=COMPRESSION_LEVEL):
+    """Compresses an iterable of pieces in the gzip format
+
+    :param pieces: An iterable of str or bytes
+    :param int level: The compression level, from 1 to 9
+    :returns: An iterator of compressed bytes
+    """
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for piece in pieces:
+        if isinstance(piece, str):
+            piece = piece.encode("utf-8")
+        chunk = compressor.compress(piece)
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def load_contents_model(model):
+    """Gets the notebook node from a Contents API model, compressed
+    notebooks are sent as base64 files
+
+    :param dict model: The model returned by the server
+    :returns: The notebook node
+    :rtype: dict
+    """
+
+    content = model.get("content")
+
+    if model.get("format") == "base64":
+        content = b"".join(iter_decompressed([base64.b64decode(content)]))
+
+    if isinstance(content, (str, bytes)):
+        return json_codec.loads(content)
+
+    return content
@@ -0,0 +1,239 @@
+# notebook_json.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Serializes notebooks one cell at a time producing the same text as
+#       nbformat.writes, so that the serialized cells can be cached and
+#       joined without serializing the whole notebook again
+
+import json
+import os
+import tempfile
+
+
+def _get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once, changing the umask is not thread safe
+UMASK = _get_umask()
+
+JSON_OPTIONS = {
+    "indent": 1,
+    "sort_keys": True,
+    "separators": (",", ": "),
+    "ensure_ascii": False,
+}
+
+# The cells are inside the "cells" list of the notebook object
+CELL_INDENT = "\n  "
+
+NON_TEXT_SPLIT_MIMES = {"application/javascript", "image/svg+xml"}
+
+TRANSIENT_NOTEBOOK_METADATA = [
+    "orig_nbformat", "orig_nbformat_minor", "signature"]
+TRANSIENT_CELL_METADATA = ["trusted"]
+
+
+def _split_mime_bundle(data):
+    """Returns a copy of a MIME bundle with the text split in lines"""
+
+    return {
+        key: value.splitlines(True)
+        if isinstance(value, str) and (
+            key.startswith("text/") or key in NON_TEXT_SPLIT_MIMES)
+        else value
+        for key, value in data.items()}
+
+
+def _strip_keys(dictionary, keys):
+    """Returns a copy of dictionary without keys, or dictionary itself"""
+
+    if not any(key in dictionary for key in keys):
+        return dictionary
+    return {
+        key: value for key, value in dictionary.items() if key not in keys}
+
+
+def split_cell_lines(cell_node):
+    """Returns a copy of a cell node prepared like nbformat does before
+    writing, the multiline strings are split in lines and the transient
+    metadata is removed. The cell node is not modified
+
+    :param dict cell_node: The cell node
+    :returns: The new cell node
+    :rtype: dict
+    """
+
+    cell = dict(cell_node)
+
+    if isinstance(cell.get("source"), str):
+        cell["source"] = cell["source"].splitlines(True)
+
+    if "metadata" in cell:
+        cell["metadata"] = _strip_keys(
+            cell["metadata"], TRANSIENT_CELL_METADATA)
+
+    if "attachments" in cell:
+        cell["attachments"] = {
+            name: _split_mime_bundle(attachment)
+            for name, attachment in cell["attachments"].items()}
+
+    if cell.get("cell_type") == "code":
+        outputs = []
+        for output_node in cell.get("outputs", []):
+            output = dict(output_node)
+            output_type = output.get("output_type")
+            if output_type in {"execute_result", "display_data"}:
+                output["data"] = _split_mime_bundle(output.get("data", {}))
+            elif (output_type == "stream"
+                    and isinstance(output.get("text"), str)):
+                output["text"] = output["text"].splitlines(True)
+            outputs.append(output)
+        cell["outputs"] = outputs
+
+    return cell
+
+
+def dumps_cell(cell_node):
+    """Serializes a cell as it appears inside a notebook file
+
+    :param dict cell_node: The cell node
+    :returns: The serialized cell
+    :rtype: str
+    """
+
+    text = json.dumps(split_cell_lines(cell_node), **JSON_OPTIONS)
+
+    # Newlines in strings are escaped, every newline is indentation
+    return text.replace("\n", CELL_INDENT)
+
+
+def iter_notebook(notebook_node, cell_fragments):
+    """Yields the pieces of a serialized notebook without joining them
+
+    :param dict notebook_node: The notebook node, the cells are ignored
+    :param list cell_fragments: The cells serialized with dumps_cell
+    :returns: An iterator of str
+    """
+
+    head_node = dict(notebook_node)
+    head_node["cells"] = []
+    head_node["metadata"] = _strip_keys(
+        head_node.get("metadata", {}), TRANSIENT_NOTEBOOK_METADATA)
+
+    head = json.dumps(head_node, **JSON_OPTIONS)
+
+    if not cell_fragments:
+        yield head
+        return
+
+    # "cells" is always the first key
+    empty_cells = '{\n "cells": []'
+
+    yield '{\n "cells": [' + CELL_INDENT
+    for index, fragment in enumerate(cell_fragments):
+        if index:
+            yield "," + CELL_INDENT
+        yield fragment
+    yield "\n ]" + head[len(empty_cells):]
+
+
+def get_encoded_size(pieces):
+    """Returns the size in bytes of text pieces encoded in UTF-8, only the
+    pieces that are not ASCII are encoded
+
+    :param pieces: An iterable of str
+    :rtype: int
+    """
+
+    return sum(
+        len(piece) if piece.isascii() else len(piece.encode("utf-8"))
+        for piece in pieces)
+
+
+def dumps_notebook(notebook_node, cell_fragments):
+    """Serializes a notebook from its already serialized cells
+
+    :param dict notebook_node: The notebook node, the cells are ignored
+    :param list cell_fragments: The cells serialized with dumps_cell
+    :returns: The serialized notebook
+    :rtype: str
+    """
+
+    return "".join(iter_notebook(notebook_node, cell_fragments))
+
+
+def write_file_atomic(file_path, content):
+    """Writes a file through a temporary file in the same directory that
+    replaces it only when completely written
+
+    :param str file_path: The path of the file
+    :param content: The content, str, bytes or an iterable of str or bytes
+        pieces written one after the other
+    :returns: The number of bytes written
+    :rtype: int
+    """
+
+    if isinstance(content, (str, bytes)):
+        content = [content]
+
+    directory = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=directory,
+        prefix="." + os.path.basename(file_path) + ".",
+        suffix=".tmp")
+
+    bytes_written = 0
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            for piece in content:
+                if isinstance(piece, str):
+                    piece = piece.encode("utf-8")
+                file.write(piece)
+                bytes_written += len(piece)
+            file.flush()
+            os.fsync(file.fileno())
+
+        try:
+            os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(temp_path, 0o666 & ~UMASK)
+
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Make the rename persistent
+    try:
+        directory_descriptor = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_descriptor)
+        finally:
+            os.close(directory_descriptor)
+    except OSError:
+        pass
+
+    return bytes_written
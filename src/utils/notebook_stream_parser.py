@@ -0,0 +1,210 @@
+# notebook_stream_parser.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re
+
+from . import json_codec
+
+
+STRUCTURE_RE = re.compile(rb'[{}\[\]":]')
+STRING_END_RE = re.compile(rb'["\\]')
+
+# Depth of the brackets of the notebook object, of the cells array, of
+#       a cell object and of the outputs array of a cell
+NOTEBOOK_DEPTH = 1
+CELLS_DEPTH = 2
+CELL_DEPTH = 3
+OUTPUTS_DEPTH = 4
+
+
+class NotebookStreamError(Exception):
+    pass
+
+
+# Parses a notebook file from chunks of bytes, returning each cell as soon
+#       as it has been read completely. The JSON is only scanned for its
+#       structure, every cell is decoded alone and its outputs are returned
+#       as the raw bytes of the outputs array, to be decoded when needed
+class NotebookStreamParser:
+    def __init__(self):
+        # The bytes not yet consumed, starting from the current cell
+        self.buffer = bytearray()
+        self.position = 0
+
+        self.depth = 0
+        self.in_string = False
+        self.string_start = 0
+
+        # The last string read in the notebook and in the cell objects,
+        #       when followed by ":" it's the key of the next value
+        self.last_string = None
+        self.key = None
+        self.cell_key = None
+
+        self.in_cells = False
+        self.cells_done = False
+        self.cell_start = None
+        self.outputs_start = None
+        self.outputs_end = None
+
+        # The notebook without the cells, decoded at the end
+        self.head = bytearray()
+
+    def feed(self, data):
+        """Parses a chunk of the file
+
+        :param bytes data: The next chunk of bytes
+        :returns: The list of (json_cell, raw_outputs) completed by the
+            chunk, raw_outputs are the bytes of the outputs array or None
+        :rtype: list
+        """
+
+        self.buffer += data
+        cells = []
+
+        buffer = self.buffer
+        position = self.position
+        length = len(buffer)
+
+        while position < length:
+            if self.in_string:
+                match = STRING_END_RE.search(buffer, position)
+                if match is None:
+                    position = length
+                    break
+                if match.group() == b'\\':
+                    if match.start() + 1 >= length:
+                        # The escaped character is in the next chunk
+                        position = match.start()
+                        break
+                    position = match.start() + 2
+                    continue
+                self.in_string = False
+                position = match.end()
+                if self.depth in (NOTEBOOK_DEPTH, CELL_DEPTH):
+                    self.last_string = bytes(
+                        buffer[self.string_start:position - 1])
+                continue
+
+            match = STRUCTURE_RE.search(buffer, position)
+            if match is None:
+                position = length
+                break
+
+            char = match.group()
+            position = match.end()
+
+            if char == b'"':
+                self.in_string = True
+                self.string_start = position
+
+            elif char == b':':
+                if self.depth == NOTEBOOK_DEPTH:
+                    self.key = self.last_string
+                elif self.depth == CELL_DEPTH and self.cell_start is not None:
+                    self.cell_key = self.last_string
+
+            elif char in b'{[':
+                self.depth += 1
+                if (self.depth == CELLS_DEPTH and self.key == b'cells'
+                        and char == b'[' and not self.cells_done):
+                    self.in_cells = True
+                    # Keep the notebook without the cells: "cells": []
+                    self.head += buffer[:position]
+                    self.head += b']'
+                    del buffer[:position]
+                    length = len(buffer)
+                    position = 0
+                elif self.depth == CELL_DEPTH and self.in_cells:
+                    self.cell_start = position - 1
+                    self.cell_key = None
+                    self.outputs_start = None
+                    self.outputs_end = None
+                elif (self.depth == OUTPUTS_DEPTH
+                        and self.cell_start is not None
+                        and self.cell_key == b'outputs'):
+                    self.outputs_start = position - 1
+
+            elif char in b'}]':
+                self.depth -= 1
+                if self.depth < 0:
+                    raise NotebookStreamError("Unbalanced brackets")
+
+                if (self.depth == CELL_DEPTH
+                        and self.outputs_start is not None
+                        and self.outputs_end is None):
+                    self.outputs_end = position
+
+                elif self.depth == CELLS_DEPTH and self.cell_start is not None:
+                    cells.append(self._decode_cell(
+                        bytes(buffer[self.cell_start:position])))
+                    self.cell_start = None
+
+                elif self.depth == NOTEBOOK_DEPTH and self.in_cells:
+                    self.in_cells = False
+                    self.cells_done = True
+                    # The closing bracket has already been added
+                    del buffer[:position]
+                    length = len(buffer)
+                    position = 0
+
+            # Drop the bytes of the cells already decoded
+            if (self.in_cells and self.cell_start is None
+                    and not self.in_string):
+                del buffer[:position]
+                length = len(buffer)
+                position = 0
+
+        self.position = position
+
+        return cells
+
+    def _decode_cell(self, cell_bytes):
+        raw_outputs = None
+
+        if self.outputs_start is not None:
+            start = self.outputs_start - self.cell_start
+            end = self.outputs_end - self.cell_start
+            raw_outputs = cell_bytes[start:end]
+            cell_bytes = cell_bytes[:start] + b'[]' + cell_bytes[end:]
+
+        try:
+            json_cell = json_codec.loads(cell_bytes)
+        except ValueError as e:
+            raise NotebookStreamError(f"Invalid cell: {e}") from e
+
+        return json_cell, raw_outputs
+
+    def close(self):
+        """Ends the parsing and returns the notebook without the cells
+
+        :returns: The notebook node with an empty cells list
+        :rtype: dict
+        """
+
+        if self.depth != 0 or self.in_string or self.in_cells:
+            raise NotebookStreamError("The notebook is incomplete")
+
+        self.head += self.buffer
+        self.buffer = bytearray()
+
+        try:
+            return json_codec.loads(self.head)
+        except ValueError as e:
+            raise NotebookStreamError(f"Invalid notebook: {e}") from e
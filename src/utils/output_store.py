@@ -0,0 +1,246 @@
+# output_store.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# The sidecar store of the large outputs of a notebook. When the outputs of
+#       a code cell are larger than a threshold they are saved in a SQLite
+#       database next to the notebook, the cell is written with no outputs
+#       and its metadata references them by hash:
+#
+#   "metadata": {"planetnine": {"outputs": "<sha256 of the outputs array>"}}
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+from . import json_codec
+
+SIDECAR_SUFFIX = ".outputs"
+
+METADATA_KEY = "planetnine"
+REFERENCE_KEY = "outputs"
+
+# Outputs arrays smaller than this stay in the notebook
+DEFAULT_THRESHOLD = 256 * 1024
+
+
+def get_sidecar_path(notebook_path):
+    """Returns the path of the output store of a notebook"""
+
+    return notebook_path + SIDECAR_SUFFIX
+
+
+def get_outputs_reference(cell_node):
+    """Returns the hash of the stored outputs of a cell node or None"""
+
+    metadata = cell_node.get("metadata") or {}
+    reference = (metadata.get(METADATA_KEY) or {}).get(REFERENCE_KEY)
+    if isinstance(reference, str):
+        return reference
+    return None
+
+
+def set_outputs_reference(cell_node, reference):
+    """Returns a copy of a cell node with its outputs replaced by a
+    reference, the cell node is not modified
+
+    :param dict cell_node: The cell node
+    :param str reference: The hash of the stored outputs
+    :returns: The new cell node
+    :rtype: dict
+    """
+
+    metadata = dict(cell_node.get("metadata") or {})
+    metadata[METADATA_KEY] = dict(
+        metadata.get(METADATA_KEY) or {}, **{REFERENCE_KEY: reference})
+
+    cell = dict(cell_node)
+    cell["metadata"] = metadata
+    cell["outputs"] = []
+    return cell
+
+
+def strip_outputs_reference(metadata):
+    """Returns a copy of the metadata of a cell without the reference"""
+
+    app_metadata = metadata.get(METADATA_KEY)
+    if not isinstance(app_metadata, dict) or REFERENCE_KEY not in app_metadata:
+        return dict(metadata)
+
+    metadata = dict(metadata)
+    app_metadata = {
+        key: value for key, value in app_metadata.items()
+        if key != REFERENCE_KEY}
+    if app_metadata:
+        metadata[METADATA_KEY] = app_metadata
+    else:
+        del metadata[METADATA_KEY]
+    return metadata
+
+
+class OutputStore:
+    """Content addressed blobs in a SQLite database, safe to use from a
+    worker thread. The database is created only when the first blob is
+    stored
+
+    :param str path: The path of the database
+    :param int threshold: The size in bytes of the outputs to store
+    """
+
+    def __init__(self, path, threshold=DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self, create=False):
+        if self._connection is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            self._connection = sqlite3.connect(
+                self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                "hash TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        return self._connection
+
+    def put(self, data):
+        """Stores a blob
+
+        :param bytes data: The content
+        :returns: The sha256 hash of the content
+        :rtype: str
+        """
+
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            connection = self._connect(create=True)
+            with connection:
+                connection.execute(
+                    "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+                    (digest, data))
+
+        return digest
+
+    def get(self, digest):
+        """Reads a blob
+
+        :param str digest: The hash of the content
+        :returns: The content or None if it's not stored
+        :rtype: bytes
+        """
+
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+
+        return bytes(row[0]) if row else None
+
+    def has(self, digest):
+        """Returns True if a blob is stored"""
+
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return False
+            row = connection.execute(
+                "SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone()
+
+        return row is not None
+
+    def prune(self, references):
+        """Removes the blobs that are not referenced
+
+        :param set references: The hashes to keep
+        :returns: The number of blobs removed
+        :rtype: int
+        """
+
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return 0
+            digests = [
+                digest for digest, in connection.execute(
+                    "SELECT hash FROM blobs")
+                if digest not in references]
+            with connection:
+                connection.executemany(
+                    "DELETE FROM blobs WHERE hash = ?",
+                    [(digest,) for digest in digests])
+
+        return len(digests)
+
+    def close(self):
+        """Closes the database, it's opened again when needed"""
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    #
+    #   CELL NODES
+    #
+
+    def externalize_cell(self, cell_node):
+        """Moves the outputs of a cell node to the store if they are larger
+        than the threshold, the cell node is not modified
+
+        :param dict cell_node: The cell node
+        :returns: The cell node to write in the notebook
+        :rtype: dict
+        """
+
+        outputs = cell_node.get("outputs")
+        if not outputs:
+            return cell_node
+
+        data = json_codec.dumps(outputs)
+        if len(data) < self.threshold:
+            return cell_node
+
+        return set_outputs_reference(cell_node, self.put(data))
+
+    def inline_cell(self, cell_node):
+        """Puts back the stored outputs of a cell node, the cell node is
+        not modified. References missing from the store are kept
+
+        :param dict cell_node: The cell node
+        :returns: The cell node with its outputs
+        :rtype: dict
+        """
+
+        reference = get_outputs_reference(cell_node)
+        if reference is None:
+            return cell_node
+
+        data = self.get(reference)
+        if data is None:
+            return cell_node
+
+        cell = dict(cell_node)
+        cell["metadata"] = strip_outputs_reference(cell_node["metadata"])
+        cell["outputs"] = json_codec.loads(data)
+        return cell
@@ -0,0 +1,131 @@
+# table_schema.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Tabular outputs in the Table Schema data resource format. Python kernels
+#       are asked to display pandas DataFrames and Series also as a data
+#       resource with only the first rows, the size of the whole table is
+#       sent in the metadata of the output:
+#
+#   "metadata": {"application/vnd.dataresource+json": {
+#       "rows": <number of rows>, "columns": <number of columns>}}
+
+from . import json_codec
+
+DATA_RESOURCE_MIME = "application/vnd.dataresource+json"
+
+# The rows and columns of a frame sent with the output
+PREVIEW_ROWS = 50
+PREVIEW_COLUMNS = 100
+
+# Runs in the kernel. The formatter is registered by type name, pandas is
+#       not imported until the user imports it
+FORMATTER_SOURCE = f'''
+def _planetnine_setup_tables():
+    import json
+    from IPython.core.formatters import BaseFormatter
+
+    class DataResourceFormatter(BaseFormatter):
+        format_type = "{DATA_RESOURCE_MIME}"
+        print_method = "_repr_data_resource_"
+        _return_type = (dict,)
+
+    def format_frame(obj):
+        try:
+            frame = obj.to_frame() if obj.ndim == 1 else obj
+            n_rows, n_columns = frame.shape
+            preview = frame.iloc[:{PREVIEW_ROWS}, :{PREVIEW_COLUMNS}]
+            resource = json.loads(
+                preview.to_json(orient="table", default_handler=str))
+        except Exception:
+            # MultiIndex columns, duplicated names, ... are left to HTML
+            return None
+        return resource, {{"rows": n_rows, "columns": n_columns}}
+
+    formatters = get_ipython().display_formatter.formatters
+    if "{DATA_RESOURCE_MIME}" not in formatters:
+        formatters["{DATA_RESOURCE_MIME}"] = DataResourceFormatter(
+            parent=get_ipython().display_formatter)
+
+    formatter = formatters["{DATA_RESOURCE_MIME}"]
+    formatter.enabled = True
+    formatter.for_type_by_name("pandas.core.frame", "DataFrame", format_frame)
+    formatter.for_type_by_name("pandas.core.series", "Series", format_frame)
+
+
+_planetnine_setup_tables()
+del _planetnine_setup_tables
+'''
+
+
+def format_value(value):
+    """Returns the text of a cell, missing values are empty"""
+
+    if value is None:
+        return ""
+    return str(value)
+
+
+def parse_data_resource(resource):
+    """Reads the rows of a data resource
+
+    :param resource: The data resource, as a dict or a JSON string
+    :returns: The column names, the label of each row and the cells of each
+        row as text
+    :rtype: tuple
+    """
+
+    if isinstance(resource, (str, bytes)):
+        resource = json_codec.loads(resource)
+
+    schema = resource.get("schema") or {}
+    primary_key = schema.get("primaryKey") or []
+    if isinstance(primary_key, str):
+        primary_key = [primary_key]
+
+    names = [field["name"] for field in schema.get("fields", [])]
+    if not names and resource.get("data"):
+        names = list(resource["data"][0])
+
+    column_names = [name for name in names if name not in primary_key]
+
+    labels = []
+    rows = []
+    for number, record in enumerate(resource.get("data", [])):
+        if primary_key:
+            labels.append(" ".join(
+                format_value(record.get(key)) for key in primary_key))
+        else:
+            labels.append(str(number))
+        rows.append([format_value(record.get(name)) for name in column_names])
+
+    return [str(name) for name in column_names], labels, rows
+
+
+def get_table_size(metadata, n_rows):
+    """Returns the size of the whole table of an output
+
+    :param dict metadata: The metadata of the output
+    :param int n_rows: The number of rows in the output, used when the size
+        is not in the metadata
+    :returns: The number of rows and columns, columns is None if unknown
+    :rtype: tuple
+    """
+
+    size = (metadata or {}).get(DATA_RESOURCE_MIME) or {}
+    return size.get("rows", n_rows), size.get("columns")
@@ -18,6 +18,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import os
+import json
+
+from gettext import gettext as _
 
 
 def get_next_filepath(folder_path, base_name, extension):
@@ -58,3 +61,100 @@ def number_to_column(n):
         result = chr(65 + remainder) + result
         n //= 26
     return result
+
+
+def summarize_json(json_string, max_keys=5):
+    try:
+        json_obj = json.loads(format_json(json_string))
+    except Exception as e:
+        print(e)
+        return _("Invalid JSON")
+
+    if isinstance(json_obj, dict):
+        keys = [str(key) for key in list(json_obj)[:max_keys]]
+        if len(json_obj) > max_keys:
+            keys.append("…")
+        return _("Object with {} keys: {}").format(
+            len(json_obj), ", ".join(keys))
+    elif isinstance(json_obj, list):
+        return _("Array with {} items").format(len(json_obj))
+    else:
+        return str(json_obj)
+
+
+def _geo_json_coordinates(geometry):
+    if geometry.get("type") == "GeometryCollection":
+        for child in geometry.get("geometries", []):
+            yield from _geo_json_coordinates(child)
+        return
+
+    stack = [geometry.get("coordinates", [])]
+    while stack:
+        item = stack.pop()
+        if not item:
+            continue
+        if isinstance(item[0], (int, float)):
+            yield item[0], item[1]
+        else:
+            stack.extend(item)
+
+
+def get_geo_json_bbox(geo_json):
+    if geo_json.get("type") == "FeatureCollection":
+        features = geo_json.get("features", [])
+    else:
+        features = [geo_json]
+
+    min_lon = min_lat = float("inf")
+    max_lon = max_lat = float("-inf")
+
+    for feature in features:
+        geometry = feature.get("geometry", feature) or {}
+        for longitude, latitude in _geo_json_coordinates(geometry):
+            min_lon = min(min_lon, longitude)
+            min_lat = min(min_lat, latitude)
+            max_lon = max(max_lon, longitude)
+            max_lat = max(max_lat, latitude)
+
+    if min_lon == float("inf"):
+        return len(features), None
+
+    return len(features), (min_lon, min_lat, max_lon, max_lat)
+
+
+def summarize_geo_json(json_string):
+    try:
+        geo_json = json.loads(format_json(json_string))
+    except Exception as e:
+        print(e)
+        return _("Invalid GeoJSON")
+
+    n_features, bbox = get_geo_json_bbox(geo_json)
+
+    summary = _("Map with {} features").format(n_features)
+    if bbox:
+        summary += " ({:.4g}, {:.4g}) – ({:.4g}, {:.4g})".format(*bbox)
+
+    return summary
+
+
+def split_in_chunks(pieces, chunk_size):
+    """Regroups pieces of str or bytes in chunks of chunk_size bytes, the
+    last one can be shorter. Only one chunk is kept in memory
+
+    :param pieces: An iterable of str or bytes
+    :param int chunk_size: The size of the chunks
+    :returns: An iterator of bytes
+    """
+
+    buffer = bytearray()
+    for piece in pieces:
+        if isinstance(piece, str):
+            piece = piece.encode("utf-8")
+        buffer += piece
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+
+    if buffer:
+        yield bytes(buffer)
@@ -0,0 +1,141 @@
+# variable_pager.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+# Reads a window of the rows and columns of a variable living in a python
+#       kernel. A helper function is defined in the kernel with a silent
+#       execute and called through the user expressions of the request, the
+#       reply carries only the requested window as a compact JSON string.
+#
+# Works with pandas DataFrames and Series, numpy arrays and lists of rows
+
+import ast
+
+from . import json_codec
+
+HELPER_NAME = "_planetnine_table"
+
+# The longest text sent for a single cell
+MAX_CELL_LENGTH = 200
+
+# Runs in the kernel. It's defined again with every request, so it survives
+#       kernel restarts, the leading underscore keeps it out of %whos
+HELPER_SOURCE = f'''
+def {HELPER_NAME}(obj, row_start, row_end, column_start, column_end):
+    import json
+
+    def text(value):
+        value = str(value)
+        if len(value) > {MAX_CELL_LENGTH}:
+            value = value[:{MAX_CELL_LENGTH - 1}] + "\\u2026"
+        return value
+
+    if hasattr(obj, "to_frame") and not hasattr(obj, "columns"):
+        obj = obj.to_frame()
+
+    if hasattr(obj, "iloc"):
+        n_rows, n_columns = obj.shape
+        columns = obj.columns[column_start:column_end]
+        window = obj.iloc[row_start:row_end, column_start:column_end]
+        index = window.index
+        rows = window.values.tolist()
+    else:
+        if hasattr(obj, "ndim"):
+            if obj.ndim == 1:
+                obj = obj.reshape(-1, 1)
+            elif obj.ndim != 2:
+                raise TypeError(f"Can't show a {{obj.ndim}}-d array")
+            n_rows, n_columns = obj.shape
+            rows = obj[row_start:row_end, column_start:column_end].tolist()
+        else:
+            obj = [
+                row if isinstance(row, (list, tuple)) else [row]
+                for row in obj]
+            n_rows = len(obj)
+            n_columns = max(map(len, obj), default=0)
+            rows = [
+                list(row[column_start:column_end])
+                for row in obj[row_start:row_end]]
+        columns = range(n_columns)[column_start:column_end]
+        index = range(n_rows)[row_start:row_end]
+
+    return json.dumps({{
+        "rows": n_rows,
+        "columns": n_columns,
+        "column_names": [text(name) for name in columns],
+        "index": [text(label) for label in index],
+        "data": [[text(value) for value in row] for row in rows],
+    }}, separators=(",", ":"))
+'''
+
+
+def parse_result(result):
+    """Gets the window from the result of a user expression
+
+    :param dict result: The user expression result from the execute reply
+    :returns: The window, with the keys rows, columns, column_names, index
+        and data
+    :rtype: dict
+    :raises RuntimeError: If the expression failed in the kernel
+    """
+
+    if result.get("status") != "ok":
+        raise RuntimeError(
+            f"{result.get('ename', 'Error')}: {result.get('evalue', '')}")
+
+    # The JSON string comes back as its python repr
+    return json_codec.loads(ast.literal_eval(result["data"]["text/plain"]))
+
+
+class VariablePager:
+    """Fetches windows of a variable from a kernel
+
+    :param kernel: The JupyterKernel where the variable lives
+    :param str name: The name of the variable
+    """
+
+    def __init__(self, kernel, name):
+        if not name.isidentifier():
+            raise ValueError(f"{name} is not a variable name")
+
+        self.kernel = kernel
+        self.name = name
+
+    def get_expression(self, row_start, row_end, column_start, column_end):
+        """Returns the expression that reads a window"""
+
+        return (
+            f"{HELPER_NAME}({self.name}, {int(row_start)}, {int(row_end)},"
+            f" {int(column_start)}, {int(column_end)})")
+
+    async def get_window(self, row_start, row_end, column_start, column_end):
+        """Reads the cells in a window of rows and columns
+
+        :param int row_start: The first row
+        :param int row_end: The row after the last one
+        :param int column_start: The first column
+        :param int column_end: The column after the last one
+        :returns: The window, see parse_result
+        :rtype: dict
+        """
+
+        expression = self.get_expression(
+            row_start, row_end, column_start, column_end)
+        results = await self.kernel.evaluate(
+            {"window": expression}, HELPER_SOURCE)
+        return parse_result(results["window"])
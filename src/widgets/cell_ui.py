@@ -26,7 +26,7 @@ from gi.repository import Gdk
 import os
 
 from ..models.cell import Cell, CellType
-from ..others.output_loader import OutputLoader
+from ..others.output_loader import OutputLoader, EvictedOutputs
 from ..interfaces.searchable import ISearchable
 from ..interfaces.cursor import ICursor
 from ..interfaces.style_update import IStyleUpdate
@@ -42,6 +42,9 @@ class CellUI(
 
     __gsignals__ = {
         'request-delete': (GObject.SignalFlags.RUN_FIRST, None, ()),
+        'request-copy': (GObject.SignalFlags.RUN_FIRST, None, ()),
+        'request-cut': (GObject.SignalFlags.RUN_FIRST, None, ()),
+        'request-paste': (GObject.SignalFlags.RUN_FIRST, None, ()),
     }
 
     source_view = Gtk.Template.Child()
@@ -60,12 +63,14 @@ class CellUI(
 
     _cell_type = CellType.CODE
 
+    outputs_evicted = False
+
     cache_dir = os.environ["XDG_CACHE_HOME"]
 
     images_path = os.path.join(cache_dir, "g_images")
     html_path = os.path.join(cache_dir, "g_html")
 
-    def __init__(self, cell, **kwargs):
+    def __init__(self, cell, widget_pool=None, **kwargs):
         super().__init__(**kwargs)
         ISearchable.__init__(self)
         IStyleUpdate.__init__(self)
@@ -82,7 +87,7 @@ class CellUI(
 
         self.set_language("python3")
 
-        self.output_loader = OutputLoader(self.output_box)
+        self.output_loader = OutputLoader(self.output_box, widget_pool)
 
         # ENABLE SPELL CHECK
 
@@ -101,16 +106,25 @@ class CellUI(
 
         self.cell_type = self.cell.cell_type
         self.set_content(self.cell.source)
-        for output in self.cell.outputs:
-            try:
-                self.add_output(output)
-            except Exception as e:
-                print(e)
+        if self.cell.has_unloaded_outputs():
+            # Decoded when the cell gets near the viewport
+            self.output_scrolled_window.set_visible(True)
+            self.output_box.append(EvictedOutputs(0))
+            self.outputs_evicted = True
+        else:
+            for output in self.cell.outputs:
+                try:
+                    self.add_output(output)
+                except Exception as e:
+                    print(e)
         self.set_execution_count(self.cell.execution_count)
 
         self.action_group = Gio.SimpleActionGroup()
 
         self.create_action('delete', self.delete_cell)
+        self.create_action('copy', self.on_copy_cell)
+        self.create_action('cut', self.on_cut_cell)
+        self.create_action('paste', self.on_paste_cell)
         self.create_action('change_type', self.on_change_type)
         self.create_action(
             'toggle_output_expand', self.on_toggle_output_expand)
@@ -136,11 +150,12 @@ class CellUI(
         self.buffer.connect("changed", self.on_source_changed)
         self.drag_source.connect("prepare", self.on_drag_source_prepare)
         self.drag_source.connect("drag-begin", self.on_drag_source_begin)
-        self.drag_source.connect("drag-end", self.delete_cell)
+        self.drag_source.connect("drag-end", self.on_drag_source_end)
         self.click_gesture.connect("released", self.on_click_released)
         self.markdown_text_view.connect("changed", self.on_source_changed)
 
-        self.bindings.append(self.bind_property("source", self.cell, "source"))
+        self.cell.set_source_provider(self.get_content)
+
         self.bindings.append(
             self.bind_property("cell_type", self.cell, "cell_type"))
 
@@ -203,6 +218,22 @@ class CellUI(
             end = self.buffer.get_end_iter()
             return self.buffer.get_text(start, end, True)
 
+    def select_source_range(self, offset, length):
+        """Selects a range of the source, used to show search matches
+
+        :param int offset: The offset of the first character
+        :param int length: The number of characters to select
+        """
+
+        if self.cell.cell_type == CellType.TEXT:
+            buffer = self.text_buffer
+        else:
+            buffer = self.buffer
+
+        start_iter = buffer.get_iter_at_offset(offset)
+        end_iter = buffer.get_iter_at_offset(offset + length)
+        buffer.select_range(start_iter, end_iter)
+
     def set_execution_count(self, value):
         self.count_label.set_label(str(value or 0))
 
@@ -213,19 +244,63 @@ class CellUI(
             self.count_stack.set_visible_child_name("number")
 
     def add_output(self, output):
+        self.restore_outputs()
         self.output_scrolled_window.set_visible(True)
         self.output_loader.add_output(output)
 
     def update_output(self, output):
+        self.restore_outputs()
         self.output_loader.update_output(output)
 
     def reset_output(self):
         self.output_scrolled_window.set_visible(False)
 
-        child = self.output_box.get_first_child()
-        while child:
-            self.output_box.remove(child)
-            child = self.output_box.get_first_child()
+        self.output_loader.clear()
+        self.outputs_evicted = False
+
+    #
+    #   OUTPUT EVICTION
+    #
+
+    def get_output_size(self):
+        """Returns the estimated memory used by the output widgets"""
+
+        return self.output_loader.get_estimated_size()
+
+    def release_outputs(self):
+        """Releases the interactive output widgets that have been activated"""
+
+        self.output_loader.release_outputs()
+
+    def evict_outputs(self):
+        """Replaces the output widgets with a placeholder of the same
+        height, the outputs are still stored in the cell"""
+
+        if self.outputs_evicted:
+            return
+
+        height = self.output_box.get_height()
+
+        self.output_loader.clear()
+        self.output_box.append(EvictedOutputs(height))
+        self.outputs_evicted = True
+
+    def restore_outputs(self):
+        """Rebuilds the output widgets from the outputs of the cell"""
+
+        if not self.outputs_evicted:
+            return
+
+        self.outputs_evicted = False
+        self.output_loader.clear()
+
+        for output in self.cell.outputs:
+            try:
+                self.output_loader.add_output(output)
+            except Exception as e:
+                print(e)
+
+        self.output_scrolled_window.set_visible(len(self.cell.outputs) > 0)
 
     def on_click_released(self, gesture, n_press, click_x, click_y):
         if n_press != 1:
@@ -266,12 +341,12 @@ class CellUI(
         return action
 
     def on_source_changed(self, buffer, *_args):
-        self.notify("source")
+        self.cell.mark_source_dirty()
 
     def on_drag_source_prepare(self, source, x, y):
         value = GObject.Value()
         value.init(Cell)
-        value.set_object(self.cell.copy())
+        value.set_object(self.cell)
 
         return Gdk.ContentProvider.new_for_value(value)
 
@@ -288,10 +363,27 @@ class CellUI(
 
         drag.set_hotspot(0, 0)
 
+    def on_drag_source_end(self, source, drag, delete_data):
+        # The page receiving the cell either moved it or copied it
+        if delete_data:
+            self.emit("request-delete")
+
     def delete_cell(self, *_args):
         self.popover.popdown()
         self.emit("request-delete")
 
+    def on_copy_cell(self, *_args):
+        self.popover.popdown()
+        self.emit("request-copy")
+
+    def on_cut_cell(self, *_args):
+        self.popover.popdown()
+        self.emit("request-cut")
+
+    def on_paste_cell(self, *_args):
+        self.popover.popdown()
+        self.emit("request-paste")
+
     def on_reset_output(self, cell):
         self.reset_output()
 
@@ -320,18 +412,15 @@ class CellUI(
         self.buffer.disconnect_by_func(self.on_source_changed)
         self.drag_source.disconnect_by_func(self.on_drag_source_prepare)
         self.drag_source.disconnect_by_func(self.on_drag_source_begin)
-        self.drag_source.disconnect_by_func(self.delete_cell)
+        self.drag_source.disconnect_by_func(self.on_drag_source_end)
         self.click_gesture.disconnect_by_func(self.on_click_released)
         self.markdown_text_view.disconnect_by_func(self.on_source_changed)
 
         self.markdown_text_view.disconnect()
 
-        child = self.output_box.get_first_child()
-        while child:
-            if isinstance(child, IDisconnectable):
-                child.disconnect()
-            self.output_box.remove(child)
-            child = child.get_next_sibling()
+        self.cell.release_source_provider(self.get_content)
+
+        self.output_loader.clear()
 
         for provider in self.providers:
             provider.unregister(self.buffer)
@@ -17,15 +17,16 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import Gtk, Pango, GObject
-from ..interfaces.style_update import IStyleUpdate
+from gi.repository import Gtk, GObject, GLib
 from ..interfaces.disconnectable import IDisconnectable
+from ..others.tag_tables import TagTables
+from ..utils.markdown_highlighter import MarkdownHighlighter
 
 import sys
 import re
 
 
-class MarkdownTextView(Gtk.TextView, IStyleUpdate, IDisconnectable):
+class MarkdownTextView(Gtk.TextView, IDisconnectable):
     __gtype_name__ = 'MarkdownTextView'
 
     __gsignals__ = {
@@ -36,7 +37,10 @@ class MarkdownTextView(Gtk.TextView, IStyleUpdate, IDisconnectable):
         super().__init__()
         IDisconnectable.__init__(self)
 
-        self.buffer = self.get_buffer()
+        # The tags are shared and recolored by TagTables
+        self.buffer = Gtk.TextBuffer(
+            tag_table=TagTables().get_markdown_table())
+        self.set_buffer(self.buffer)
 
         self.set_css_name("markdownview")
 
@@ -45,173 +49,91 @@ class MarkdownTextView(Gtk.TextView, IStyleUpdate, IDisconnectable):
 
         self.set_size_request(-1, 18)
 
-        self.foreground_accent_tags = []
-
-        for scale in range(1, 7):
-            self.foreground_accent_tags.append(
-                self.buffer.create_tag(
-                    f"h{scale}",
-                    weight=Pango.Weight.BOLD,
-                    scale=2.0-(scale-1)/5)
-            )
-
-        self.buffer.create_tag(
-            "bold", weight=Pango.Weight.BOLD)
-        self.buffer.create_tag(
-            "italic", style=Pango.Style.ITALIC)
-        self.buffer.create_tag(
-            "bold_italic", weight=Pango.Weight.BOLD, style=Pango.Style.ITALIC)
-
-        self.link_tag = self.buffer.create_tag(
-            "link", underline=Pango.Underline.SINGLE)
-        self.quote_tag = self.buffer.create_tag(
-            "quote", style=Pango.Style.ITALIC,
-            left_margin=20)
-        self.code_tag = self.buffer.create_tag(
-            "code", style=Pango.Style.OBLIQUE)
-        self.block_code_tag = self.buffer.create_tag(
-            "block_code", family="Monospace")
-
-        self.full_line_tags = [
-            ("# ", "h1"),
-            ("## ", "h2"),
-            ("### ", "h3"),
-            ("#### ", "h4"),
-            ("##### ", "h5"),
-            ("###### ", "h6"),
-        ]
-
-        self.in_line_tags = [
-            ("**", "bold"),
-            ("***", "bold_italic"),
-            ("___", "bold_italic"),
-            ("*", "italic"),
-            ("_", "italic"),
-            ("`", "code"),
-        ]
+        self.highlighter = MarkdownHighlighter()
+        self.highlight_source_id = 0
+
+        tag_table = self.buffer.get_tag_table()
+        self.tags = {}
+        for tag_name in [
+                "h1", "h2", "h3", "h4", "h5", "h6", "bold", "italic",
+                "bold_italic", "link", "quote", "code", "block_code"]:
+            self.tags[tag_name] = tag_table.lookup(tag_name)
 
         self.buffer.connect("changed", self.on_text_changed)
         self.buffer.connect_after("insert-text", self.on_text_inserted)
         self.buffer.connect("delete-range", self.on_text_deleted)
 
-        IStyleUpdate.__init__(self)
-
     def set_text(self, text):
         self.buffer.set_text(text)
         self.update_all()
 
     def update_all(self):
-        start_iter = self.buffer.get_start_iter()
-        end_iter = self.buffer.get_end_iter()
+        """Highlights again the whole buffer"""
 
-        text = self.buffer.get_text(start_iter, end_iter, True)
+        self.highlighter.reset(self.buffer.get_line_count())
+        self.highlight_damaged()
 
-        # Remove all tags first
-        self.buffer.remove_all_tags(start_iter, end_iter)
+    def queue_highlight(self):
+        """Schedules highlighting the edited lines when idle"""
 
-        # Apply full line tags
-        for line_start, line_tag in self.full_line_tags:
-            pattern = re.compile(
-                f'^({re.escape(line_start)}.*)$', re.MULTILINE)
-            for match in pattern.finditer(text):
-                start_pos = match.start(1)
-                end_pos = match.end(1)
-                iter_start = self.buffer.get_iter_at_offset(start_pos)
-                iter_end = self.buffer.get_iter_at_offset(end_pos)
-                self.buffer.apply_tag_by_name(line_tag, iter_start, iter_end)
-
-        # Apply in-line tags
-        for inline_tag, tag_name in self.in_line_tags:
-            pattern = re.compile(
-                f'({re.escape(inline_tag)}.*?{re.escape(inline_tag)})')
-            for match in pattern.finditer(text):
-                start_pos = match.start(1)
-                end_pos = match.end(1)
-                iter_start = self.buffer.get_iter_at_offset(start_pos)
-                iter_end = self.buffer.get_iter_at_offset(end_pos)
-                self.buffer.apply_tag_by_name(tag_name, iter_start, iter_end)
-
-        # Apply multi-line code block tags
-        block_code_pattern = re.compile(r'(```.*?```)', re.DOTALL)
-        for match in block_code_pattern.finditer(text):
-            start_pos = match.start(1)
-            end_pos = match.end(1)
-            iter_start = self.buffer.get_iter_at_offset(start_pos)
-            iter_end = self.buffer.get_iter_at_offset(end_pos)
-            self.buffer.apply_tag_by_name("block_code", iter_start, iter_end)
-
-        # Apply link tags
-        link_pattern = re.compile(r'\[(.*?)\]\((.*?)\)')
-        for match in link_pattern.finditer(text):
-            link_text_start = match.start(1)
-            link_text_end = match.end(1)
-            iter_start = self.buffer.get_iter_at_offset(link_text_start)
-            iter_end = self.buffer.get_iter_at_offset(link_text_end)
-            self.buffer.apply_tag_by_name("link", iter_start, iter_end)
+        if self.highlight_source_id == 0:
+            self.highlight_source_id = GLib.idle_add(self.on_highlight_idle)
 
-    def on_text_changed(self, buffer):
-        self.emit("changed", buffer)
+    def on_highlight_idle(self):
+        self.highlight_source_id = 0
+        self.highlight_damaged()
+        return False
 
-        self.update_all()
-        return
+    def highlight_damaged(self):
+        """Tokenizes the edited lines and applies the tags in one pass"""
 
-        cursor_iter = buffer.get_iter_at_mark(buffer.get_insert())
-        line_start_iter = cursor_iter.copy()
-        line_start_iter.set_line_offset(0)
-        line_end_iter = cursor_iter.copy()
-        line_end_iter.forward_to_line_end()
+        first_line, last_line, lines_spans = self.highlighter.highlight(
+            self.get_line_text, self.buffer.get_line_count())
 
-        line_text = buffer.get_text(line_start_iter, line_end_iter, False)
+        if first_line is None:
+            return
 
-        for tag, tag_name in self.full_line_tags:
-            if line_text.startswith(tag):
-                buffer.apply_tag_by_name(
-                    tag_name, line_start_iter, line_end_iter)
-            else:
-                buffer.remove_tag_by_name(
-                    tag_name, line_start_iter, line_end_iter)
-
-        start_iter = cursor_iter.copy()
-        start_iter.backward_chars(2)
+        _, start_iter = self.buffer.get_iter_at_line(first_line)
+        end_iter = start_iter.copy()
+        end_iter.forward_lines(last_line - first_line + 1)
 
-        text = buffer.get_text(start_iter, cursor_iter, False)
+        self.buffer.remove_all_tags(start_iter, end_iter)
 
-        for tag, tag_name in self.in_line_tags:
-            if text.endswith(tag):
-                start_search_iter = cursor_iter.copy()
-                start_search_iter.backward_chars(len(tag))
+        line_iter = start_iter
+        for spans in lines_spans:
+            for span_start, span_end, tag_name in spans:
+                iter_start = line_iter.copy()
+                iter_start.forward_chars(span_start)
+                iter_end = line_iter.copy()
+                iter_end.forward_chars(span_end)
+                self.buffer.apply_tag(
+                    self.tags[tag_name], iter_start, iter_end)
+            line_iter.forward_line()
+
+    def get_line_text(self, line):
+        """Returns the text of a line without the line terminator"""
+
+        _, start_iter = self.buffer.get_iter_at_line(line)
+        end_iter = start_iter.copy()
+        if not end_iter.ends_line():
+            end_iter.forward_to_line_end()
+        return self.buffer.get_text(start_iter, end_iter, True)
 
-                start_iter.backward_chars(200)
+    def on_text_changed(self, buffer):
+        self.emit("changed", buffer)
 
-                if start_search_iter.backward_search(
-                        tag, Gtk.TextSearchFlags.TEXT_ONLY):
-                    match_start, match_end = start_search_iter.backward_search(
-                        tag, Gtk.TextSearchFlags.TEXT_ONLY)
-                    if (len(buffer.get_text(match_start, cursor_iter, False))
-                            != 2 * len(tag)):
-                        buffer.apply_tag_by_name(
-                            tag_name, match_start, cursor_iter)
-                        break
+        self.queue_highlight()
 
     def on_text_deleted(self, buffer, start, end):
-        self.update_all()
-        return
-
-        deleted_text = buffer.get_text(start, end, False)
-
-        for tag, tag_name in self.in_line_tags:
-            if deleted_text in tag or tag in deleted_text:
-                cursor_iter = start.copy()
-                if cursor_iter.backward_search(
-                        tag, Gtk.TextSearchFlags.TEXT_ONLY, None):
-                    match_start, match_end = cursor_iter.backward_search(
-                        tag, Gtk.TextSearchFlags.TEXT_ONLY)
-
-                    # Remove the corresponding text tag
-                    buffer.remove_tag_by_name(tag_name, match_end, start)
-                    break
+        start_line = start.get_line()
+        self.highlighter.lines_deleted(
+            start_line, end.get_line() - start_line)
 
     def on_text_inserted(self, buffer, loc, text, length):
+        n_new_lines = text.count('\n')
+        self.highlighter.lines_inserted(
+            loc.get_line() - n_new_lines, n_new_lines)
+
         if text == '\n':
             start_iter = loc.copy()
             start_iter.backward_char()
@@ -258,26 +180,12 @@ class MarkdownTextView(Gtk.TextView, IStyleUpdate, IDisconnectable):
                     else:
                         buffer.insert(loc, new_order_bullet, -1)
 
-    def update_style_scheme(self, *_args):
-        """Updates the accent color"""
-
-        accent_color = self.style_manager.get_accent_color()
-        if self.style_manager.get_dark():
-            bg_color = "#3F3F3F"
-        else:
-            bg_color = "#E0E0E0"
-
-        self.link_tag.set_property("foreground", accent_color)
-        self.quote_tag.set_property("background", bg_color)
-        self.code_tag.set_property("background", bg_color)
-        self.block_code_tag.set_property("background", bg_color)
-
-        for foreground_tag in self.foreground_accent_tags:
-            foreground_tag.set_property("foreground", accent_color)
-
     def disconnect(self, *_args):
         IDisconnectable.disconnect(self)
-        IStyleUpdate.disconnect(self)
+
+        if self.highlight_source_id != 0:
+            GLib.source_remove(self.highlight_source_id)
+            self.highlight_source_id = 0
 
         self.buffer.disconnect_by_func(self.on_text_changed)
         self.buffer.disconnect_by_func(self.on_text_inserted)
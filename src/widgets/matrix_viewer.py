@@ -19,6 +19,18 @@
 
 from gi.repository import Gtk, GObject, Gio
 
+import asyncio
+import collections
+
+# The rows fetched at once by a paged matrix
+PAGE_SIZE = 200
+
+# The pages a paged matrix keeps in memory
+MAX_PAGES = 16
+
+# The parsed rows a lazy matrix keeps in memory
+MAX_CACHED_ROWS = 1024
+
 
 class MatrixRow(GObject.GObject):
     __gtype_name__ = 'MatrixRow'
@@ -65,6 +77,199 @@ class Matrix(GObject.GObject):
         return self._rows
 
 
+class PagedMatrixRows(GObject.Object, Gio.ListModel):
+    """A list of rows that are fetched a page at a time, only when the
+    view asks for them. Rows not fetched yet are empty placeholders
+
+    :param int n_rows: The number of rows
+    :param fetch_page: An async callable that takes the first row and the
+        row after the last one, returns the labels and the cells of the rows
+    """
+
+    __gtype_name__ = 'PagedMatrixRows'
+
+    def __init__(self, n_rows, fetch_page, page_size=PAGE_SIZE):
+        super().__init__()
+
+        self._n_rows = n_rows
+        self._fetch_page = fetch_page
+        self._page_size = page_size
+
+        self._pages = collections.OrderedDict()
+        self._loaded = set()
+        self._lock = asyncio.Lock()
+
+    def do_get_item_type(self):
+        return MatrixRow
+
+    def do_get_n_items(self):
+        return self._n_rows
+
+    def do_get_item(self, position):
+        if position >= self._n_rows:
+            return None
+
+        page = position // self._page_size
+        rows = self._get_page(page)
+
+        return rows[position - page * self._page_size]
+
+    def _get_page(self, page):
+        if page in self._pages:
+            self._pages.move_to_end(page)
+            return self._pages[page]
+
+        start = page * self._page_size
+        end = min(start + self._page_size, self._n_rows)
+
+        rows = []
+        for number in range(start, end):
+            row = MatrixRow()
+            row.set_number(number)
+            rows.append(row)
+
+        self._pages[page] = rows
+        while len(self._pages) > MAX_PAGES:
+            old_page, _rows = self._pages.popitem(last=False)
+            self._loaded.discard(old_page)
+
+        asyncio.create_task(self._load_page(page))
+
+        return rows
+
+    async def _load_page(self, page):
+        """Fetches a page, one at a time, and replaces its placeholders"""
+
+        async with self._lock:
+            # Scrolled past it while the previous pages were fetched
+            if page not in self._pages or page in self._loaded:
+                return
+
+            start = page * self._page_size
+            end = min(start + self._page_size, self._n_rows)
+
+            try:
+                labels, data = await self._fetch_page(start, end)
+            except Exception as e:
+                print(e)
+                # The placeholders are created and fetched again when the
+                #       rows are asked for the next time
+                self._pages.pop(page, None)
+                return
+
+        if page not in self._pages:
+            return
+
+        rows = list(self._pages[page])
+        for index, label, cells in zip(range(len(rows)), labels, data):
+            row = MatrixRow()
+            row.set_number(label)
+            for cell in cells:
+                row.append(cell)
+            rows[index] = row
+
+        self._pages[page] = rows
+        self._loaded.add(page)
+
+        self.items_changed(start, len(rows), len(rows))
+
+
+class PagedMatrix(Matrix):
+    """A matrix with rows fetched only when they are shown
+
+    :param int n_rows: The number of rows
+    :param fetch_page: The callable used to fetch the rows, see
+        PagedMatrixRows
+    """
+
+    __gtype_name__ = 'PagedMatrix'
+
+    def __init__(self, n_rows, fetch_page):
+        super().__init__()
+
+        self._rows = PagedMatrixRows(n_rows, fetch_page)
+
+    def append(self, row):
+        raise TypeError("The rows of a paged matrix can't be added")
+
+
+class LazyMatrixRows(GObject.Object, Gio.ListModel):
+    """A list of rows that are parsed only when the view asks for them,
+    rows can be added while the list is shown
+
+    :param get_row: A callable that takes the position of a row and
+        returns its cells
+    """
+
+    __gtype_name__ = 'LazyMatrixRows'
+
+    def __init__(self, get_row):
+        super().__init__()
+
+        self._n_rows = 0
+        self._get_row = get_row
+
+        self._rows = collections.OrderedDict()
+
+    def do_get_item_type(self):
+        return MatrixRow
+
+    def do_get_n_items(self):
+        return self._n_rows
+
+    def do_get_item(self, position):
+        if position >= self._n_rows:
+            return None
+
+        if position in self._rows:
+            self._rows.move_to_end(position)
+            return self._rows[position]
+
+        row = MatrixRow()
+        row.set_number(position + 1)
+        try:
+            for cell in self._get_row(position):
+                row.append(cell.strip())
+        except Exception as e:
+            print(e)
+
+        self._rows[position] = row
+        while len(self._rows) > MAX_CACHED_ROWS:
+            self._rows.popitem(last=False)
+
+        return row
+
+    def set_n_rows(self, n_rows):
+        """Adds the rows that became available"""
+
+        if n_rows <= self._n_rows:
+            return
+
+        added = n_rows - self._n_rows
+        self._n_rows = n_rows
+        self.items_changed(n_rows - added, 0, added)
+
+
+class LazyMatrix(Matrix):
+    """A matrix with rows parsed only when they are shown
+
+    :param get_row: The callable used to parse the rows, see LazyMatrixRows
+    """
+
+    __gtype_name__ = 'LazyMatrix'
+
+    def __init__(self, get_row):
+        super().__init__()
+
+        self._rows = LazyMatrixRows(get_row)
+
+    def append(self, row):
+        raise TypeError("The rows of a lazy matrix can't be added")
+
+    def set_n_rows(self, n_rows):
+        self._rows.set_n_rows(n_rows)
+
+
 class MatrixViewer(Gtk.ColumnView):
     __gtype_name__ = 'MatrixViewer'
 
@@ -17,13 +17,13 @@
 #
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import Gtk, Pango
-from ..interfaces.style_update import IStyleUpdate
+from gi.repository import Gtk
 from ..interfaces.disconnectable import IDisconnectable
+from ..others.tag_tables import TagTables
 import re
 
 
-class TerminalTextView(Gtk.TextView, IStyleUpdate):
+class TerminalTextView(Gtk.TextView):
     __gtype_name__ = "TerminalTextView"
 
     ESCAPE_SEQUENCE_RE = re.compile(r"\033\[(\d+(;\d+)*)m")
@@ -78,6 +78,10 @@ class TerminalTextView(Gtk.TextView, IStyleUpdate):
         super().__init__(**kwargs)
         IDisconnectable.__init__(self)
 
+        # The tags are shared and recolored by TagTables
+        self.set_buffer(Gtk.TextBuffer(
+            tag_table=TagTables().get_terminal_table()))
+
         self.set_wrap_mode(Gtk.WrapMode.WORD)
         self.set_editable(False)
         self.set_cursor_visible(False)
@@ -89,66 +93,6 @@ class TerminalTextView(Gtk.TextView, IStyleUpdate):
 
         self.current_tags = set()
         self.buffer = self.get_buffer()
-        self._create_tags()
-
-        IStyleUpdate.__init__(self)
-
-    def _create_tags(self):
-        # Standard foreground colors (30-37)
-        self.buffer.create_tag("fg_30", foreground="#000000")  # Black
-        self.buffer.create_tag("fg_31", foreground="#FF0000")  # Red
-        self.buffer.create_tag("fg_32", foreground="#00FF00")  # Green
-        self.buffer.create_tag("fg_33", foreground="#FFFF00")  # Yellow
-        self.buffer.create_tag("fg_34", foreground="#0000FF")  # Blue
-        self.buffer.create_tag("fg_35", foreground="#FF00FF")  # Magenta
-        self.buffer.create_tag("fg_36", foreground="#00FFFF")  # Cyan
-        self.buffer.create_tag("fg_37", foreground="#FFFFFF")  # White
-
-        # Bright foreground colors (90-97)
-        self.buffer.create_tag("fg_90", foreground="#808080")  # Bright Black
-        self.buffer.create_tag("fg_91", foreground="#FF8080")  # Bright Red
-        self.buffer.create_tag("fg_92", foreground="#80FF80")  # Bright Green
-        self.buffer.create_tag("fg_93", foreground="#FFFF80")  # Bright Yellow
-        self.buffer.create_tag("fg_94", foreground="#8080FF")  # Bright Blue
-        self.buffer.create_tag("fg_95", foreground="#FF80FF")  # Bright Magenta
-        self.buffer.create_tag("fg_96", foreground="#80FFFF")  # Bright Cyan
-        self.buffer.create_tag("fg_97", foreground="#FFFFFF")  # Bright White
-
-        # Standard background colors (40-47)
-        self.buffer.create_tag("bg_40", background="#000000")  # Black
-        self.buffer.create_tag("bg_41", background="#FF0000")  # Red
-        self.buffer.create_tag("bg_42", background="#00FF00")  # Green
-        self.buffer.create_tag("bg_43", background="#FFFF00")  # Yellow
-        self.buffer.create_tag("bg_44", background="#0000FF")  # Blue
-        self.buffer.create_tag("bg_45", background="#FF00FF")  # Magenta
-        self.buffer.create_tag("bg_46", background="#00FFFF")  # Cyan
-        self.buffer.create_tag("bg_47", background="#FFFFFF")  # White
-
-        # Bright background colors (100-107)
-        self.buffer.create_tag("bg_100", background="#808080")  # Bright Black
-        self.buffer.create_tag("bg_101", background="#FF8080")  # Bright Red
-        self.buffer.create_tag("bg_102", background="#80FF80")  # Bright Green
-        self.buffer.create_tag("bg_103", background="#FFFF80")  # Bright Yellow
-        self.buffer.create_tag("bg_104", background="#8080FF")  # Bright Blue
-        self.buffer.create_tag("bg_105", background="#FF80FF")  # Bright Magenta
-        self.buffer.create_tag("bg_106", background="#80FFFF")  # Bright Cyan
-        self.buffer.create_tag("bg_107", background="#FFFFFF")  # Bright White
-
-        # Style tags
-        self.buffer.create_tag("reset")  # Empty tag for reset
-        self.buffer.create_tag("sgr_1", weight=Pango.Weight.BOLD)
-        self.buffer.create_tag("sgr_3", style=Pango.Style.ITALIC)
-        self.buffer.create_tag("sgr_4", underline=Pango.Underline.SINGLE)
-        self.buffer.create_tag("sgr_7")
-        self.buffer.create_tag("sgr_9", strikethrough=True)
-
-        # Reset tags
-        self.buffer.create_tag("reset_weight", weight=Pango.Weight.NORMAL)
-        self.buffer.create_tag("reset_style", style=Pango.Style.NORMAL)
-        self.buffer.create_tag(
-            "reset_underline", underline=Pango.Underline.NONE
-        )
-        self.buffer.create_tag("reset_inverse")
 
     def insert_with_escapes(self, text):
         buffer = self.get_buffer()
@@ -244,20 +188,5 @@ class TerminalTextView(Gtk.TextView, IStyleUpdate):
         buffer.set_text("")
         self.current_tags.clear()
 
-    def update_style_scheme(self, *_args):
-        colors = self.style_manager.get_current_colors()
-
-        for i in range(0, 16):
-            fg_base = 3 if i < 8 else 9
-            fg_tag = self.buffer.get_tag_table().lookup(f"fg_{fg_base}{i}")
-            if fg_tag:
-                fg_tag.set_property("foreground", colors[f"color{i}"])
-
-            bg_base = 4 if i < 8 else 10
-            bg_tag = self.buffer.get_tag_table().lookup(f"bg_{bg_base}{i}")
-            if bg_tag:
-                bg_tag.set_property("background", colors[f"color{i}"])
-
     def disconnect(self, *_args):
         IDisconnectable.disconnect(self)
-        IStyleUpdate.disconnect(self)
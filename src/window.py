@@ -25,7 +25,6 @@ from gi.repository import Panel, GObject
 
 import os
 import asyncio
-import re
 
 from .utils.async_helpers import dialog_choose_async
 
@@ -63,7 +62,7 @@ from .interfaces.searchable import ISearchable
 from .widgets.launcher import Launcher
 from .widgets.chapter_row import ChapterRow
 
-from .utils.converters import is_mime_displayable
+from .utils.converters import is_mime_displayable, get_file_mime
 from .utils.converters import get_language_icon
 
 from gettext import gettext as _
@@ -72,14 +71,6 @@ GObject.type_register(TerminalPanel)
 GObject.type_register(KernelTerminalPanel)
 
 
-class TreeNode(GObject.Object):
-    def __init__(self, node_name, index, children=None):
-        super().__init__()
-        self.node_name = node_name
-        self.index = index
-        self.children = children or []
-
-
 @Gtk.Template(resource_path='/io/github/nokse22/PlanetNine/gtk/window.ui')
 class PlanetnineWindow(Adw.ApplicationWindow):
     __gtype_name__ = 'PlanetnineWindow'
@@ -334,6 +325,13 @@ class PlanetnineWindow(Adw.ApplicationWindow):
             'empty-json', self.on_empty_json_action)
         self.create_action(
             'empty-geo-json', self.on_empty_geo_json_action)
+
+        #   Open a variable of the visible page's kernel as a table
+
+        self.create_action_with_target(
+            'open-variable',
+            GLib.VariantType.new("s"),
+            self.on_open_variable_action)
         #
 
         self.command_line = CommandLine()
@@ -688,6 +686,7 @@ class PlanetnineWindow(Adw.ApplicationWindow):
 
         file_filter = Gtk.FileFilter(name=_("All supported formats"))
         file_filter.add_pattern("*.ipynb")
+        file_filter.add_pattern("*.ipynb.gz")
         filter_list = Gio.ListStore.new(Gtk.FileFilter())
         filter_list.append(file_filter)
 
@@ -738,6 +737,30 @@ class PlanetnineWindow(Adw.ApplicationWindow):
 
         self.open_file(file_path)
 
+    def on_open_variable_action(self, action, parameter):
+        """Opens a variable of the kernel of the visible page in a table
+        page, takes the variable's name"""
+        name = parameter.get_string()
+
+        page = self.get_visible_page()
+        if not isinstance(page, IKernel):
+            return
+
+        kernel = page.get_kernel()
+        if kernel is None:
+            return
+
+        if kernel.language != "python":
+            self.activate_action(
+                "win.error-toast",
+                GLib.Variant(
+                    "(ss)", (
+                        _("Could not open the variable"),
+                        _("Only python kernels are supported"))))
+            return
+
+        self.panel_grid.add(MatrixPage.new_from_variable(kernel, name))
+
     def open_file(self, file_path):
         """Opens a file given his path, if already open it raises it's page"""
         if self.raise_page_if_open(file_path):
@@ -747,7 +770,8 @@ class PlanetnineWindow(Adw.ApplicationWindow):
             gfile = Gio.File.new_for_path(file_path)
 
             file_info = gfile.query_info("standard::content-type", 0, None)
-            mime_type = file_info.get_content_type()
+            mime_type = get_file_mime(
+                file_path, file_info.get_content_type())
 
             match mime_type:
                 case "application/json":
@@ -1141,13 +1165,17 @@ class PlanetnineWindow(Adw.ApplicationWindow):
     def on_search_next_match(self, *_args):
         """Handles focusing to the next search match"""
 
-        pass
+        page = self.get_visible_page()
+        if isinstance(page, NotebookPage):
+            page.select_search_match(1)
 
     @Gtk.Template.Callback("on_search_previous_match")
     def on_search_previous_match(self, *_args):
         """Handles focusing to the previous search match"""
 
-        pass
+        page = self.get_visible_page()
+        if isinstance(page, NotebookPage):
+            page.select_search_match(-1)
 
     @Gtk.Template.Callback("on_search_close_clicked")
     def on_search_close_clicked(self, *_args):
@@ -1363,61 +1391,10 @@ class PlanetnineWindow(Adw.ApplicationWindow):
         """Run when the chapter menu popover is activate to populate it"""
 
         page = self.get_visible_page()
-        if not isinstance(page, NotebookPage):
+        if not isinstance(page, NotebookPage) or page.outline is None:
             return
 
-        chapters = []
-
-        header_pattern = re.compile(r'^(#{1,6})\s+(.+)', re.MULTILINE)
-
-        for index, cell in enumerate(page.notebook_model):
-            if cell.cell_type == CellType.TEXT:
-                matches = header_pattern.findall(cell.source)
-
-                for match in matches:
-                    chapters.append((len(match[0]), match[1].strip(), index))
-
-        chapter_model = Gio.ListStore.new(TreeNode)
-
-        level_stack = []
-        for chapter in chapters:
-            level, title, index = chapter
-            node = TreeNode(title, index, [])
-
-            if level == 0:
-                chapter_model.append(node)
-                level_stack = [(level, node)]
-            else:
-                while level_stack and level_stack[-1][0] >= level:
-                    level_stack.pop()
-
-                if not level_stack:
-                    chapter_model.append(node)
-                    level_stack = [(level, node)]
-                    continue
-
-                parent_node = level_stack[-1][1]
-                parent_node.children.append(node)
-
-                level_stack.append((level, node))
-
-        tree_list_model = Gtk.TreeListModel.new(
-            chapter_model, False, True, self.create_model_func)
-
-        selection_model = Gtk.NoSelection(model=tree_list_model)
-
-        self.chapters_list_view.set_model(selection_model)
-
-    def create_model_func(self, item):
-        """Chapter tree create sub model function"""
-
-        if item.children == []:
-            return None
-
-        child_model = Gio.ListStore.new(TreeNode)
-        for child in item.children:
-            child_model.append(child)
-        return child_model
+        self.chapters_list_view.set_model(page.outline.get_model())
 
     @Gtk.Template.Callback("on_chapter_factory_setup")
     def on_chapter_factory_setup(self, factory, list_item):
@@ -0,0 +1,130 @@
+# test_csv_index.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.models import csv_index
+from src.models.csv_index import CsvIndex
+
+import csv
+import threading
+import pytest
+
+
+CSV_PATH = './data/csv_edge_cases.csv'
+
+
+#   Helpers
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        return list(csv.reader(file))
+
+
+def build_index(path):
+    index = CsvIndex(path)
+    index.build()
+    return index
+
+
+#   Tests
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 64, 4 * 1024 * 1024])
+def test_edge_cases(monkeypatch, chunk_size):
+    monkeypatch.setattr(csv_index, "CHUNK_SIZE", chunk_size)
+
+    index = build_index(CSV_PATH)
+    expected = read_rows(CSV_PATH)
+
+    assert index.finished
+    assert index.progress == 1.0
+    assert index.n_rows == len(expected)
+    assert [index.get_row(row) for row in range(index.n_rows)] == expected
+
+    index.close()
+
+
+def test_multiline_field():
+    index = build_index(CSV_PATH)
+
+    assert index.get_row(8)[0] == "Grace\nHopper"
+    assert index.get_row(9)[0] == "John"
+
+    index.close()
+
+
+@pytest.mark.parametrize("content", [
+    b"",
+    b"a,b\n1,2",
+    b"a,b\n1,2\n",
+    b"a,b\r\n\"x\r\ny\",2\r\n",
+    b"\xef\xbb\xbfa,b\n1,2\n",
+    b"a,b\n\n1,2\n",
+])
+def test_line_endings(tmp_path, content):
+    path = tmp_path / "file.csv"
+    path.write_bytes(content)
+
+    index = build_index(str(path))
+
+    assert [index.get_row(row) for row in range(index.n_rows)] == (
+        read_rows(path))
+
+    index.close()
+
+
+def test_rows_readable_while_indexing(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_index, "CHUNK_SIZE", 64)
+
+    path = tmp_path / "file.csv"
+    path.write_text("".join(f"{row},value {row}\n" for row in range(1000)))
+
+    index = CsvIndex(str(path))
+    thread = threading.Thread(target=index.build)
+    thread.start()
+
+    index.first_rows.wait()
+    n_rows = index.n_rows
+    if n_rows:
+        assert index.get_row(n_rows - 1) == [
+            str(n_rows - 1), f"value {n_rows - 1}"]
+
+    thread.join()
+
+    assert index.n_rows == 1000
+    assert index.get_row(999) == ["999", "value 999"]
+
+    index.close()
+
+
+def test_close_while_indexing(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_index, "CHUNK_SIZE", 16)
+
+    path = tmp_path / "file.csv"
+    path.write_text("a,b\n" * 10000)
+
+    index = CsvIndex(str(path))
+    thread = threading.Thread(target=index.build)
+    thread.start()
+
+    index.first_rows.wait()
+    index.close()
+    thread.join()
+
+    # The worker thread released the file
+    with pytest.raises(ValueError):
+        index.get_row(0)
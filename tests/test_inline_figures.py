@@ -0,0 +1,58 @@
+# test_inline_figures.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.utils.inline_figures import (
+    LOGICAL_DPI, MAX_FIGURE_WIDTH, MIN_FIGURE_WIDTH, get_configure_code,
+    get_figure_options, get_image_size)
+
+
+def test_figure_fits_output_width():
+    figsize, dpi, formats = get_figure_options(480)
+
+    assert figsize == (5.0, 3.75)
+    assert dpi == LOGICAL_DPI
+    assert formats == ("png",)
+
+
+def test_figure_width_is_clamped():
+    for width, expected in [(5000, MAX_FIGURE_WIDTH), (10, MIN_FIGURE_WIDTH)]:
+        figsize, _dpi, _formats = get_figure_options(width)
+        assert round(figsize[0] * LOGICAL_DPI) == expected
+
+
+def test_hidpi_uses_retina():
+    assert get_figure_options(480, 2)[2] == ("retina",)
+
+
+def test_configure_code():
+    code = get_configure_code(480, 2)
+
+    compile(code, "<kernel>", "exec")
+    assert "_planetnine_configure_figures((5.0, 3.75), 96, ('retina',))" in (
+        code)
+
+
+def test_image_size():
+    metadata = {"image/png": {"width": 480, "height": 360}}
+
+    assert get_image_size(metadata, "image/png") == (480, 360)
+    assert get_image_size(metadata, "image/jpeg") is None
+    assert get_image_size(None, "image/png") is None
+    assert get_image_size(
+        {"image/png": {"width": "480px"}}, "image/png") is None
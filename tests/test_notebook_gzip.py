@@ -0,0 +1,102 @@
+# test_notebook_gzip.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.utils.notebook_gzip import (
+    GzipStreamDecoder, iter_compressed, iter_decompressed,
+    is_compressed_path, load_contents_model)
+from src.utils.notebook_stream_parser import NotebookStreamParser
+
+import os
+import gzip
+import json
+import base64
+import pytest
+
+
+NOTEBOOKS_PATH = './data/notebooks'
+
+CHUNK_SIZES = [1, 7, 4096]
+
+
+#   Helpers
+
+def read_notebooks():
+    for file_name in sorted(os.listdir(NOTEBOOKS_PATH)):
+        with open(os.path.join(NOTEBOOKS_PATH, file_name), 'rb') as file:
+            yield file.read()
+
+
+#   Tests
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_roundtrip(chunk_size):
+    for data in read_notebooks():
+        compressed = b"".join(iter_compressed(
+            data[start:start + 100] for start in range(0, len(data), 100)))
+
+        assert gzip.decompress(compressed) == data
+
+        chunks = [
+            compressed[start:start + chunk_size]
+            for start in range(0, len(compressed), chunk_size)]
+
+        parser = NotebookStreamParser()
+        cells = []
+        for chunk in iter_decompressed(chunks):
+            cells += parser.feed(chunk)
+        notebook = parser.close()
+
+        expected = json.loads(data)
+        assert notebook["metadata"] == expected["metadata"]
+        assert len(cells) == len(expected["cells"])
+
+
+def test_gzip_file():
+    data = next(read_notebooks())
+
+    assert b"".join(iter_decompressed([gzip.compress(data)])) == data
+
+
+def test_multiple_members():
+    compressed = gzip.compress(b'{"a": ') + gzip.compress(b'1}')
+
+    assert b"".join(iter_decompressed([compressed])) == b'{"a": 1}'
+
+
+def test_truncated():
+    compressed = gzip.compress(next(read_notebooks()))
+
+    decoder = GzipStreamDecoder()
+    list(decoder.feed(compressed[:len(compressed) // 2]))
+
+    with pytest.raises(ValueError):
+        decoder.close()
+
+
+def test_contents_model():
+    data = next(read_notebooks())
+    model = {
+        "type": "file",
+        "format": "base64",
+        "content": base64.b64encode(gzip.compress(data)).decode(),
+    }
+
+    assert load_contents_model(model) == json.loads(data)
+    assert is_compressed_path("a/Notebook.IPYNB.gz")
+    assert not is_compressed_path("a/Notebook.ipynb")
@@ -0,0 +1,83 @@
+# test_notebook_json.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.utils.notebook_json import (
+    dumps_cell, dumps_notebook, iter_notebook, get_encoded_size,
+    write_file_atomic)
+
+import os
+import copy
+import nbformat
+
+
+NOTEBOOKS_PATH = './data/notebooks'
+
+
+#   Tests
+
+def test_same_as_nbformat():
+    for file_name in sorted(os.listdir(NOTEBOOKS_PATH)):
+        with open(os.path.join(NOTEBOOKS_PATH, file_name), 'r') as file:
+            notebook = nbformat.reads(file.read(), as_version=4)
+
+        original = copy.deepcopy(notebook)
+        fragments = [dumps_cell(cell) for cell in notebook.cells]
+
+        assert dumps_notebook(notebook, fragments) == nbformat.writes(notebook)
+        assert notebook == original
+
+
+def test_empty_notebook():
+    notebook = nbformat.v4.new_notebook()
+
+    assert dumps_notebook(notebook, []) == nbformat.writes(notebook)
+
+
+def test_transient_metadata():
+    notebook = nbformat.v4.new_notebook()
+    notebook.metadata["orig_nbformat"] = 3
+    notebook.cells.append(nbformat.v4.new_code_cell(
+        "a = 1\nb = 2", metadata={"trusted": True}))
+
+    fragments = [dumps_cell(cell) for cell in notebook.cells]
+
+    assert dumps_notebook(notebook, fragments) == nbformat.writes(notebook)
+
+
+def test_write_file_atomic(tmp_path):
+    file_path = tmp_path / "notebook.ipynb"
+    file_path.write_text("old")
+
+    write_file_atomic(str(file_path), "new é")
+
+    assert file_path.read_text() == "new é"
+    assert os.listdir(tmp_path) == ["notebook.ipynb"]
+
+
+def test_encoded_size():
+    notebook_node = nbformat.v4.new_notebook()
+    fragments = [
+        dumps_cell(nbformat.v4.new_markdown_cell("caf\u00e9 \u2603")),
+        dumps_cell(nbformat.v4.new_code_cell("print(1)")),
+    ]
+
+    text = dumps_notebook(notebook_node, fragments)
+
+    assert get_encoded_size(iter_notebook(notebook_node, fragments)) == len(
+        text.encode("utf-8"))
@@ -0,0 +1,106 @@
+# test_notebook_stream_parser.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.utils.notebook_stream_parser import (
+    NotebookStreamParser, NotebookStreamError)
+
+import os
+import json
+import pytest
+
+
+NOTEBOOKS_PATH = './data/notebooks'
+
+CHUNK_SIZES = [1, 3, 7, 64, 4096]
+
+
+#   Helpers
+
+def parse_in_chunks(data, chunk_size):
+    parser = NotebookStreamParser()
+    cells = []
+    for start in range(0, len(data), chunk_size):
+        cells += parser.feed(data[start:start + chunk_size])
+
+    notebook_node = parser.close()
+    for json_cell, raw_outputs in cells:
+        if raw_outputs is not None:
+            json_cell['outputs'] = json.loads(raw_outputs)
+        notebook_node['cells'].append(json_cell)
+
+    return notebook_node
+
+
+#   Tests
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_notebooks_in_chunks(chunk_size):
+    for file_name in sorted(os.listdir(NOTEBOOKS_PATH)):
+        with open(os.path.join(NOTEBOOKS_PATH, file_name), 'rb') as file:
+            data = file.read()
+
+        assert parse_in_chunks(data, chunk_size) == json.loads(data)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_escaped_brackets_and_keys(chunk_size):
+    notebook = {
+        "metadata": {"nested": {"cells": [1, 2]}, "text": "\\\"]}["},
+        "cells": [{
+            "cell_type": "code",
+            "id": "a",
+            "execution_count": 1,
+            "metadata": {"outputs": []},
+            "source": ["print(\"}]\\\\\")"],
+            "outputs": [{
+                "output_type": "stream",
+                "name": "stdout",
+                "text": "\\\"]}è"
+            }]
+        }],
+        "nbformat": 4,
+        "nbformat_minor": 5
+    }
+    data = json.dumps(notebook, indent=1, ensure_ascii=False).encode()
+
+    assert parse_in_chunks(data, chunk_size) == notebook
+
+
+def test_outputs_stay_raw():
+    data = json.dumps({"cells": [
+        {"cell_type": "markdown", "id": "a", "metadata": {}, "source": ""},
+        {"cell_type": "code", "id": "b", "metadata": {}, "source": "",
+         "execution_count": None, "outputs": [{"output_type": "error"}]},
+    ]}).encode()
+
+    parser = NotebookStreamParser()
+    cells = parser.feed(data)
+    parser.close()
+
+    assert cells[0][1] is None
+    assert cells[1][0]['outputs'] == []
+    assert json.loads(cells[1][1]) == [{"output_type": "error"}]
+
+
+def test_incomplete_notebook():
+    parser = NotebookStreamParser()
+    parser.feed(b'{"cells": [{"cell_type": "code"')
+
+    with pytest.raises(NotebookStreamError):
+        parser.close()
@@ -0,0 +1,107 @@
+# test_output_buffers.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.models.output import Output, OutputType, DataType
+
+import base64
+
+
+PNG_DATA = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+#   Helpers
+
+def make_content():
+    return {
+        "data": {"image/png": "", "text/plain": "<Figure>"},
+        "metadata": {},
+        "transient": {},
+        "buffer_paths": [["data", "image/png"]],
+    }
+
+
+#   Tests
+
+def test_buffer_is_not_copied():
+    buffer = memoryview(bytearray(PNG_DATA))
+
+    output = Output(OutputType.DISPLAY_DATA)
+    output.parse(make_content(), [buffer])
+
+    assert output.data_type == DataType.IMAGE_PNG
+    assert output.get_image_bytes() is buffer
+
+
+def test_buffer_saved_as_base64():
+    output = Output(OutputType.DISPLAY_DATA)
+    output.parse(make_content(), [memoryview(PNG_DATA)])
+
+    output_node = output.get_output_node()
+
+    assert output_node["data"]["image/png"] == base64.b64encode(
+        PNG_DATA).decode("ascii")
+    assert output_node["data"]["text/plain"] == "<Figure>"
+
+    loaded = Output.new_from_json(output_node)
+    assert loaded.get_image_bytes() == PNG_DATA
+
+
+def test_text_buffers_saved_as_text():
+    content = {
+        "data": {
+            "text/html": "",
+            "application/json": "",
+            "text/plain": "",
+        },
+        "metadata": {},
+        "transient": {},
+        "buffer_paths": [
+            ["data", "text/html"],
+            ["data", "application/json"],
+            ["data", "text/plain"],
+        ],
+    }
+    buffers = [
+        memoryview(b"<b>hi</b>"),
+        memoryview(b'{"a": [1, 2]}'),
+        memoryview("caf\u00e9".encode("utf-8")),
+    ]
+
+    output = Output(OutputType.DISPLAY_DATA)
+    output.parse(content, buffers)
+
+    output_node = output.get_output_node()
+
+    assert output_node["data"]["text/html"] == "<b>hi</b>"
+    assert output_node["data"]["application/json"] == {"a": [1, 2]}
+    assert output_node["data"]["text/plain"] == "caf\u00e9"
+
+    loaded = Output.new_from_json(output_node)
+    assert loaded.data_type == DataType.JSON
+    assert loaded.data_content == '{"a": [1, 2]}'
+
+
+def test_without_buffers():
+    content = make_content()
+    content["data"]["image/png"] = base64.b64encode(PNG_DATA).decode()
+
+    output = Output(OutputType.DISPLAY_DATA)
+    output.parse(content)
+
+    assert output.get_image_bytes() == PNG_DATA
@@ -0,0 +1,79 @@
+# test_output_store.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.utils.output_store import (
+    OutputStore, get_outputs_reference, get_sidecar_path)
+
+import os
+import nbformat
+import tempfile
+
+
+NOTEBOOKS_PATH = './data/notebooks'
+
+
+#   Tests
+
+def test_roundtrip():
+    with tempfile.TemporaryDirectory() as directory:
+        store = OutputStore(
+            get_sidecar_path(os.path.join(directory, "a.ipynb")), 0)
+
+        for file_name in sorted(os.listdir(NOTEBOOKS_PATH)):
+            with open(os.path.join(NOTEBOOKS_PATH, file_name), 'r') as file:
+                notebook = nbformat.reads(file.read(), as_version=4)
+
+            for cell in notebook.cells:
+                stored = store.externalize_cell(cell)
+
+                if cell.get("outputs"):
+                    assert stored["outputs"] == []
+                    assert get_outputs_reference(stored) is not None
+                    assert "planetnine" not in cell.metadata
+
+                assert store.inline_cell(stored) == cell
+
+        store.close()
+
+
+def test_threshold():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "a.ipynb.outputs")
+        store = OutputStore(path)
+
+        cell = nbformat.v4.new_code_cell("print(1)")
+        cell.outputs.append(nbformat.v4.new_output("stream", text="1\n"))
+
+        assert store.externalize_cell(cell) is cell
+        assert not os.path.exists(path)
+
+
+def test_prune():
+    with tempfile.TemporaryDirectory() as directory:
+        store = OutputStore(os.path.join(directory, "a.ipynb.outputs"))
+
+        kept = store.put(b"[1]")
+        removed = store.put(b"[2]")
+
+        assert store.prune({kept}) == 1
+        assert store.has(kept)
+        assert store.get(removed) is None
+
+        store.close()
+        assert store.get(kept) == b"[1]"
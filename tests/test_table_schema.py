@@ -0,0 +1,91 @@
+# test_table_schema.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.utils.table_schema import (
+    DATA_RESOURCE_MIME, FORMATTER_SOURCE, get_table_size,
+    parse_data_resource)
+
+import json
+
+
+# What pandas writes for DataFrame({"a": [1.5, None], "b": ["x", "y"]})
+RESOURCE = {
+    "schema": {
+        "fields": [
+            {"name": "index", "type": "integer"},
+            {"name": "a", "type": "number"},
+            {"name": "b", "type": "string"},
+        ],
+        "primaryKey": ["index"],
+        "pandas_version": "1.4.0",
+    },
+    "data": [
+        {"index": 0, "a": 1.5, "b": "x"},
+        {"index": 1, "a": None, "b": "y"},
+    ],
+}
+
+
+def test_parse_data_resource():
+    column_names, labels, rows = parse_data_resource(RESOURCE)
+
+    assert column_names == ["a", "b"]
+    assert labels == ["0", "1"]
+    assert rows == [["1.5", "x"], ["", "y"]]
+
+
+def test_parse_data_resource_string():
+    assert parse_data_resource(json.dumps(RESOURCE)) == (
+        parse_data_resource(RESOURCE))
+
+
+def test_parse_data_resource_without_key():
+    resource = {"data": [{"a": 1, "b": 2}, {"a": 3, "b": 4}]}
+
+    column_names, labels, rows = parse_data_resource(resource)
+
+    assert column_names == ["a", "b"]
+    assert labels == ["0", "1"]
+    assert rows == [["1", "2"], ["3", "4"]]
+
+
+def test_parse_data_resource_multi_index():
+    resource = {
+        "schema": {
+            "fields": [{"name": "x"}, {"name": "y"}, {"name": "value"}],
+            "primaryKey": ["x", "y"],
+        },
+        "data": [{"x": "a", "y": 1, "value": 10}],
+    }
+
+    _column_names, labels, _rows = parse_data_resource(resource)
+
+    assert labels == ["a 1"]
+
+
+def test_table_size():
+    metadata = {DATA_RESOURCE_MIME: {"rows": 50000000, "columns": 3}}
+
+    assert get_table_size(metadata, 50) == (50000000, 3)
+    assert get_table_size({}, 50) == (50, None)
+    assert get_table_size(None, 2) == (2, None)
+
+
+def test_formatter_source_compiles():
+    compile(FORMATTER_SOURCE, "<kernel>", "exec")
@@ -0,0 +1,111 @@
+# test_variable_pager.py
+#
+# Copyright 2024 Nokse22
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from src.utils.variable_pager import (
+    HELPER_NAME, HELPER_SOURCE, MAX_CELL_LENGTH, VariablePager, parse_result)
+
+import json
+import asyncio
+import pytest
+
+
+class FakeKernel:
+    """Evaluates the user expressions like ipykernel does"""
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.requests = []
+
+    async def evaluate(self, expressions, code=""):
+        self.requests.append(expressions)
+        exec(code, self.namespace)
+        results = {}
+        for name, expression in expressions.items():
+            try:
+                value = eval(expression, self.namespace)
+                results[name] = {
+                    "status": "ok", "data": {"text/plain": repr(value)}}
+            except Exception as e:
+                results[name] = {
+                    "status": "error",
+                    "ename": type(e).__name__,
+                    "evalue": str(e)}
+        return results
+
+
+def get_window(obj, *window):
+    namespace = {}
+    exec(HELPER_SOURCE, namespace)
+    return json.loads(namespace[HELPER_NAME](obj, *window))
+
+
+def test_list_window():
+    rows = [[row * 10 + column for column in range(10)] for row in range(50)]
+
+    window = get_window(rows, 20, 23, 4, 6)
+
+    assert window["rows"] == 50
+    assert window["columns"] == 10
+    assert window["column_names"] == ["4", "5"]
+    assert window["index"] == ["20", "21", "22"]
+    assert window["data"] == [["204", "205"], ["214", "215"], ["224", "225"]]
+
+
+def test_flat_list_window():
+    window = get_window(list(range(5)), 3, 10, 0, 100)
+
+    assert window["rows"] == 5
+    assert window["columns"] == 1
+    assert window["data"] == [["3"], ["4"]]
+
+
+def test_long_cells_are_cut():
+    window = get_window([["x" * 1000]], 0, 1, 0, 1)
+
+    assert len(window["data"][0][0]) == MAX_CELL_LENGTH
+
+
+def test_pager_reads_window():
+    rows = [[row, row * 2] for row in range(1000)]
+    kernel = FakeKernel({"data": rows})
+    pager = VariablePager(kernel, "data")
+
+    window = asyncio.run(pager.get_window(500, 502, 1, 2))
+
+    assert window["index"] == ["500", "501"]
+    assert window["data"] == [["1000"], ["1002"]]
+    assert kernel.requests == [
+        {"window": f"{HELPER_NAME}(data, 500, 502, 1, 2)"}]
+
+
+def test_pager_missing_variable():
+    pager = VariablePager(FakeKernel({}), "missing")
+
+    with pytest.raises(RuntimeError, match="NameError"):
+        asyncio.run(pager.get_window(0, 10, 0, 10))
+
+
+def test_pager_rejects_expressions():
+    with pytest.raises(ValueError):
+        VariablePager(FakeKernel({}), "__import__('os').system('ls')")
+
+
+def test_parse_result_error():
+    with pytest.raises(RuntimeError):
+        parse_result({"status": "error", "ename": "TypeError"})